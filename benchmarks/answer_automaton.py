@@ -0,0 +1,29 @@
+""" Compares matching an answer against a phrase with k words with alternatives: expanding the 2^k answers and
+    scoring every one of them with fuzz.ratio (the old FuzzyEvaluator.matching), or matching the compiled
+    automaton of the phrase
+
+    python -m benchmarks.answer_automaton
+"""
+from fuzzywuzzy import fuzz
+
+from modules.answer_evaluators import AnswerAutomaton
+from modules.utils.utils import get_all_valid_answers
+from benchmarks.utils import time_it, report
+
+
+def main():
+    for n_words in [1, 4, 8, 12]:
+        phrase = ' '.join(['pick/take the book/notebook'] * (n_words // 2) + ['pick/take'] * (n_words % 2))
+        answer = ' '.join(['take the notebok'] * (n_words // 2) + ['take'] * (n_words % 2))
+        automaton = AnswerAutomaton(phrase)
+        results = {
+            'expanded answers': time_it(lambda: any(fuzz.ratio(answer, x) > 90
+                                                    for x in get_all_valid_answers(phrase)), repeat=3),
+            'compiled automaton': time_it(lambda: automaton.matches(answer), repeat=3, number=10),
+            'compiling + matching': time_it(lambda: AnswerAutomaton(phrase).matches(answer), repeat=3, number=10),
+        }
+        report(f'matching a phrase with {n_words} words with alternatives', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+""" Compares checking an answer: compiling the accepted answers from the target on every answer (the old
+    FuzzyEvaluator.matching) or reusing the compiled answer key of the entry
+
+    python -m benchmarks.answer_key
+"""
+from modules.answer_evaluators import FuzzyEvaluator, AnswerKeyCache
+from benchmarks.utils import time_it, report
+
+
+TARGETS = {
+    'single word': 'apple',
+    'two meanings': 'to leave, to let (something happen)',
+    'slash alternatives': 'to put/place/lay the book/notebook on the table/desk; to set down',
+}
+
+
+def main():
+    evaluator = FuzzyEvaluator()
+    for name, target in TARGETS.items():
+        entry = {'ID':1, 'Translation':target, 'Translation_f':'', 'Alternative Forward':''}
+        cache = AnswerKeyCache()
+        answer = 'to drop the pen'
+        results = {
+            'compiled on every answer': time_it(lambda: evaluator.match_answer(answer, target), number=200),
+            'cached answer key': time_it(lambda: evaluator.match_answer(answer, target,
+                                                                     cache.get(1, 'Forward', lambda x: entry)),
+                                         number=200),
+        }
+        report(f'checking an answer ({name})', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+""" Compares regrading a log of past answers: one FuzzyEvaluator.match_answer call per answer, the batch
+    evaluation in this process, and the batch evaluation in a pool of processes
+
+    python -m benchmarks.batch_evaluator
+"""
+import numpy as np
+
+from modules.answer_evaluators import FuzzyEvaluator, match_answers
+from modules.learner_simulator import SimulatedDatabase
+from benchmarks.utils import time_it, report
+
+
+def main(n_entries=2_000, n_answers=50_000):
+    rng = np.random.default_rng(0)
+    db = SimulatedDatabase(n_entries, rng)
+    ids = rng.choice(db.ids, size=n_answers)
+    targets = [db.entries[x]['Translation'] for x in ids.tolist()]
+    # Mostly right answers, some with a typo, and a few wrong ones
+    answers = [x if r < 0.6 else (x[:3] + x[4:] if r < 0.9 else 'wrong')
+               for x, r in zip(targets, rng.random(n_answers))]
+    directions = ['Forward'] * n_answers
+    evaluator = FuzzyEvaluator()
+
+    results = {
+        'one answer at a time': time_it(lambda: [evaluator.match_answer(x, y, db.get_answer_key(i, 'Forward'))
+                                                 for x, y, i in zip(answers, targets, ids.tolist())], repeat=1),
+        'batch': time_it(lambda: match_answers(answers, ids, directions, db, targets, processes=1), repeat=1),
+        'batch, pool of processes': time_it(lambda: match_answers(answers, ids, directions, db, targets,
+                                                                  min_pool_size=0), repeat=1),
+    }
+    report(f'regrading {n_answers} answers of {n_entries} entries', results)
+
+
+if __name__ == '__main__':
+    main()
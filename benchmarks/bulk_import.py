@@ -0,0 +1,60 @@
+""" Measures the streaming import of large frequency lists: the time of the import, and the memory it takes on
+    top of the imported entries (the peak minus what's still allocated at the end). The reading only holds a
+    chunk at a time, but the new entries of every chunk are kept until they're appended to the receiving sheet
+    in one go (copying the sheet once instead of once per chunk), so the transient memory grows with the
+    imported entries: it's shown next to their size
+
+    python -m benchmarks.bulk_import
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from modules.support_classes.database import DatabaseHandler
+from modules.support_classes.importer import VocabularyImporter
+from modules.utils.excel_ops import save_to_excel
+from benchmarks.utils import make_vocabulary_df, random_words
+
+
+def import_list(excel_file, list_file, chunk_size, trace_memory=False):
+    """ Imports a list into a new sheet, returns the counts, the time, the transient memory (if traced) and the
+        memory taken by the imported entries"""
+    db_handler = DatabaseHandler(excel_file, use_journal=False)
+    importer = VocabularyImporter(db_handler, 'Frequency', chunk_size=chunk_size)
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    counts = importer.import_table(list_file, header=False)
+    seconds = time.perf_counter() - start
+    transient = None
+    if trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        transient = peak - current
+    return counts, seconds, transient, db_handler.sheet_memory['Frequency']
+
+
+def main(sizes=(50_000, 500_000), chunk_size=10_000):
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        excel_file = os.path.join(tmp_dir, 'database.xlsx')
+        save_to_excel(make_vocabulary_df(1_000), excel_file, 'A1')
+        print(f'chunks of {chunk_size} lines')
+        for n_lines in sizes:
+            list_file = os.path.join(tmp_dir, f'frequency_{n_lines}.tsv')
+            with open(list_file, 'w', encoding='utf-8') as f:
+                for word, translation in zip(random_words(n_lines, rng), random_words(n_lines, rng)):
+                    f.write(f'{word}\t{translation}\n')
+            counts, seconds, _, _ = import_list(excel_file, list_file, chunk_size)
+            # Tracing the allocations slows the import down, so it's timed separately
+            _, _, transient, imported = import_list(excel_file, list_file, chunk_size, trace_memory=True)
+            print(f'  {n_lines:<10} lines{seconds * 1000:>12.1f} ms{transient / 2**20:>10.1f} MB transient '
+                  f'for {imported / 2**20:.1f} MB of entries (imported {counts["imported"]}, '
+                  f'skipped {counts["skipped"]})')
+
+
+if __name__ == '__main__':
+    main()
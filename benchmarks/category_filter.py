@@ -0,0 +1,39 @@
+""" Compares the per-ID category filtering with the bitmap CategoryIndex
+
+    python -m benchmarks.category_filter
+"""
+from modules.support_classes.category_index import CategoryIndex
+from benchmarks.utils import make_vocabulary_df, time_it, report
+
+
+def scan_filter(df, included_categories, excluded_categories):
+    """ The filtering done by apply_filter before the category index"""
+    used_ids = df['ID'].values
+    matches_category = lambda x, category: category in df.loc[df['ID']==x, 'Category'].values[0]
+    for cat in excluded_categories:
+        used_ids = [x for x in used_ids if not matches_category(x, cat)]
+    for cat in included_categories:
+        used_ids = [x for x in used_ids if matches_category(x, cat)]
+    return used_ids
+
+
+def bitmap_filter(df, index, included_categories, excluded_categories):
+    return df['ID'].values[index.select(included_categories, excluded_categories)]
+
+
+def main(sizes=(1_000, 5_000, 100_000, 1_000_000), scan_limit=5_000):
+    included, excluded = ['noun'], ['food']
+    for n_rows in sizes:
+        df = make_vocabulary_df(n_rows)
+        results = {}
+        # The scan is quadratic, so it's only timed on the small sheets
+        if n_rows <= scan_limit:
+            results['per-ID scan'] = time_it(lambda: scan_filter(df, included, excluded), repeat=1)
+        results['building the index'] = time_it(lambda: CategoryIndex(df['Category'].values), repeat=3)
+        index = CategoryIndex(df['Category'].values)
+        results['bitmap filter'] = time_it(lambda: bitmap_filter(df, index, included, excluded))
+        report(f'{n_rows} rows', results)
+
+
+if __name__ == '__main__':
+    main()
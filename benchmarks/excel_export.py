@@ -0,0 +1,33 @@
+""" Compares saving a styled database over an existing file: loading the workbook and styling every cell
+    (save_sheets_to_excel) or streaming the rows with their styles in write-only mode (stream_sheets_to_excel)
+
+    python -m benchmarks.excel_export
+"""
+import os
+import shutil
+import tempfile
+
+from modules.utils.excel_ops import save_sheets_to_excel, stream_sheets_to_excel
+from benchmarks.utils import make_vocabulary_df, time_it, report
+
+
+def main(sizes=(5_000, 50_000)):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_rows in sizes:
+            dfs = {'A1':make_vocabulary_df(n_rows), 'A2':make_vocabulary_df(n_rows // 10, seed=1)}
+            # Both functions overwrite the same existing database, like when the application saves
+            original_file = os.path.join(tmp_dir, f'original_{n_rows}.xlsx')
+            stream_sheets_to_excel(dfs, original_file)
+            normal_file = os.path.join(tmp_dir, f'normal_{n_rows}.xlsx')
+            streamed_file = os.path.join(tmp_dir, f'streamed_{n_rows}.xlsx')
+            shutil.copy(original_file, normal_file)
+            shutil.copy(original_file, streamed_file)
+            results = {
+                'styled cell by cell': time_it(lambda: save_sheets_to_excel(dfs, normal_file), repeat=1),
+                'write-only stream': time_it(lambda: stream_sheets_to_excel(dfs, streamed_file), repeat=1),
+            }
+            report(f'{n_rows} rows', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+""" Compares assigning the missing IDs of a freshly pasted sheet one row at a time with the bulk allocator
+
+    python -m benchmarks.id_allocation
+"""
+import numpy as np
+
+from modules.utils.utils import fill_missing_ids
+from benchmarks.utils import make_vocabulary_df, time_it, report
+
+
+def row_by_row_ids(df, id_digits=8):
+    """ The ID assignment done by load_excel_sheet before the bulk allocator"""
+    df['ID'].fillna(0, inplace=True)
+    for idx, word_id in enumerate(df['ID'].values):
+        if word_id=='' or word_id < 10**(id_digits-1):
+            existing_ids = df['ID']
+            while True:
+                random_id = int(10**id_digits * np.random.rand())
+                if random_id not in existing_ids:
+                    break
+            df.loc[df.index==idx, 'ID'] = random_id
+    return df
+
+
+def main(sizes=(1_000, 5_000, 50_000, 500_000), row_by_row_limit=5_000):
+    for n_rows in sizes:
+        df = make_vocabulary_df(n_rows, with_ids=False)
+        # Keep a few existing ids in the sheet and pretend the other sheets have as many entries
+        df.loc[::10, 'ID'] = np.arange(10**7, 10**7 + len(df.loc[::10]))
+        other_sheets = np.arange(2 * 10**7, 2 * 10**7 + n_rows)
+        results = {}
+        # The row by row path is quadratic, so it's only timed on the small sheets
+        if n_rows <= row_by_row_limit:
+            results['row by row'] = time_it(lambda: row_by_row_ids(df.copy()), repeat=1)
+        results['bulk allocator'] = time_it(lambda: fill_missing_ids(df['ID'].values, 8, other_sheets))
+        report(f'{n_rows} rows', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+""" Compares the linear ID search with the ID index kept by DatabaseHandler
+
+    python -m benchmarks.id_lookup
+"""
+import numpy as np
+
+from modules.support_classes.database import DatabaseHandler
+from benchmarks.utils import make_vocabulary_df, time_it, report
+
+
+def scan_update(df, entry_id, column, value):
+    """ The lookup and write used before the index: two full passes over the sheet"""
+    idx = np.where(df['ID'].values == entry_id)[0][0]
+    df.loc[df.index == idx, column] = value
+
+
+def indexed_update(df, id_index, entry_id, column, value):
+    """ The lookup and write using the ID index"""
+    df.at[id_index[entry_id], column] = value
+
+
+def main(sizes=(1_000, 10_000, 100_000, 500_000), n_lookups=200):
+    for n_rows in sizes:
+        df = make_vocabulary_df(n_rows)
+        ids = np.random.default_rng(1).choice(df['ID'].values, size=n_lookups).tolist()
+        id_index = DatabaseHandler.build_id_index(df)
+
+        def run_scan():
+            for entry_id in ids:
+                scan_update(df, entry_id, 'Alternative Forward', 'x')
+
+        def run_indexed():
+            for entry_id in ids:
+                indexed_update(df, id_index, entry_id, 'Alternative Forward', 'x')
+
+        results = {
+            'np.where + mask loc': time_it(run_scan, repeat=3) / n_lookups,
+            'ID index + at': time_it(run_indexed, repeat=3) / n_lookups,
+        }
+        report(f'{n_rows} rows (per lookup and write)', results)
+        print(f'  {"building the index":<30}{time_it(lambda: DatabaseHandler.build_id_index(df)) * 1000:>12.4f} ms')
+
+
+if __name__ == '__main__':
+    main()
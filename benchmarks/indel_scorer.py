@@ -0,0 +1,36 @@
+""" Compares deciding whether an answer matches a target without alternatives: fuzz.ratio (with difflib when
+    python-Levenshtein isn't installed), the DP over the automaton of the target, and the bounded indel distance
+    with its length pre-filter
+
+    python -m benchmarks.indel_scorer
+"""
+import numpy as np
+
+from fuzzywuzzy import fuzz
+
+from modules.answer_evaluators import AnswerAutomaton
+from modules.answer_evaluators.indel_scorer import ratio_exceeds
+from benchmarks.utils import random_words, time_it, report
+
+
+def main(n_pairs=2_000):
+    rng = np.random.default_rng(0)
+    targets = [f'to {x} the {y}' for x, y in zip(random_words(n_pairs, rng, 6), random_words(n_pairs, rng))]
+    cases = {
+        'typos': [x[:5] + x[6:] for x in targets],
+        'other answers of similar length': [targets[i - 1] for i in range(n_pairs)],
+        'other answers of any length': [targets[i - 1][:rng.integers(3, 20)] for i in range(n_pairs)],
+    }
+    automata = [AnswerAutomaton(x) for x in targets]
+    for name, answers in cases.items():
+        pairs = list(zip(answers, targets, automata))
+        results = {
+            'fuzz.ratio > 90': time_it(lambda: [fuzz.ratio(x, y) > 90 for x, y, _ in pairs], repeat=3),
+            'automaton DP': time_it(lambda: [z.align(x) for x, _, z in pairs], repeat=3),
+            'bounded indel distance': time_it(lambda: [ratio_exceeds(x, y) for x, y, _ in pairs], repeat=3),
+        }
+        report(f'matching {n_pairs} answers ({name})', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+""" Compares choosing the next question of a session: rebuilding the exercise for every question (the old main
+    loop, which loads the scores again) or keeping the exercise and popping its queue of questions
+
+    python -m benchmarks.question_queue
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from modules.exercises import TranslationExercise
+from benchmarks.utils import time_it, report
+
+
+def rebuilt_question(scores_path:str, ids:list) -> int:
+    exercise = TranslationExercise(scores_path, ids, 'Forward')
+    entry_id = exercise.queue.pop()
+    exercise.update_score(entry_id, True)
+    return entry_id
+
+
+def queued_question(exercise:TranslationExercise) -> int:
+    entry_id = exercise.queue.pop()
+    exercise.update_score(entry_id, True)
+    return entry_id
+
+
+def main(sizes=(1_000, 10_000, 100_000)):
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_ids in sizes:
+            ids = rng.choice(np.arange(10**7, 10**8), size=n_ids, replace=False).tolist()
+            scores_path = os.path.join(tmp_dir, f'Forward_{n_ids}_Translate.json')
+            exercise = TranslationExercise(scores_path, ids, 'Forward')
+            exercise.save_scores()
+            results = {
+                'rebuilt exercise': time_it(lambda: rebuilt_question(scores_path, ids), repeat=3, number=5),
+                'persistent exercise': time_it(lambda: queued_question(exercise), repeat=3, number=200),
+            }
+            report(f'next question out of {n_ids} entries', results)
+
+
+if __name__ == '__main__':
+    main()
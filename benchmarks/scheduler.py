@@ -0,0 +1,37 @@
+""" Measures the latency of a question with the spaced-repetition schedule: taking the entry due the soonest from
+    the heap and rescheduling it, compared with normalizing the weights of all the entries (the old sampling)
+
+    python -m benchmarks.scheduler
+"""
+import itertools
+
+import numpy as np
+
+from modules.support_classes.scheduler import LeitnerScheduler
+from modules.utils import normalize_weights
+from benchmarks.utils import time_it, report
+
+
+def scheduled_question(scheduler:LeitnerScheduler, clock:itertools.count, rng:np.random.Generator) -> int:
+    entry_id = scheduler.next_due()
+    scheduler.answer(entry_id, rng.random() < 0.7, next(clock))
+    return entry_id
+
+
+def main(sizes=(1_000, 100_000, 1_000_000)):
+    rng = np.random.default_rng(0)
+    for n_ids in sizes:
+        ids = rng.choice(np.arange(10**7, 10**8), size=n_ids, replace=False)
+        scores = rng.integers(-5, 10, size=n_ids)
+        scheduler = LeitnerScheduler(ids, rng.integers(0, 7, size=n_ids), rng.uniform(0, 10**6, size=n_ids))
+        scheduler.build_queue(ids)
+        clock = itertools.count(10**6)
+        results = {
+            'normalized weights': time_it(lambda: np.random.choice(ids, p=normalize_weights(scores)), number=5),
+            'schedule heap': time_it(lambda: scheduled_question(scheduler, clock, rng), number=1000),
+        }
+        report(f'question out of {n_ids} entries', results)
+
+
+if __name__ == '__main__':
+    main()
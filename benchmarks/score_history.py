@@ -0,0 +1,56 @@
+""" Compares computing the learning curve of an exercise: grouping the raw answers by day, or reading the daily
+    rollup a ScoreHistory keeps, then appending a compacted answer log to the history
+
+    python -m benchmarks.score_history
+"""
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from modules.support_classes.answer_log import ANSWER_DTYPE
+from modules.support_classes.score_history import ScoreHistory
+from benchmarks.utils import time_it, report
+
+
+def raw_curve(history:ScoreHistory) -> pd.DataFrame:
+    """ The learning curve computed from the raw answers"""
+    answers = pd.DataFrame(history.read())
+    answers['day'] = answers['time'] // 86400
+    last = answers.groupby(['day', 'id'])['score'].last().groupby('day').mean()
+    days = answers.groupby('day').agg(answers=('correct', 'size'), accuracy=('correct', 'mean'))
+    return days.assign(average_score=last)
+
+
+def make_answers(n_answers:int, n_ids:int, rng:np.random.Generator, start:float=1.7e9) -> np.ndarray:
+    """ Random answers spread over a year"""
+    answers = np.zeros(n_answers, dtype=ANSWER_DTYPE)
+    answers['time'] = start + np.sort(rng.uniform(0, 365 * 86400, size=n_answers))
+    answers['id'] = rng.integers(10**7, 10**7 + n_ids, size=n_answers)
+    answers['correct'] = rng.random(n_answers) < 0.7
+    answers['score'] = rng.integers(-5, 10, size=n_answers)
+    return answers
+
+
+def main(sizes=(100_000, 1_000_000), n_ids:int=30_000, log_answers:int=50_000):
+    rng = np.random.default_rng(0)
+    for n_answers in sizes:
+        folder = tempfile.mkdtemp()
+        history = ScoreHistory(os.path.join(folder, 'scores.history'))
+        history.append(make_answers(n_answers, n_ids, rng))
+        # A compacted log: the answers of the next days
+        log = make_answers(log_answers, n_ids, rng, start=history.get_last_time() + 1)
+        log['time'] = history.get_last_time() + 1 + np.arange(log_answers)
+        results = {
+            'grouping the raw answers': time_it(lambda: raw_curve(history), repeat=3),
+            'reading the rollup': time_it(lambda: history.get_exercise_curve('daily'), repeat=3),
+            f'appending {log_answers} answers': time_it(lambda: history.append(log), repeat=1),
+        }
+        report(f'learning curve of {n_answers} answers', results)
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+""" Compares dropping the scores of deleted entries: the old loop testing every score against the list of used IDs,
+    or the set-based reconciliation of a ScoreStore, then times reconciling every score file of a large sheet
+
+    python -m benchmarks.score_reconciliation
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from modules.support_classes.score_store import ScoreStore
+from modules.support_classes.scores import reconcile_scores
+from benchmarks.utils import time_it, report
+
+
+def loop_cleanup(scores:dict, used_ids:list) -> dict:
+    """ The cleanup done by clean_unused_ids before the score store (on a copy, so it can be repeated)"""
+    scores = dict(scores)
+    for sample_id in list(scores.keys()):
+        if int(sample_id) not in used_ids:
+            scores.pop(sample_id)
+    return scores
+
+
+def store_cleanup(ids, scores, used_ids):
+    store = ScoreStore(ids, scores)
+    store.keep_ids(used_ids)
+    store.add_ids(used_ids)
+    return store
+
+
+def main(n_small=5_000, n_large=100_000, n_files=4, deleted=0.05):
+    rng = np.random.default_rng(0)
+    ids = rng.choice(np.arange(10**7, 10**8), size=n_small, replace=False)
+    scores = rng.integers(-5, 10, size=n_small)
+    used_ids = ids[rng.random(n_small) > deleted].tolist()
+    scores_dict = {str(x):int(y) for x, y in zip(ids, scores)}
+    results = {
+        'loop over a list': time_it(lambda: loop_cleanup(scores_dict, used_ids), repeat=1),
+        'score store': time_it(lambda: store_cleanup(ids, scores, used_ids)),
+    }
+    report(f'cleaning {n_small} scores', results)
+
+    ids = rng.choice(np.arange(10**7, 10**8), size=n_large, replace=False)
+    used_ids = ids[rng.random(n_large) > deleted]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        def write_files():
+            for idx in range(n_files):
+                with open(os.path.join(tmp_dir, f'Exercise{idx}_A1_Forward.json'), 'w') as f:
+                    json.dump({str(x):0 for x in ids.tolist()}, f)
+        write_files()
+        # The first pass migrates the json files, the next ones work on the binary files
+        results = {
+            'first pass (json)': time_it(lambda: reconcile_scores('A1', used_ids, tmp_dir), repeat=1),
+            'next passes': time_it(lambda: reconcile_scores('A1', used_ids, tmp_dir)),
+        }
+        report(f'reconciling {n_files} files of {n_large} scores', results)
+
+
+if __name__ == '__main__':
+    main()
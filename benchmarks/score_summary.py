@@ -0,0 +1,49 @@
+""" Compares summarizing the scores after an answer: rebuilding lists from a dictionary (the old summarize) or
+    reading the statistics a ScoreStore keeps up to date
+
+    python -m benchmarks.score_summary
+"""
+from collections import Counter
+
+import numpy as np
+
+from modules.support_classes.score_store import ScoreStore
+from benchmarks.utils import time_it, report
+
+
+def list_summary(scores_dict:dict) -> dict:
+    """ The summary computed by summarize before the statistics were kept up to date"""
+    scores = list(scores_dict.values())
+    ids = list(scores_dict.keys())
+    max_idx = scores.index(max(scores))
+    min_idx = scores.index(min(scores))
+    return {'average':np.average(scores), 'min':[ids[min_idx], scores[min_idx]],
+            'max':[ids[max_idx], scores[max_idx]], 'distribution':Counter(scores), 'entries count':len(scores)}
+
+
+def store_summary(store:ScoreStore, entry_id:int) -> dict:
+    # Answer a question first, so the heaps have an outdated item to drop
+    store[entry_id] = store[entry_id] + 1
+    stats = store.stats
+    return {'average':stats.average(), 'min':list(stats.worst()), 'max':list(stats.best()),
+            'distribution':stats.distribution(), 'entries count':stats.count}
+
+
+def main(sizes=(1_000, 100_000)):
+    rng = np.random.default_rng(0)
+    for n_ids in sizes:
+        ids = rng.choice(np.arange(10**7, 10**8), size=n_ids, replace=False)
+        scores = rng.integers(-5, 10, size=n_ids)
+        scores_dict = {str(x):int(y) for x, y in zip(ids, scores)}
+        store = ScoreStore(ids, scores)
+        store_summary(store, int(ids[0]))
+        answered = iter(rng.choice(ids, size=10_000).tolist())
+        results = {
+            'lists from a dictionary': time_it(lambda: list_summary(scores_dict)),
+            'kept statistics': time_it(lambda: store_summary(store, next(answered))),
+        }
+        report(f'summary of {n_ids} scores', results)
+
+
+if __name__ == '__main__':
+    main()
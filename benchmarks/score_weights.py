@@ -0,0 +1,44 @@
+""" Compares computing the sampling weights of a question: from a dictionary of string IDs (the old ScoresHandler)
+    or from the array of a ScoreStore, and loading the scores from json or from the binary file
+
+    python -m benchmarks.score_weights
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from modules.support_classes.score_store import ScoreStore
+from modules.utils import normalize_weights
+from benchmarks.utils import time_it, report
+
+
+def main(sizes=(1_000, 100_000), n_sampled=0.2):
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_ids in sizes:
+            ids = rng.choice(np.arange(10**7, 10**8), size=n_ids, replace=False)
+            scores = rng.integers(-5, 10, size=n_ids)
+            sampled_ids = rng.choice(ids, size=int(n_ids * n_sampled), replace=False).tolist()
+            scores_dict = {str(x):int(y) for x, y in zip(ids, scores)}
+            store = ScoreStore(ids, scores)
+            results = {
+                'dict of string IDs': time_it(lambda: normalize_weights([scores_dict[str(x)] for x in sampled_ids])),
+                'score store': time_it(lambda: normalize_weights(store.get_scores(sampled_ids))),
+            }
+            report(f'weights of {len(sampled_ids)} sampled IDs out of {n_ids}', results)
+
+            json_path, store_path = os.path.join(tmp_dir, 'scores.json'), os.path.join(tmp_dir, 'scores.npy')
+            with open(json_path, 'w') as f:
+                json.dump(scores_dict, f)
+            store.save(store_path)
+            results = {
+                'json': time_it(lambda: json.load(open(json_path, 'r'))),
+                'memory-mapped binary': time_it(lambda: ScoreStore.load(store_path)),
+            }
+            report(f'loading {n_ids} scores', results)
+
+
+if __name__ == '__main__':
+    main()
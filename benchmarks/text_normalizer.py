@@ -0,0 +1,46 @@
+""" Compares normalizing the answers and the targets: the step by step clean_text and add_special_chars (the
+    reference implementations of the equivalence tests), the compiled TextNormalizer, and its column methods
+
+    python -m benchmarks.text_normalizer
+"""
+import numpy as np
+import pandas as pd
+
+from modules.utils import TextNormalizer
+from testing.utils.text_normalizer import TEXTS, random_texts, reference_add_special_chars, reference_clean_text
+from benchmarks.utils import make_vocabulary_df, time_it, report
+
+
+def main(n_texts=20_000):
+    normalizer = TextNormalizer()
+    texts = (TEXTS + random_texts(n_texts, np.random.default_rng(0)))[:n_texts]
+    column = pd.Series(texts)
+    results = {
+        'step by step': time_it(lambda: [reference_clean_text(x) for x in texts], repeat=3),
+        'compiled': time_it(lambda: [normalizer.clean(x) for x in texts], repeat=3),
+        'compiled, column': time_it(lambda: normalizer.clean_column(column), repeat=3),
+    }
+    report(f'cleaning {n_texts} texts', results)
+
+    results = {
+        'step by step': time_it(lambda: [reference_clean_text(reference_add_special_chars(x)) for x in texts],
+                                repeat=3),
+        'compiled': time_it(lambda: [normalizer.normalize_answer(x) for x in texts], repeat=3),
+        'compiled, column': time_it(lambda: normalizer.normalize_column(column), repeat=3),
+    }
+    report(f'normalizing {n_texts} answers', results)
+
+    # Targets like the ones of the database
+    df = make_vocabulary_df(n_texts)
+    column = 'the ' + df['Translation'] + ', to ' + df['Word_s'] + ' (something)'
+    texts = column.tolist()
+    results = {
+        'step by step': time_it(lambda: [reference_clean_text(x) for x in texts], repeat=3),
+        'compiled': time_it(lambda: [normalizer.clean(x) for x in texts], repeat=3),
+        'compiled, column': time_it(lambda: normalizer.clean_column(column), repeat=3),
+    }
+    report(f'cleaning {n_texts} targets', results)
+
+
+if __name__ == '__main__':
+    main()
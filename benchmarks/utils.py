@@ -0,0 +1,50 @@
+import string
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from typing import Callable
+
+
+DATABASE_COLUMNS = ['ID', 'Word_s', 'Word_p', 'Word_fs', 'Word_fp', 'Category', 'Translation',
+                    'Translation_f', 'Alternative Forward', 'Alternative Backward']
+
+
+def random_words(n_words:int, rng:np.random.Generator, length:int=8) -> list:
+    """ Returns a list of random lower case words with a fixed length"""
+    letters = np.array(list(string.ascii_lowercase))
+    chars = rng.choice(letters, size=(n_words, length))
+    return [''.join(x) for x in chars]
+
+
+def make_vocabulary_df(n_rows:int, seed:int=0, with_ids:bool=True) -> pd.DataFrame:
+    """
+    Builds a synthetic dataframe with the same columns as the vocabulary database
+    :param n_rows: the number of entries in the dataframe
+    :param seed: the seed used for the random generator
+    :param with_ids: if False the 'ID' column is left empty (like a freshly pasted sheet)
+    :returns: the dataframe
+    """
+    rng = np.random.default_rng(seed)
+    categories = np.array(['noun', 'adj', 'verb', 'phrase', 'noun, food', 'noun, people', 'other'])
+    df = pd.DataFrame({column:[''] * n_rows for column in DATABASE_COLUMNS})
+    if with_ids:
+        df['ID'] = rng.choice(np.arange(10**7, 10**8), size=n_rows, replace=False)
+    df['Word_s'] = random_words(n_rows, rng)
+    df['Translation'] = random_words(n_rows, rng)
+    df['Category'] = rng.choice(categories, size=n_rows)
+    return df
+
+
+def time_it(fnc:Callable, repeat:int=5, number:int=1) -> float:
+    """ Returns the best time (in seconds) of a single call to fnc"""
+    return min(timeit.repeat(fnc, repeat=repeat, number=number)) / number
+
+
+def report(title:str, results:dict) -> None:
+    """ Prints the timings of a benchmark, results should have the form {name: seconds}"""
+    print(title)
+    baseline = next(iter(results.values()))
+    for name, seconds in results.items():
+        print(f'  {name:<30}{seconds * 1000:>12.4f} ms{baseline / seconds:>10.1f}x')
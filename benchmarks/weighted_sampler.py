@@ -0,0 +1,52 @@
+""" Compares the latency of a question: normalizing the weights of all the sampled entries then drawing with
+    np.random.choice (the old sample_question), or drawing from a WeightedSampler and updating the answered entry,
+    and drawing the batch of a QuestionQueue: from the array of weights or from the tree of the sampler
+
+    python -m benchmarks.weighted_sampler
+"""
+import numpy as np
+
+from modules.support_classes.score_store import ScoreStore
+from modules.support_classes.weighted_sampler import WeightedSampler
+from modules.exercises.question_queue import DEFAULT_QUEUE_SIZE
+from modules.utils import get_raw_weights, normalize_weights, weighted_sample_without_replacement
+from benchmarks.utils import time_it, report
+
+
+def normalized_question(store:ScoreStore, ids:np.ndarray) -> int:
+    draw = np.random.choice(ids, p=normalize_weights(store.get_scores(ids)))
+    store[draw] = store[draw] + 1
+    return draw
+
+
+def sampler_question(store:ScoreStore, sampler:WeightedSampler) -> int:
+    draw = sampler.sample()
+    store[draw] = store[draw] + 1
+    sampler.update(draw, float(get_raw_weights(store[draw])))
+    return draw
+
+
+def main(sizes=(1_000, 10_000, 100_000, 1_000_000)):
+    rng = np.random.default_rng(0)
+    for n_ids in sizes:
+        ids = rng.choice(np.arange(10**7, 10**8), size=n_ids, replace=False)
+        scores = rng.integers(-5, 10, size=n_ids)
+        store = ScoreStore(ids, scores)
+        sampler = WeightedSampler(ids, get_raw_weights(scores))
+        results = {
+            'normalized weights': time_it(lambda: normalized_question(store, ids), repeat=5, number=10),
+            'weighted sampler': time_it(lambda: sampler_question(store, sampler), repeat=5, number=1000),
+        }
+        report(f'question out of {n_ids} entries', results)
+        results = {
+            'array of weights': time_it(lambda: weighted_sample_without_replacement(sampler.weights,
+                                                                                    DEFAULT_QUEUE_SIZE), repeat=5),
+            'weighted sampler': time_it(lambda: sampler.sample_distinct(DEFAULT_QUEUE_SIZE), repeat=5, number=100),
+        }
+        report(f'batch of {DEFAULT_QUEUE_SIZE} questions out of {n_ids} entries', results)
+        report(f'building the sampler of {n_ids} entries',
+               {'weighted sampler': time_it(lambda: WeightedSampler(ids, get_raw_weights(scores)), repeat=3)})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+""" Compares the startup loading of a workbook: parsing it once per sheet, once in total, or reading the cache
+
+    python -m benchmarks.workbook_loading
+"""
+import os
+import tempfile
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from modules.utils.excel_ops import get_excel_dfs, load_excel_dfs, save_to_excel
+from benchmarks.utils import make_vocabulary_df, time_it, report
+
+
+def per_sheet_parse(excel_file):
+    """ The loading done by load_all_sheets before the single-pass loader"""
+    dfs = {}
+    for sheet_name in pd.ExcelFile(excel_file).sheet_names:
+        sheet = load_workbook(excel_file)[sheet_name]
+        df = pd.DataFrame(sheet.values)
+        df.columns = df.iloc[0]
+        dfs[sheet_name] = df.iloc[1:].fillna('').reset_index(drop=True)
+    return dfs
+
+
+def main(n_sheets=6, rows_per_sheet=5_000):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        excel_file = os.path.join(tmp_dir, 'database.xlsx')
+        for idx in range(n_sheets):
+            save_to_excel(make_vocabulary_df(rows_per_sheet, seed=idx), excel_file, f'S{idx}')
+        load_excel_dfs(excel_file)
+        results = {
+            'parse per sheet': time_it(lambda: per_sheet_parse(excel_file), repeat=1),
+            'single parse': time_it(lambda: get_excel_dfs(excel_file), repeat=1),
+            'cache': time_it(lambda: load_excel_dfs(excel_file)),
+        }
+        report(f'{n_sheets} sheets of {rows_per_sheet} rows', results)
+
+
+if __name__ == '__main__':
+    main()
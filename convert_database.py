@@ -0,0 +1,13 @@
+import argparse
+
+from modules.support_classes import DatabaseHandler
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='Copies a vocabulary database to another file, the format of '
+                                                 'each file is given by its extension (.xlsx or .sqlite)')
+    parser.add_argument('source', help='the database to copy, e.g. resources/german_database.xlsx')
+    parser.add_argument('target', help='the new database, e.g. resources/german_database.sqlite')
+    args = parser.parse_args()
+    db_handler = DatabaseHandler(args.source)
+    db_handler.export_database(args.target)
+    db_handler.close()
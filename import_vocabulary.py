@@ -0,0 +1,32 @@
+import argparse
+
+from modules.support_classes import DatabaseHandler, VocabularyImporter
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='Imports a word list (a CSV/TSV file or an Anki deck) into a sheet '
+                                                 'of a vocabulary database, skipping the entries already in it')
+    parser.add_argument('database', help='the database to import into, e.g. resources/german_database.xlsx')
+    parser.add_argument('source', help='the word list, a .csv, .tsv or .apkg file')
+    parser.add_argument('sheet', help='the sheet receiving the entries (created if it doesn\'t exist)')
+    parser.add_argument('--map', nargs='*', default=None, metavar='SOURCE=COLUMN',
+                        help='maps a column of the list (a name, or a position with --no-header and for Anki '
+                             'fields) to a database column, e.g. --map word=Word_s meaning=Translation')
+    parser.add_argument('--no-header', action='store_true', help='the CSV/TSV file has no header line')
+    parser.add_argument('--category', default='', help='the category of the entries that don\'t have one')
+    args = parser.parse_args()
+
+    column_map = None
+    if args.map is not None:
+        column_map = {}
+        for mapping in args.map:
+            source, column = mapping.split('=')
+            # The columns are given by position when there's no header (and for the Anki fields)
+            column_map[int(source) if source.isdigit() else source] = column
+    db_handler = DatabaseHandler(args.database)
+    importer = VocabularyImporter(db_handler, args.sheet, args.category)
+    if args.source.lower().endswith('.apkg'):
+        counts = importer.import_anki(args.source, column_map)
+    else:
+        counts = importer.import_table(args.source, column_map, header=not args.no_header)
+    print(f'Imported {counts["imported"]} entries, skipped {counts["skipped"]}')
+    db_handler.close()
@@ -1 +1,4 @@
-from .fuzzy_evaluator import FuzzyEvaluator
\ No newline at end of file
+from .answer_automaton import AnswerAutomaton
+from .fuzzy_evaluator import FuzzyEvaluator
+from .answer_key import AnswerKey, AnswerKeyCache
+from .batch_evaluator import match_answers, regrade_answers
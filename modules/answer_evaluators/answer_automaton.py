@@ -0,0 +1,179 @@
+import math
+import re
+
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+from .indel_scorer import INDEL_COST, MATCH_THRESHOLD, get_target_weight, length_fits, ratio_exceeds
+
+
+# A word with alternatives, e.g. 'put/place'
+SLASH_WORD = re.compile(r'[^ ]+/[^ ]+')
+
+
+class AnswerAutomaton:
+    """ The answers accepted for a part of a target, compiled into a word-level automaton instead of expanding
+        every combination of the alternatives: 'put/place the book/notebook' has 4 answers but the automaton only
+        holds the characters of 'put', 'place', 'the', 'book' and 'notebook'. Every word is a small trie of its
+        alternatives, and the words are chained with spaces.
+        An answer matches if its similarity with one of the accepted answers exceeds the threshold, the similarity
+        being the ratio of fuzz.ratio (with python-Levenshtein), 1 - indel_distance / (len(answer) + len(target)).
+        It's computed in a single pass over the automaton, so the time is linear in the size of the automaton (not
+        in the number of answers), and the alignments that can't reach the threshold are dropped on the way.
+    """
+    def __init__(self, text:str, threshold:int=MATCH_THRESHOLD, expand_slashes:bool=True):
+        """
+        :param text: the accepted answer, normalized (see clean_text)
+        :param threshold: the ratio (in %) an answer should exceed to match
+        :param expand_slashes: if False, the '/' are taken literally (e.g. for an answer typed by the user)
+        """
+        self.text = text.strip()
+        self.threshold = threshold
+        # The words of the answer, every word is a tuple of alternatives
+        self.words:List[Tuple[str, ...]] = []
+        for token in self.text.split(' '):
+            if expand_slashes and SLASH_WORD.fullmatch(token):
+                self.words.append(tuple(token.split('/')))
+            else:
+                self.words.append((token,))
+        # The ratio exceeds the threshold if INDEL_COST * distance < target_weight * (len(answer) + len(target))
+        self.target_weight = get_target_weight(threshold)
+        # Without alternatives, the text is the only accepted answer
+        self.is_single = all(len(x) == 1 for x in self.words)
+        self.compile()
+
+    def compile(self) -> None:
+        """ Builds the automaton: the nodes are numbered in topological order and edges[node] holds the
+            (character, next node) pairs leaving a node, a character of None being an empty transition.
+            Like the expanded answers, the accepted answers are stripped: the words left empty at the start (or at
+            the end) don't leave a space behind, so they have their own paths.
+        """
+        self.edges:List[List[Tuple[Optional[str], int]]] = []
+        # The start of the next word with nothing before it (None once a word can't be empty anymore)
+        leading:Optional[int] = self.add_node()
+        # The ends of the previous word, after an empty alternative and after a non-empty one
+        empty_end:Optional[int] = None
+        word_end:Optional[int] = None
+        # The ends of the words the rest of the answer can be left out after
+        trailing:List[int] = []
+        for i, alternatives in enumerate(self.words):
+            if i > 0 and leading is not None:
+                previous, leading = leading, (self.add_node() if '' in self.words[i - 1] else None)
+                if leading is not None:
+                    self.edges[previous].append((None, leading))
+            # The word after a space, or at the start
+            start = self.add_node()
+            for node in [empty_end, word_end]:
+                if node is not None:
+                    self.edges[node].append((' ', start))
+            # The trie of the non-empty alternatives, their last characters lead to the end of the word
+            root = self.add_node()
+            self.edges[start].append((None, root))
+            if leading is not None:
+                self.edges[leading].append((None, root))
+            final_edges = []
+            children:Dict[Tuple[int, str], int] = {}
+            for alternative in [x for x in alternatives if x != '']:
+                node = root
+                for char in alternative[:-1]:
+                    if (node, char) not in children:
+                        children[(node, char)] = self.add_node()
+                        self.edges[node].append((char, children[(node, char)]))
+                    node = children[(node, char)]
+                final_edges.append((node, alternative[-1]))
+            empty_end = None
+            if '' in alternatives:
+                empty_end = self.add_node()
+                self.edges[start].append((None, empty_end))
+            word_end = self.add_node()
+            for node, char in dict.fromkeys(final_edges):
+                self.edges[node].append((char, word_end))
+            if '' not in alternatives:
+                trailing = []
+            trailing.append(word_end)
+        self.end = self.add_node()
+        for node in trailing:
+            self.edges[node].append((None, self.end))
+        if leading is not None and '' in self.words[-1]:
+            # Every word can be left empty
+            self.edges[leading].append((None, self.end))
+        # The shortest and longest accepted answers from every node, for the pruning
+        self.min_remaining = [0] * len(self.edges)
+        self.max_remaining = [0] * len(self.edges)
+        for node in range(len(self.edges) - 1, -1, -1):
+            lengths = [(char is not None) + self.max_remaining[x] for char, x in self.edges[node]]
+            self.max_remaining[node] = max(lengths, default=0)
+            lengths = [(char is not None) + self.min_remaining[x] for char, x in self.edges[node]]
+            # the dead ends (e.g. after an empty last word) don't lead to an answer
+            self.min_remaining[node] = min(lengths, default=0 if node == self.end else math.inf)
+
+    def add_node(self) -> int:
+        """ Adds a node without edges to the automaton, and returns it"""
+        self.edges.append([])
+        return len(self.edges) - 1
+
+    def matches(self, answer:str) -> bool:
+        """
+        Sees whether a normalized answer matches one of the accepted answers
+        :param answer: the answer, normalized like the accepted answers
+        :returns: True if the similarity with one of the accepted answers exceeds the threshold
+        """
+        n_chars = len(answer)
+        if n_chars == 0:
+            # Like fuzz.ratio, an empty answer only matches an empty target
+            return self.min_remaining[0] == 0
+        if self.is_single:
+            return ratio_exceeds(answer, self.text, self.threshold)
+        if not length_fits(n_chars, self.min_remaining[0], self.max_remaining[0], self.threshold):
+            return False
+        return self.align(answer)
+
+    def align(self, answer:str) -> bool:
+        """ Sees whether a non-empty answer matches one of the accepted answers, with the DP over the automaton"""
+        n_chars = len(answer)
+        weight = self.target_weight
+        limit = weight * n_chars
+        # The alignments reaching every node {answer position: cost}, the cost of an alignment is
+        # INDEL_COST * (insertions + deletions) - weight * (characters of the accepted answer), so an answer
+        # matches if the cost of its best alignment with the whole automaton is below weight * len(answer)
+        states:List[Dict[int, int]] = [{} for _ in self.edges]
+        states[0][0] = 0
+        deletion = INDEL_COST - weight
+        for node, edges in enumerate(self.edges):
+            costs = states[node]
+            if not costs:
+                continue
+            # Drop the alignments that can't get below the limit anymore, even if the rest matches perfectly
+            remaining = self.max_remaining[node]
+            is_open = lambda position, cost: cost - weight * min(remaining, n_chars - position) < limit
+            # The characters of the answer skipped at this node (insertions)
+            for position in sorted(costs):
+                cost = costs[position]
+                while position < n_chars:
+                    position, cost = position + 1, cost + INDEL_COST
+                    if cost >= costs.get(position, math.inf) or not is_open(position, cost):
+                        break
+                    costs[position] = cost
+            costs = [(x, y) for x, y in costs.items() if is_open(x, y)]
+            for char, next_node in edges:
+                next_costs = states[next_node]
+                if char is None:
+                    for position, cost in costs:
+                        if cost < next_costs.get(position, math.inf):
+                            next_costs[position] = cost
+                    continue
+                for position, cost in costs:
+                    # The character is deleted, or matched with the next character of the answer
+                    if cost + deletion < next_costs.get(position, math.inf):
+                        next_costs[position] = cost + deletion
+                    if position < n_chars and answer[position] == char \
+                            and cost - weight < next_costs.get(position + 1, math.inf):
+                        next_costs[position + 1] = cost - weight
+        return states[self.end].get(n_chars, limit) < limit
+
+    def expand(self) -> List[str]:
+        """ Returns every accepted answer (their number grows exponentially with the words with alternatives)"""
+        return [' '.join(x).strip() for x in product(*self.words)]
+
+    def __repr__(self) -> str:
+        return f'AnswerAutomaton({self.text!r})'
@@ -0,0 +1,101 @@
+import re
+
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple, Union
+
+from .answer_automaton import AnswerAutomaton
+from ..utils.utils import add_special_chars, clean_text
+
+
+# The columns holding the targets of a translation, for every direction
+TARGET_KEYS = {'Forward':['Translation', 'Translation_f'], 'Backward':['Word_s', 'Word_p', 'Word_fs', 'Word_fp']}
+# The default number of answer keys kept in a cache
+DEFAULT_CACHE_SIZE = 4096
+
+
+def compile_answers(target:str) -> Tuple[AnswerAutomaton, ...]:
+    """
+    Compiles the normalized answers accepted for a target: the target is cleaned and split on ',' and ';', and
+     every part is compiled with the alternatives of its words with a '/' (see AnswerAutomaton)
+    :param target: the target, as it's written in the database
+    :returns: an automaton for every part, without duplicates
+    """
+    parts = dict.fromkeys(x.strip() for x in re.split('[,;]', clean_text(target)))
+    return tuple(AnswerAutomaton(x) for x in parts)
+
+def normalize_answer(answer:str) -> str:
+    """ Normalizes an answer typed by the user the same way the targets are (see compile_answers)"""
+    # Handle for special characters that you're too lazy to type (like: Ö)
+    return clean_text(add_special_chars(answer))
+
+
+class AnswerKey:
+    """ The normalized answers accepted for an entry in one direction: the answers of every target column, plus
+        the alternative translations the user added (accepted whatever the target of the question is)
+    """
+    def __init__(self, entry:dict, direction:str):
+        """
+        :param entry: the entry, as a dictionary built from its row in the database
+        :param direction: the direction of the translation, 'Forward' or 'Backward'
+        """
+        assert direction in TARGET_KEYS, 'Direction could only be "Forward" or "Backward"'
+        self.targets = {}
+        for key in TARGET_KEYS[direction]:
+            target = entry.get(key, '')
+            if isinstance(target, str) and target != '':
+                self.targets[target] = compile_answers(target)
+        alternatives = entry.get(f'Alternative {direction}', '')
+        alternatives = alternatives.split(';') if isinstance(alternatives, str) else []
+        alternatives = dict.fromkeys(normalize_answer(x).strip() for x in alternatives if x.strip())
+        # The alternatives are taken as the user typed them, slashes included
+        self.alternatives = tuple(AnswerAutomaton(x, expand_slashes=False) for x in alternatives)
+
+    def get_answers(self, target:str) -> Tuple[AnswerAutomaton, ...]:
+        """ Returns the answers accepted for a question with a given target"""
+        if target not in self.targets:
+            # e.g. a target edited after the key was compiled
+            self.targets[target] = compile_answers(target)
+        return self.targets[target] + self.alternatives
+
+    def get_all_answers(self) -> Tuple[AnswerAutomaton, ...]:
+        """ Returns the answers accepted whatever the target of the question was (every target column)"""
+        return tuple(x for answers in self.targets.values() for x in answers) + self.alternatives
+
+
+class AnswerKeyCache:
+    """ A bounded cache of the answer keys of the entries {(entry_id, direction): AnswerKey}, the least recently
+        used keys are dropped first. The keys of an entry should be invalidated when the entry is edited.
+    """
+    def __init__(self, max_size:int=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self.keys:Dict[Tuple[int, str], AnswerKey] = OrderedDict()
+
+    def get(self, entry_id:Union[int, str], direction:str, get_entry:Callable[[int], dict]) -> AnswerKey:
+        """
+        Returns the answer key of an entry, compiled the first time it's needed
+        :param entry_id: the id of the entry
+        :param direction: the direction of the translation
+        :param get_entry: a function returning the entry from its id, called when the key isn't cached
+        :returns: the answer key
+        """
+        cache_key = (int(entry_id), direction)
+        answer_key = self.keys.get(cache_key)
+        if answer_key is not None:
+            self.keys.move_to_end(cache_key)
+            return answer_key
+        answer_key = AnswerKey(get_entry(int(entry_id)), direction)
+        self.keys[cache_key] = answer_key
+        if len(self.keys) > self.max_size:
+            self.keys.popitem(last=False)
+        return answer_key
+
+    def invalidate(self, entry_id:Union[int, str]) -> None:
+        """ Drops the keys of an entry (in both directions)"""
+        for direction in TARGET_KEYS:
+            self.keys.pop((int(entry_id), direction), None)
+
+    def clear(self) -> None:
+        self.keys.clear()
+
+    def __len__(self) -> int:
+        return len(self.keys)
@@ -0,0 +1,119 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+from .answer_key import AnswerKey
+from ..utils.text_normalizer import text_normalizer
+
+
+# The number of answers from which the evaluation is spread across a pool of processes
+DEFAULT_MIN_POOL_SIZE = 50_000
+
+
+def match_group(job:Tuple[dict, str, Optional[str], List[str]]) -> np.ndarray:
+    """
+    Evaluates the answers given to one entry, in a worker process (the answer key is compiled in the worker)
+    :param job: the entry, the direction, the target (None for any target of the direction) and the normalized
+     answers
+    :returns: a boolean array, True for the answers that match
+    """
+    entry, direction, target, answers = job
+    return match_normalized_answers(AnswerKey(entry, direction), target, answers)
+
+def match_normalized_answers(answer_key:AnswerKey, target:Optional[str], answers:List[str]) -> np.ndarray:
+    """ Evaluates normalized answers against an answer key, for a target or any target if it's None"""
+    automata = answer_key.get_all_answers() if target is None else answer_key.get_answers(target)
+    return np.array([any(x.matches(answer) for x in automata) for answer in answers], dtype=bool)
+
+def match_answers(answers:Iterable[str], entry_ids:Iterable[int], directions:Iterable[str], db_handler,
+                  targets:Optional[Iterable[str]]=None, processes:Optional[int]=None,
+                  min_pool_size:int=DEFAULT_MIN_POOL_SIZE) -> np.ndarray:
+    """
+    Evaluates many answers at once, with the same decisions as FuzzyEvaluator.match_answer: the answers are
+     normalized as a column, grouped by entry, direction and target so every answer key is compiled once and
+     every distinct answer is matched once, and the groups are spread across processes for the big jobs
+    :param answers: the answers typed by the user
+    :param entry_ids: the id of the entry of every answer
+    :param directions: the direction of every answer, 'Forward' or 'Backward'
+    :param db_handler: the database the entries are in (with get_entry and get_answer_key, see DatabaseHandler)
+    :param targets: the target of the question of every answer, if None (or for the empty targets) the answers
+     are accepted if they match any target of the entry in their direction
+    :param processes: the number of processes, the number of CPUs if None (1 to stay in this process)
+    :param min_pool_size: the number of answers from which the processes are used
+    :returns: a boolean array, True for the answers that match
+    """
+    answers = pd.Series(list(answers), dtype=object)
+    questions = pd.DataFrame({
+        'id':np.asarray(list(entry_ids), dtype=np.int64),
+        'direction':list(directions),
+        'target':'' if targets is None else pd.Series(list(targets), dtype=object).fillna('').tolist(),
+    })
+    assert len(questions) == len(answers), 'Every answer should have an entry and a direction'
+    normalized = text_normalizer.normalize_column(answers).to_numpy()
+    decisions = np.zeros(len(answers), dtype=bool)
+    if len(answers) == 0:
+        return decisions
+
+    # The distinct answers of every group, and where they go back in the results
+    groups, jobs = [], []
+    for (entry_id, direction, target), positions in questions.groupby(['id', 'direction', 'target'],
+                                                                        sort=False).indices.items():
+        distinct, inverse = np.unique(normalized[positions], return_inverse=True)
+        groups.append((positions, inverse))
+        jobs.append((int(entry_id), direction, target or None, distinct.tolist()))
+
+    if processes != 1 and len(answers) >= min_pool_size:
+        jobs = [(db_handler.get_entry(x), y, z, w) for x, y, z, w in jobs]
+        # A few chunks per process, so the processes stay busy when the groups have different sizes
+        chunk_size = max(1, len(jobs) // (4 * (processes or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(match_group, jobs, chunksize=chunk_size))
+    else:
+        results = [match_normalized_answers(db_handler.get_answer_key(x, y), z, w) for x, y, z, w in jobs]
+
+    for (positions, inverse), result in zip(groups, results):
+        decisions[positions] = result[inverse]
+    return decisions
+
+def get_score_deltas(entry_ids:Iterable[int], previous:Iterable[bool],
+                     current:Iterable[bool]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns how the scores change when past answers are regraded: an answer is worth a point if it's right and
+     minus a point if it's wrong (see ScoresHandler.update, without the reset of the negative scores to zero
+     on a right answer), so every regraded answer changes the score of its entry by 2 or -2
+    :param entry_ids: the id of the entry of every answer
+    :param previous: the decisions the answers had
+    :param current: the new decisions
+    :returns: the ids of the entries whose score changes, and the change of their scores
+    """
+    entry_ids = np.asarray(list(entry_ids), dtype=np.int64)
+    changes = 2 * (np.asarray(list(current), dtype=np.int64) - np.asarray(list(previous), dtype=np.int64))
+    ids, inverse = np.unique(entry_ids, return_inverse=True)
+    deltas = np.bincount(inverse, weights=changes, minlength=len(ids)).astype(np.int64)
+    changed = deltas != 0
+    return ids[changed], deltas[changed]
+
+def regrade_answers(answers:Iterable[str], entry_ids:Iterable[int], directions:Iterable[str], db_handler,
+                    previous:Iterable[bool], scores=None, **kwargs) -> np.ndarray:
+    """
+    Regrades past answers, e.g. after a target was changed, and writes the changes of the scores back
+    :param answers: the answers typed by the user
+    :param entry_ids: the id of the entry of every answer
+    :param directions: the direction of every answer
+    :param db_handler: the database the entries are in
+    :param previous: the decisions the answers had
+    :param scores: the ScoresHandler of the exercise the answers were given in, the scores aren't changed if None
+    :param kwargs: the other arguments of match_answers, e.g. targets or processes
+    :returns: the new decisions
+    """
+    entry_ids = np.asarray(list(entry_ids), dtype=np.int64)
+    decisions = match_answers(answers, entry_ids, directions, db_handler, **kwargs)
+    if scores is not None:
+        ids, deltas = get_score_deltas(entry_ids, previous, decisions)
+        if len(ids) > 0:
+            scores.apply_score_deltas(ids, deltas)
+    return decisions
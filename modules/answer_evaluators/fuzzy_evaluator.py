@@ -1,18 +1,26 @@
 import re
 
-from fuzzywuzzy import fuzz
-from typing import Tuple, List, Union
+from typing import Iterable, Tuple, List, Optional, Union
 
+from .answer_automaton import AnswerAutomaton
+from .answer_key import AnswerKey, compile_answers, normalize_answer
 from ..utils.utils import add_special_chars, clean_text
 
 
 class FuzzyEvaluator:
-    def match_answer(self, answer, target) -> bool:
-        # Handle for special characters that you're too lazy to type (like: Ö)
-        answer = add_special_chars(answer)
-
-        result = self.matching(answer, target)
-        return result
+    def match_answer(self, answer, target, answer_key:Optional[AnswerKey]=None) -> bool:
+        """
+        Evaluates an answer
+        :param answer: the answer provided by the user
+        :param target: the correct answer
+        :param answer_key: the compiled answer key of the entry (see AnswerKey), the accepted answers are compiled
+         from the target if None
+        :returns: True if the answer is matching else False
+        """
+        if answer_key is None:
+            # Handle for special characters that you're too lazy to type (like: Ö)
+            return self.matching(add_special_chars(answer), target)
+        return self.match_normalized(normalize_answer(answer), answer_key.get_answers(target))
 
     def matching(self, answer:str, target:str) -> bool:
         """
@@ -21,16 +29,15 @@ class FuzzyEvaluator:
         :param target: the correct answer
         :returns: True if the answer is matching else False
         """
-        target_parts = re.split('[,;]', clean_text(target))
-        correct_answers = []
-        for value in [self.get_all_valid_answers(x) for x in target_parts]:
-            correct_answers += [x.strip() for x in value if x.strip() not in correct_answers]
+        return self.match_normalized(clean_text(answer), compile_answers(target))
 
-        answer = clean_text(answer)
-        # we'll use the fuzzywuzzy library to have some flexibility, but not too much
-        return any([fuzz.ratio(answer, correct_answer) > 90 for correct_answer in correct_answers])
+    def match_normalized(self, answer:str, correct_answers:Iterable[AnswerAutomaton]) -> bool:
+        """ Sees whether a normalized answer matches one of the accepted answers (see compile_answers)"""
+        # some flexibility, but not too much: the same decisions as fuzz.ratio(answer, correct_answer) > 90
+        return any(x.matches(answer) for x in correct_answers)
 
-    def get_all_valid_answers(self, sentences:Union[str, List[str]], choices:List[Tuple[str, List[str]]]=[]):
+    def get_all_valid_answers(self, sentences:Union[str, List[str]],
+                              choices:Optional[List[Tuple[str, List[str]]]]=None):
         """
         Decomposes an answer to all possible implied answers
         :param sentences: a list of valid answers
@@ -42,10 +49,9 @@ class FuzzyEvaluator:
             sentences = [sentences]
             words_with_slash = re.findall(r'[^ ]+/[^ ]+', sentences[0])
             choices = [(x, x.split('/')) for x in words_with_slash]
-        if len(choices) == 0:
+        if not choices:
             return sentences
-        choice = choices[0]
-        choices.remove(choice)
+        choice, choices = choices[0], choices[1:]
         tmp = sentences
         sentences = []
         for sent in tmp:
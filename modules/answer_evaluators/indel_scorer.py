@@ -0,0 +1,86 @@
+from typing import Optional
+
+
+# The ratio (in %) an answer should exceed to match, like fuzz.ratio(answer, target) > 90
+MATCH_THRESHOLD = 90
+# The cost of inserting or deleting a character, in the integer form of the threshold (see get_target_weight)
+INDEL_COST = 200
+
+
+def get_target_weight(threshold:int=MATCH_THRESHOLD) -> int:
+    """
+    Returns the weight of the total length in the integer form of the threshold: the ratio of fuzz.ratio is
+     1 - distance / (len(answer) + len(target)), with the indel distance, and round(100 * ratio) > threshold if
+     INDEL_COST * distance < weight * (len(answer) + len(target)), e.g. 200 * distance < 19 * length for 90
+     (exact for even thresholds, a ratio ending in .5 is rounded to the even integer)
+    :param threshold: the ratio (in %) to exceed
+    :returns: the weight
+    """
+    return INDEL_COST - 2 * threshold - 1
+
+def get_max_distance(n_chars:int, threshold:int=MATCH_THRESHOLD) -> int:
+    """ Returns the largest indel distance with a ratio above the threshold, for a total length of n_chars"""
+    return (get_target_weight(threshold) * n_chars - 1) // INDEL_COST
+
+def length_fits(n_answer:int, min_length:int, max_length:Optional[int]=None, threshold:int=MATCH_THRESHOLD) -> bool:
+    """
+    Sees whether an answer is close enough in length to a target to match it: the distance is at least the
+     difference of the lengths
+    :param n_answer: the length of the answer
+    :param min_length: the length of the target, or the shortest length if the targets have a range of lengths
+    :param max_length: the longest length of the targets, the same as min_length if None
+    :param threshold: the ratio (in %) to exceed
+    :returns: False if no target of the range can match the answer
+    """
+    max_length = min_length if max_length is None else max_length
+    # the closest length to the answer is the easiest to match
+    n_target = min(max(n_answer, min_length), max_length)
+    return abs(n_answer - n_target) <= get_max_distance(n_answer + n_target, threshold)
+
+def bounded_indel_distance(a:str, b:str, max_distance:int) -> Optional[int]:
+    """
+    Computes the indel distance (insertions and deletions) of two strings, if it isn't above a bound. The distance
+     is len(a) + len(b) - 2 * (length of the longest common subsequence), the rows of the DP of the subsequence are
+     computed as bit vectors (one bit per character of b), and it stops as soon as the distance can't end within
+     the bound, even if the rest of a matches perfectly
+    :param a: the first string
+    :param b: the second string
+    :param max_distance: the largest distance of interest
+    :returns: the distance, None if it's above max_distance
+    """
+    n_a, n_b = len(a), len(b)
+    if abs(n_a - n_b) > max_distance:
+        return None
+    # The positions of every character in b
+    masks = {}
+    for j, char in enumerate(b):
+        masks[char] = masks.get(char, 0) | (1 << j)
+    full = (1 << n_b) - 1
+    # The zeros of row are the positions where the common subsequence gets longer
+    row = full
+    for i, char in enumerate(a, 1):
+        matches = row & masks.get(char, 0)
+        row = ((row + matches) | (row - matches)) & full
+        common = n_b - row.bit_count()
+        if n_a + n_b - 2 * (common + n_a - i) > max_distance:
+            return None
+    distance = n_a + n_b - 2 * (n_b - row.bit_count())
+    return distance if distance <= max_distance else None
+
+def ratio_exceeds(answer:str, target:str, threshold:int=MATCH_THRESHOLD) -> bool:
+    """
+    Sees whether the similarity of an answer and a target is above a threshold, with the same decision as
+     fuzz.ratio(answer, target) > threshold (with python-Levenshtein), without computing the exact ratio
+    :param answer: the answer
+    :param target: the target
+    :param threshold: the ratio (in %) to exceed
+    :returns: True if the ratio is above the threshold
+    """
+    if answer == target:
+        return True
+    if answer == '' or target == '':
+        return False
+    if not length_fits(len(answer), len(target), threshold=threshold):
+        return False
+    max_distance = get_max_distance(len(answer) + len(target), threshold)
+    return bounded_indel_distance(answer, target, max_distance) is not None
@@ -2,13 +2,35 @@ from abc import abstractmethod
 
 import numpy as np
 
+from typing import Optional, Union
+
+from .question_queue import QuestionQueue, DEFAULT_QUEUE_SIZE
 from ..support_classes.scores import ScoresHandler
+from ..utils import weighted_sample_without_replacement, to_id_array
+from ..utils.default_settings import SAMPLING_POLICIES
 
 class Exercise:
-    def __init__(self, scores_path, loaded_ids):
-        self.scores = ScoresHandler(scores_path, loaded_ids)
+    def __init__(self, scores_path, loaded_ids, queue_size:int=DEFAULT_QUEUE_SIZE, policy:str='Weighted',
+                 rng:Optional[np.random.Generator]=None, **scores_kwargs):
+        """
+        :param scores_path: the name of the score file
+        :param loaded_ids: the ids loaded from the database
+        :param queue_size: the number of questions drawn at once (see QuestionQueue)
+        :param policy: how the questions are chosen, one of SAMPLING_POLICIES
+        :param rng: the random generator drawing the questions, the global numpy generator if None
+        :param scores_kwargs: the other arguments of the ScoresHandler, e.g. scores_dir
+        """
+        if policy not in SAMPLING_POLICIES:
+            raise ValueError(f'The sampling policy could only be one of {SAMPLING_POLICIES}, got "{policy}"')
+        self.scores = ScoresHandler(scores_path, loaded_ids, **scores_kwargs)
+        self.policy = policy
+        self.rng = rng
+        # The schedule follows the answers whatever the policy, so it's up to date when the policy changes
+        self.scores.load_schedule(loaded_ids)
+        self.scores.scheduler.rng = rng
 
-        self.sampled_ids = loaded_ids
+        self.queue_size = queue_size
+        self.set_sampled_ids(loaded_ids)
 
         self.question = None
 
@@ -26,12 +48,39 @@ class Exercise:
         pass
 
     def set_sampled_ids(self, loaded_ids, redraw:int=-1):
+        """
+        Sets the ids the questions are drawn from, the questions already queued are dropped
+        :param loaded_ids: the ids loaded from the database
+        :param redraw: if positive, only this number of ids is kept, drawn with the weights of their scores
+        """
         if redraw > 0:
-            weights = self.scores.get_weights()
-            self.sampled_ids = np.random.choice(loaded_ids, p=weights, replace=False, size=redraw)
+            loaded_ids = to_id_array(loaded_ids)
+            weights = self.scores.get_weights(loaded_ids)
+            self.sampled_ids = loaded_ids[weighted_sample_without_replacement(weights, redraw, self.rng)]
         else:
             self.sampled_ids = loaded_ids
+        self.sampler = self.scores.build_sampler(self.sampled_ids)
+        self.queue = QuestionQueue(self.sampler, self.queue_size, self.rng)
+        if self.policy == 'Spaced Repetition':
+            self.scores.scheduler.build_queue(self.sampled_ids)
+
+    def next_question_id(self) -> int:
+        """ Returns the id of the entry to ask next, following the sampling policy of the exercise"""
+        if self.policy == 'Spaced Repetition':
+            return self.scores.scheduler.next_due()
+        return self.queue.pop()
+
+    def update_score(self, entry_id:Union[int, str], scored_a_point:bool):
+        """ Updates the score of an entry after it was answered, the entry is dropped from the queue if it's
+            queued again"""
+        self.scores.update(entry_id, scored_a_point)
+        self.queue.invalidate(entry_id)
 
+    def remove_entry(self, entry_id:Union[int, str]):
+        """ Drops a deleted entry from the scores and the questions"""
+        self.scores.remove_id(entry_id)
+        self.queue.invalidate(entry_id)
+        self.sampled_ids = [x for x in self.sampled_ids if int(x) != int(entry_id)]
 
     def save_scores(self):
-        self.scores.save()
\ No newline at end of file
+        self.scores.save()
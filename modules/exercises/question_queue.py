@@ -0,0 +1,49 @@
+import numpy as np
+
+from typing import List, Optional, Union
+
+from ..support_classes.weighted_sampler import WeightedSampler
+
+
+# The number of questions drawn at once
+DEFAULT_QUEUE_SIZE = 20
+
+
+class QuestionQueue:
+    """ The next questions of a practice session: a batch of distinct entries drawn at once from a WeightedSampler
+        (its weights follow the scores, see WeightedSampler.sample_distinct), drawn again only when the batch runs
+        out. When the score of a queued entry changes or the entry is deleted, only that entry is dropped from the
+        queue.
+    """
+    def __init__(self, sampler:WeightedSampler, size:int=DEFAULT_QUEUE_SIZE, rng:Optional[np.random.Generator]=None):
+        """
+        :param sampler: the sampler holding the weights of the entries
+        :param size: the number of questions drawn at once
+        :param rng: the random generator to use, the global numpy generator if None
+        """
+        self.sampler = sampler
+        self.size = size
+        self.rng = rng
+        # The queued IDs, the next question is the last one
+        self.pending:List[int] = []
+
+    def refill(self) -> None:
+        """ Draws the next batch of questions"""
+        self.pending = self.sampler.sample_distinct(self.size, self.rng)[::-1]
+
+    def pop(self) -> int:
+        """ Returns the id of the next question"""
+        if not self.pending:
+            self.refill()
+        assert self.pending, 'There is no entry to draw'
+        return self.pending.pop()
+
+    def invalidate(self, entry_id:Union[int, str]) -> None:
+        """ Drops an entry from the queue, e.g. after its score changed or it was deleted (it can be drawn again
+            in the next batch, with its new weight)"""
+        entry_id = int(entry_id)
+        if entry_id in self.pending:
+            self.pending.remove(entry_id)
+
+    def __len__(self) -> int:
+        return len(self.pending)
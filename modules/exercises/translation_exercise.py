@@ -1,18 +1,21 @@
 import re
 import numpy as np
 
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
 
 from .exercise import Exercise
 from ..answer_evaluators import FuzzyEvaluator
 from ..utils.utils import sample_entry
 
 class TranslationExercise(Exercise):
-    def __init__(self, scores_path: str, loaded_ids, direction):
-        super().__init__(scores_path, loaded_ids)
+    def __init__(self, scores_path: str, loaded_ids, direction, policy:str='Weighted',
+                 rng:Optional[np.random.Generator]=None, **scores_kwargs):
+        super().__init__(scores_path, loaded_ids, policy=policy, rng=rng, **scores_kwargs)
         assert direction in ['Forward', 'Backward'], 'Direction could only be "Forward" or "Backward"'
         self.direction = direction
         self.evaluator = FuzzyEvaluator()
+        # The answers accepted for the current question (see AnswerKey)
+        self.answer_key = None
 
 
     def sample_question(self, db_handler) -> dict[str, str]:
@@ -21,18 +24,17 @@ class TranslationExercise(Exercise):
         :returns: a dictionary with the following form:
          {'question':question_text, 'ID':id, 'target':target}
         """
-        # Get the weights to use in the drawing process
-        weights = self.scores.get_weights(self.sampled_ids)
-        entry = db_handler.sample_random_entry(self.sampled_ids, weights)
+        entry = db_handler.get_entry(self.next_question_id())
 
         query, target = self.formulate_translation_question(entry)
 
         if self.direction == 'Forward':
             query = re.sub(r'\([^)]*\)', '', query)
-            query = np.random.choice(re.split('[,;]', query)).strip()
+            query = (np.random if self.rng is None else self.rng).choice(re.split('[,;]', query)).strip()
 
         # Save the entry for later reference
         self.question = {'question':query, 'ID':entry['ID'], 'target':target}
+        self.answer_key = db_handler.get_answer_key(entry['ID'], self.direction)
 
         return self.question
 
@@ -48,12 +50,12 @@ class TranslationExercise(Exercise):
             target_keys, query_keys = query_keys, target_keys
 
 
-        target, target_key = sample_entry(entry, target_keys)
+        target, target_key = sample_entry(entry, target_keys, self.rng)
         if '_f' in target_key:
             query_keys = [x for x in query_keys if '_f' in x]
         else:
             query_keys = [x for x in query_keys if not '_f' in x]
-        query, query_key = sample_entry(entry, query_keys)
+        query, query_key = sample_entry(entry, query_keys, self.rng)
         if self.direction == 'Backward' and target_key != '':
             query = query + ' (' + target_key.split('_')[-1] + ')'
 
@@ -61,6 +63,6 @@ class TranslationExercise(Exercise):
 
     def evaluate_answer(self, answer: str) -> bool:
         question_id = self.question['ID']
-        answered_correctly = self.evaluator.match_answer(answer, self.question['target'])
-        self.scores.update(question_id, answered_correctly)
+        answered_correctly = self.evaluator.match_answer(answer, self.question['target'], self.answer_key)
+        self.update_score(question_id, answered_correctly)
         return answered_correctly
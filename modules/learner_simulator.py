@@ -0,0 +1,137 @@
+import string
+import tempfile
+import time
+
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from .answer_evaluators import AnswerKey, AnswerKeyCache
+from .exercises import TranslationExercise
+
+
+# The default settings of a simulated run
+DEFAULT_RUN = {
+    'policy':'Weighted',
+    'direction':'Forward',
+    'n_entries':500,
+    'n_steps':100_000,
+    # The probability of recalling an entry before it's asked, drawn uniformly in this range for every entry
+    'initial_recall':(0.0, 0.5),
+    # The fraction of the remaining gap to a perfect recall closed every time an entry is asked
+    'learning_rate':0.2,
+    # The recall above which an entry counts as learned
+    'mastery':0.9,
+    'n_checkpoints':20,
+}
+
+
+class SyntheticLearner:
+    """ A learner that recalls every entry with its own probability, which rises every time the entry is asked
+        (whether it was recalled or not, the right answer is shown after every question)
+    """
+    def __init__(self, n_entries:int, rng:np.random.Generator, initial_recall=(0.0, 0.5), learning_rate:float=0.2):
+        """
+        :param n_entries: the number of entries to learn
+        :param rng: the random generator of the learner
+        :param initial_recall: the range of the probabilities of recalling the entries before they're asked
+        :param learning_rate: the fraction of the gap to a perfect recall closed every time an entry is asked
+        """
+        self.rng = rng
+        self.recall = rng.uniform(*initial_recall, size=n_entries)
+        self.learning_rate = learning_rate
+
+    def answer(self, entry_idx:int) -> bool:
+        """ Returns whether the learner recalls an entry, then learns from the question"""
+        recalled = self.rng.random() < self.recall[entry_idx]
+        self.recall[entry_idx] += self.learning_rate * (1 - self.recall[entry_idx])
+        return recalled
+
+
+class SimulatedDatabase:
+    """ A database of random words, with the only methods of DatabaseHandler the exercises need"""
+    def __init__(self, n_entries:int, rng:np.random.Generator):
+        letters = np.array(list(string.ascii_lowercase))
+        words = [''.join(x) for x in rng.choice(letters, size=(2 * n_entries, 8))]
+        self.ids = np.arange(10**7, 10**7 + n_entries)
+        self.entries = {
+            int(x):{'ID':int(x), 'Word_s':words[i], 'Word_p':'', 'Word_fs':'', 'Word_fp':'',
+                    'Translation':words[n_entries + i], 'Translation_f':''}
+            for i, x in enumerate(self.ids)
+        }
+        self.answer_keys = AnswerKeyCache()
+
+    def get_entry(self, entry_id:int) -> dict:
+        return dict(self.entries[int(entry_id)])
+
+    def get_answer_key(self, entry_id:int, direction:str) -> AnswerKey:
+        return self.answer_keys.get(entry_id, direction, self.get_entry)
+
+
+def simulate_run(run:dict) -> dict:
+    """
+    Runs a synthetic learner through an exercise, without the GUI
+    :param run: the settings of the run (see DEFAULT_RUN), with a 'seed' (an int or a SeedSequence)
+    :returns: the metrics of the run: 'questions per second', 'coverage' (the fraction of the entries asked so
+     far), 'recall' (the mean recall of the learner) and 'mastered' (the fraction of entries above the mastery
+     threshold) at every checkpoint, and 'steps to mastery' (the first checkpoint where all the entries are
+     mastered, None if it's never reached)
+    """
+    run = {**DEFAULT_RUN, **run}
+    seed_sequence = np.random.SeedSequence(run['seed']) if isinstance(run['seed'], int) else run['seed']
+    db_seed, learner_seed, exercise_seed = seed_sequence.spawn(3)
+    db = SimulatedDatabase(run['n_entries'], np.random.default_rng(db_seed))
+    learner = SyntheticLearner(run['n_entries'], np.random.default_rng(learner_seed), run['initial_recall'],
+                               run['learning_rate'])
+    first_id = int(db.ids[0])
+    checkpoints = np.linspace(0, run['n_steps'], run['n_checkpoints'] + 1).astype(int)[1:]
+    asked = np.zeros(run['n_entries'], dtype=bool)
+    metrics = {'steps':checkpoints.tolist(), 'coverage':[], 'recall':[], 'mastered':[], 'steps to mastery':None}
+
+    with tempfile.TemporaryDirectory() as scores_dir:
+        # Every run has its own generators, so the runs are independent of each other and of the global state
+        exercise = TranslationExercise('scores.json', db.ids.tolist(), run['direction'], run['policy'],
+                                       np.random.default_rng(exercise_seed), scores_dir=scores_dir, sync_log=False)
+        start = time.perf_counter()
+        step = 0
+        for checkpoint in checkpoints:
+            for step in range(step, checkpoint):
+                question = exercise.sample_question(db)
+                entry_idx = question['ID'] - first_id
+                asked[entry_idx] = True
+                exercise.evaluate_answer(question['target'] if learner.answer(entry_idx) else '-')
+            step = checkpoint
+            metrics['coverage'].append(float(asked.mean()))
+            metrics['recall'].append(float(learner.recall.mean()))
+            metrics['mastered'].append(float((learner.recall >= run['mastery']).mean()))
+            if metrics['steps to mastery'] is None and metrics['mastered'][-1] == 1:
+                metrics['steps to mastery'] = int(checkpoint)
+        metrics['questions per second'] = run['n_steps'] / (time.perf_counter() - start)
+    return metrics
+
+
+def simulate(runs:List[dict], n_repeats:int=4, seed:int=0, processes:Optional[int]=None) -> List[Dict]:
+    """
+    Repeats simulated runs with independent seeds, in a pool of processes
+    :param runs: the settings of the runs to compare (see DEFAULT_RUN), e.g. one for every sampling policy
+    :param n_repeats: the number of learners simulated for every run
+    :param seed: the seed the seeds of all the learners are spawned from, the results are reproducible with it
+    :param processes: the number of processes, the number of CPUs if None
+    :returns: for every run, its settings and the metrics of all its repeats averaged (see simulate_run)
+    """
+    seeds = np.random.SeedSequence(seed).spawn(len(runs) * n_repeats)
+    jobs = [{**run, 'seed':seeds[i * n_repeats + j]} for i, run in enumerate(runs) for j in range(n_repeats)]
+    with ProcessPoolExecutor(processes) as pool:
+        results = list(pool.map(simulate_run, jobs))
+
+    summaries = []
+    for i, run in enumerate(runs):
+        repeats = results[i * n_repeats:(i + 1) * n_repeats]
+        summary = {'run':{**DEFAULT_RUN, **run}, 'steps':repeats[0]['steps']}
+        for key in ['questions per second', 'coverage', 'recall', 'mastered']:
+            summary[key] = np.mean([x[key] for x in repeats], axis=0).tolist()
+        reached = [x['steps to mastery'] for x in repeats if x['steps to mastery'] is not None]
+        summary['steps to mastery'] = float(np.mean(reached)) if len(reached) == n_repeats else None
+        summaries.append(summary)
+    return summaries
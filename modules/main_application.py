@@ -1,5 +1,5 @@
 import pygame
-import sys, io
+import os, sys, io
 import matplotlib.pyplot as plt
 
 from PIL import Image
@@ -72,6 +72,8 @@ class TrainerApp:
 
         self.mode = mode
         self.quiz:Exercise = None
+        # The database could have been edited outside the application
+        self.db_handler.reconcile_scores()
 
     def draw_text(self, msg, rect,  fgcolor=(255, 255, 255), fsize=26, bgcolor=(0, 0, 0)):
         """
@@ -143,6 +145,7 @@ class TrainerApp:
         
         options = ['Practice',
                     'Show Scores',
+                    'Learning Curve',
                     'Options',
                     'Exit'
                     ]
@@ -233,7 +236,10 @@ class TrainerApp:
                 self.draw_text(correct_answer, rect=self.target_area, bgcolor=(220, 220, 0))
             elif option == 'Delete Entry':
                 self.db_handler.delete_entry(question_idx)
-                self.quiz.set_sampled_ids(self.db_handler.used_ids)
+                self.quiz.remove_entry(question_idx)
+                # The running exercise already dropped the entry, its scores are saved when it ends
+                scores_file = os.path.basename(self.quiz.scores.scores_path)
+                self.db_handler.remove_entry_scores([question_idx], skipped_files=[scores_file])
                 self.draw_text(correct_answer, rect=self.target_area, bgcolor=(0, 220, 220))
             elif option == 'Edit Target':
                 new_target = self.edit_target(correct_answer)
@@ -292,7 +298,7 @@ class TrainerApp:
         """ Performs the necessary actions before the application exits"""
         # This is to avoid saving every time the app is tested while developing
         if self.mode != 'testing':
-            self.db_handler.save_database(self.stg['Database'])
+            self.db_handler.close()
             self.stg.save_settings()
         pygame.quit()
         sys.exit()
@@ -305,8 +311,9 @@ class TrainerApp:
                 exercise = self.choose_exercise()
                 if exercise == 'Back':
                     continue
+                # The exercise (and its scores and queued questions) is kept for the whole session
+                self.set_quiz(exercise)
                 while True:
-                    self.set_quiz(exercise)
                     entry = self.quiz.sample_question(self.db_handler)
                     answer = self.get_answer(entry['question'])
                     result = self.quiz.evaluate_answer(answer)
@@ -324,6 +331,13 @@ class TrainerApp:
                 else:
                     self.set_quiz(exercise)
                     self.show_scores_summary()
+
+            elif option == 'Learning Curve':
+                exercise = self.choose_exercise()
+                if exercise == 'Back':
+                    continue
+                self.set_quiz(exercise)
+                self.show_learning_curve()
             
             elif option == 'Options':
                 # This doesn't work for now
@@ -336,7 +350,7 @@ class TrainerApp:
     def set_quiz(self, exercise):
         direction = exercise.split()[0]
         scores_path = self.get_scores_path(exercise)
-        self.quiz = TranslationExercise(scores_path, self.db_handler.used_ids, direction)
+        self.quiz = TranslationExercise(scores_path, self.db_handler.used_ids, direction, self.stg['Sampling Policy'])
 
     def get_scores_path(self, exercise):
         return self.db_handler.get_scores_path(exercise)
@@ -426,11 +440,68 @@ class TrainerApp:
         plt.yticks(color='white')
         plt.title('Scores Distribution')
 
+        self.draw_plot([0.1, 0.4, 0.8, 0.55])
+        pygame.display.update()
+        self.wait_for_escape()
+
+    def show_learning_curve(self):
+        """ Displays a page with the progress over time in a particular exercise, read from the rollups of
+            the score history (see ScoreHistory)"""
+        curve = self.quiz.scores.get_learning_curve()
+        self.screen.fill((0, 0, 0))
+        screen_w, screen_h = self.stg['Screen Resolution']
+        font = pygame.font.Font(None, int(0.1*screen_h/2))
+        # The title
+        text = font.render("Learning Curve", True, (19, 161, 14))
+        text_rect = text.get_rect(center=(screen_w/2, screen_h/20))
+        self.screen.blit(text, text_rect)
+        if len(curve['start']) == 0:
+            placements = self.calculate_rect_placements(["No answers yet"],
+                                                        {'rel_y':15, 'rel_x':10, 'rel_w':80, 'rel_h':8, 'rel_gap':2})
+            self.add_items_to_screen(placements)
+            pygame.display.update()
+            self.wait_for_escape()
+            return
+
+        item_names = [
+            f"Total Answers: {curve['answers'].sum()}",
+            f"Last Accuracy: {curve['accuracy'][-1]:.0%}",
+        ]
+        dims = {'rel_y':15, 'rel_x':10, 'rel_w':80, 'rel_h':8, 'rel_gap':2}
+        placements = self.calculate_rect_placements(item_names, dims)
+        # Place the two fields at the same vertical level
+        x, y, w, h = placements[0][1]
+        placements[0] = (placements[0][0], [x, y, int(0.45*w), h], '')
+        placements[1] = (placements[1][0], [int(0.55*w) + x, y, int(0.45*w), h], '')
+        self.add_items_to_screen(placements)
+
+        # Draw the accuracy and the average score over time
+        dates = curve['start'].astype('datetime64[s]').tolist()
+        plt.clf()
+        score_axis = plt.gca()
+        score_axis.plot(dates, curve['average score'], marker='o', color='tab:blue')
+        score_axis.set_ylabel('Average Score', color='white')
+        accuracy_axis = score_axis.twinx()
+        accuracy_axis.plot(dates, curve['accuracy'], marker='o', color='tab:green')
+        accuracy_axis.set_ylabel('Accuracy', color='white')
+        accuracy_axis.set_ylim(0, 1)
+        for axis in [score_axis, accuracy_axis]:
+            axis.tick_params(colors='white')
+        plt.gcf().autofmt_xdate()
+        plt.title('Average Score (blue) and Accuracy (green)', color='white')
+
+        self.draw_plot([0.1, 0.3, 0.8, 0.65])
+        pygame.display.update()
+        self.wait_for_escape()
+
+    def draw_plot(self, rel_rect:List[float]):
+        """ Draws the current matplotlib figure on the screen
+            :param rel_rect: the rect of the figure, relative to the screen resolution [x, y, w, h]"""
         img_buf = io.BytesIO()
         plt.savefig(img_buf, format='png', facecolor=(0,0,0,0))
 
         ref = self.stg['Screen Resolution']
-        rect = rel2abs([0.1, 0.4, 0.8, 0.55], ref)
+        rect = rel2abs(rel_rect, ref)
         
         im = Image.open(img_buf)
         raw_str = im.tobytes("raw", 'RGBA')
@@ -438,7 +509,9 @@ class TrainerApp:
         
         im = pygame.transform.scale(im, rect[2:])
         self.screen.blit(im, rect[:2])
-        pygame.display.update()
+
+    def wait_for_escape(self):
+        """ Keeps the current page until the user presses escape"""
         while True:
             event = pygame.event.wait()
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
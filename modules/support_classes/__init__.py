@@ -1,4 +1,6 @@
 from .settings import SettingsHandler
 from .database import DatabaseHandler
+from .category_index import CategoryIndex
 from .scores import ScoresHandler
+from .importer import VocabularyImporter
 from .pygame_menu import PygameMenu
\ No newline at end of file
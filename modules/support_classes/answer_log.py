@@ -0,0 +1,90 @@
+import os
+import time
+
+import numpy as np
+
+from typing import Iterable, Union
+
+from ..utils import to_id_array
+
+
+# The layout of a log record: when the entry was answered, whether the answer was correct and the score it led to
+ANSWER_DTYPE = np.dtype([('time', '<f8'), ('id', '<i8'), ('correct', '?'), ('score', '<i4')])
+
+
+class AnswerLog:
+    """ An append-only binary log of the answers given in an exercise. Every answer is a fixed-size record written
+        and synced to disk as soon as it's scored, so a crash doesn't lose the session. The records hold the score
+        the answer led to (not only the point won or lost), so replaying a record that's already in the scores
+        snapshot is harmless.
+    """
+    def __init__(self, path:Union[str, os.PathLike], sync:bool=True):
+        """
+        :param path: the path of the log
+        :param sync: whether every answer is synced to disk, it's only turned off when the log doesn't need to
+         survive a crash (e.g. in simulations)
+        """
+        self.path = path
+        self.sync = sync
+
+    def append(self, entry_id:int, correct:bool, score:int, answer_time:float=None) -> None:
+        """
+        Appends an answer to the log and makes sure it's on disk
+        :param entry_id: the id of the answered entry
+        :param correct: whether the answer was correct
+        :param score: the score of the entry after the answer
+        :param answer_time: the time of the answer (seconds since the epoch), now if None
+        """
+        record = np.array([(time.time() if answer_time is None else answer_time, entry_id, correct, score)],
+                          dtype=ANSWER_DTYPE)
+        with open(self.path, 'ab') as f:
+            # Drop a record cut by a crash, the new records would be misaligned otherwise
+            cut_bytes = f.seek(0, os.SEEK_END) % ANSWER_DTYPE.itemsize
+            if cut_bytes != 0:
+                f.truncate(f.tell() - cut_bytes)
+            f.write(record.tobytes())
+            if self.sync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def read(self) -> np.ndarray:
+        """ Returns the records of the log as a structured array (see ANSWER_DTYPE), from the oldest to the newest"""
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return np.zeros(0, dtype=ANSWER_DTYPE)
+        # A crash could cut the last record, it's dropped
+        n_records = len(data) // ANSWER_DTYPE.itemsize
+        return np.frombuffer(data[:n_records * ANSWER_DTYPE.itemsize], dtype=ANSWER_DTYPE)
+
+    def drop_ids(self, entry_ids:Iterable[Union[int, str]]) -> int:
+        """
+        Removes the answers given to some entries, e.g. deleted ones (the log is written to a temporary file first,
+         so a crash never leaves a half written log)
+        :param entry_ids: the ids of the entries
+        :returns: the number of removed records
+        """
+        records = self.read()
+        dropped = np.isin(records['id'], to_id_array(entry_ids))
+        if not dropped.any():
+            return 0
+        with open(str(self.path) + '.tmp', 'wb') as f:
+            f.write(records[~dropped].tobytes())
+            if self.sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(str(self.path) + '.tmp', self.path)
+        return int(dropped.sum())
+
+    def size(self) -> int:
+        """ Returns the size of the log in bytes"""
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def clear(self) -> None:
+        """ Drops every record (they should be in a scores snapshot by then)"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,122 @@
+import re
+import gzip
+import shutil, os, datetime
+import threading
+
+from typing import List, Optional, Tuple, Union
+
+from ..utils.excel_ops import get_file_signature
+
+
+# The format of the time stamps at the start of the backup names
+STAMP_FORMAT = '%Y-%m-%d %H-%M-%S.%f'
+
+
+class BackupManager:
+    """ Keeps copies of a database before it's overwritten. A copy is skipped if a backup with the same content
+        already exists (the content hash is part of the backup name), and the old backups are pruned with a
+        retention policy: the last keep_last backups, plus the newest backup of each of the last keep_daily days
+        and keep_weekly weeks.
+    """
+    def __init__(self, backup_dir:str='backup', compress:bool=False, keep_last:int=10, keep_daily:int=7,
+                 keep_weekly:int=8):
+        """
+        :param backup_dir: the folder containing the backups
+        :param compress: whether to gzip the backups (note that xlsx files are already compressed)
+        :param keep_last: the number of most recent backups to keep
+        :param keep_daily: the number of days for which the newest backup is kept
+        :param keep_weekly: the number of weeks for which the newest backup is kept
+        """
+        self.backup_dir = backup_dir
+        self.compress = compress
+        self.keep_last = keep_last
+        self.keep_daily = keep_daily
+        self.keep_weekly = keep_weekly
+        # The thread pruning the old backups (if any), a daemon so the application never waits for it to exit:
+        # a prune cut short leaves a few extra backups, they're deleted by the next prune
+        self.prune_thread = None
+
+    def backup(self, path:Union[str, os.PathLike], prune_in_background:bool=True) -> Optional[str]:
+        """
+        Backs up a file (if its content isn't backed up already) then prunes the old backups
+        :param path: the path to the file
+        :param prune_in_background: whether to prune the old backups in a separate thread
+        :returns: the path of the new backup, None if the content was already backed up
+        """
+        file_name = os.path.basename(path)
+        content_hash = get_file_signature(path)['hash'][:16]
+        os.makedirs(self.backup_dir, exist_ok=True)
+        if any(x[1] == content_hash for x in self.list_backups(file_name)):
+            return None
+        stamp = datetime.datetime.now().strftime(STAMP_FORMAT)
+        backup_path = os.path.join(self.backup_dir, f'{stamp}_{content_hash}_{file_name}')
+        if self.compress:
+            backup_path += '.gz'
+            with open(path, 'rb') as f_in, gzip.open(backup_path, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+        else:
+            shutil.copy(path, backup_path)
+        if prune_in_background:
+            self.wait()
+            self.prune_thread = threading.Thread(target=self.prune, args=(file_name,), daemon=True)
+            self.prune_thread.start()
+        else:
+            self.prune(file_name)
+        return backup_path
+
+    def list_backups(self, file_name:str) -> List[Tuple[datetime.datetime, Optional[str], str]]:
+        """
+        Lists the backups of a file, from the newest to the oldest
+        :param file_name: the name of the backed up file
+        :returns: a list of tuples (time, content_hash, backup_name), content_hash is None for the
+         backups made before the hash was added to the names
+        """
+        pattern = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}-\d{2}-\d{2}(?:\.\d+)?)_(?:([0-9a-f]{16})_)?'
+                             + re.escape(file_name) + r'(?:\.gz)?$')
+        try:
+            names = os.listdir(self.backup_dir)
+        except FileNotFoundError:
+            return []
+        backups = []
+        for name in names:
+            match = pattern.match(name)
+            if match is None:
+                continue
+            stamp = match.group(1)
+            stamp_format = STAMP_FORMAT if '.' in stamp else STAMP_FORMAT.replace('.%f', '')
+            backups.append((datetime.datetime.strptime(stamp, stamp_format), match.group(2), name))
+        return sorted(backups, reverse=True)
+
+    def select_kept_backups(self, backups:List[Tuple[datetime.datetime, Optional[str], str]]) -> set:
+        """ Returns the names of the backups to keep according to the retention policy (see list_backups for
+            the format of backups)"""
+        kept = {x[2] for x in backups[:self.keep_last]}
+        days, weeks = [], []
+        for time, _, name in backups:
+            day, week = time.date(), time.isocalendar()[:2]
+            # The backups are sorted from the newest, so the first one of a day (or week) is the newest
+            if day not in days and len(days) < self.keep_daily:
+                days.append(day)
+                kept.add(name)
+            if week not in weeks and len(weeks) < self.keep_weekly:
+                weeks.append(week)
+                kept.add(name)
+        return kept
+
+    def prune(self, file_name:str) -> None:
+        """ Deletes the backups of a file that aren't kept by the retention policy"""
+        backups = self.list_backups(file_name)
+        kept = self.select_kept_backups(backups)
+        for _, _, name in backups:
+            if name not in kept:
+                try:
+                    os.remove(os.path.join(self.backup_dir, name))
+                except FileNotFoundError:
+                    pass
+
+    def wait(self) -> None:
+        """ Waits until the old backups are pruned if it's done in the background (only needed before listing
+            the backups, e.g. in the tests, the storage doesn't wait for it)"""
+        if self.prune_thread is not None:
+            self.prune_thread.join()
+            self.prune_thread = None
@@ -0,0 +1,132 @@
+import re
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class CategoryIndex:
+    """ Maps every category token of a sheet (e.g. 'noun' and 'food' for 'noun, food') to a bitmap
+        of the rows having it, so category filters become a few boolean array operations.
+        Filters are written in a small language:
+         - 'noun' matches the rows with the 'noun' token
+         - 'a & b', 'a | b' and '!a' are the AND, OR and NOT of filters ('&' binds stronger than '|')
+         - parenthesis can be used for grouping, e.g. 'noun & !(food | people)'
+    """
+    def __init__(self, categories:Iterable[str]):
+        categories = pd.Series(list(categories), dtype=object).fillna('').astype(str)
+        self.n_rows = len(categories)
+        # A sheet only has a handful of distinct category strings, so they're tokenized once each
+        # and every token is mapped to the codes of the strings containing it
+        codes, uniques = pd.factorize(categories.values)
+        token_codes = {}
+        for code, category in enumerate(uniques):
+            for token in category.split(','):
+                token = token.strip().lower()
+                if token != '':
+                    token_codes.setdefault(token, []).append(code)
+        self.bitmaps = {token:np.isin(codes, x) for token, x in token_codes.items()}
+
+    def match(self, token:str) -> np.ndarray:
+        """ Returns the bitmap of the rows having a category token (all False for unknown tokens)"""
+        bitmap = self.bitmaps.get(token.strip().lower())
+        if bitmap is None:
+            return np.zeros(self.n_rows, dtype=bool)
+        return bitmap
+
+    def evaluate(self, expression:str) -> Optional[np.ndarray]:
+        """
+        Evaluates a filter expression
+        :param expression: the filter, written in the language described in the class docstring
+        :returns: the bitmap of the matching rows, or None if the expression is empty
+        """
+        compiled = compile_filter(expression)
+        if compiled is None:
+            return None
+        return compiled(self)
+
+    def select(self, included:Iterable[str]=(), excluded:Iterable[str]=()) -> np.ndarray:
+        """
+        Returns the bitmap of the rows matching all the included filters and none of the excluded ones
+        :param included: the filters that should all match (white filter), empty filters are ignored
+        :param excluded: the filters that shouldn't match (black filter), empty filters are ignored
+        """
+        mask = np.ones(self.n_rows, dtype=bool)
+        for expression in included:
+            bitmap = self.evaluate(expression)
+            if bitmap is not None:
+                mask &= bitmap
+        for expression in excluded:
+            bitmap = self.evaluate(expression)
+            if bitmap is not None:
+                mask &= ~bitmap
+        return mask
+
+
+def _tokenize(expression:str) -> List[str]:
+    """ Splits a filter expression into operators, parenthesis and category tokens"""
+    parts = re.split(r'([&|!()])', expression)
+    return [x.strip() for x in parts if x.strip() != '']
+
+
+@lru_cache(maxsize=128)
+def compile_filter(expression:str) -> Optional[Callable[[CategoryIndex], np.ndarray]]:
+    """
+    Compiles a filter expression into a function evaluating it on a CategoryIndex
+    :param expression: the filter, e.g. 'noun & !food'
+    :returns: a function taking a CategoryIndex and returning the bitmap of matching rows,
+     None if the expression is empty
+    """
+    tokens = _tokenize(expression)
+    if len(tokens) == 0:
+        return None
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take(expected:Optional[str]=None):
+        nonlocal position
+        token = peek()
+        if token is None or (expected is not None and token != expected):
+            raise ValueError(f'Invalid category filter "{expression}"')
+        position += 1
+        return token
+
+    # Recursive descent: or_expr := and_expr ('|' and_expr)*, and_expr := unary ('&' unary)*,
+    # unary := '!' unary | '(' or_expr ')' | token
+    def or_expr():
+        node = and_expr()
+        while peek() == '|':
+            take()
+            node = (lambda left, right: lambda index: left(index) | right(index))(node, and_expr())
+        return node
+
+    def and_expr():
+        node = unary()
+        while peek() == '&':
+            take()
+            node = (lambda left, right: lambda index: left(index) & right(index))(node, unary())
+        return node
+
+    def unary():
+        token = peek()
+        if token == '!':
+            take()
+            operand = unary()
+            return lambda index: ~operand(index)
+        if token == '(':
+            take()
+            node = or_expr()
+            take(')')
+            return node
+        if token in ['&', '|', ')', None]:
+            raise ValueError(f'Invalid category filter "{expression}"')
+        take()
+        return lambda index: index.match(token)
+
+    compiled = or_expr()
+    if peek() is not None:
+        raise ValueError(f'Invalid category filter "{expression}"')
+    return compiled
@@ -1,99 +1,313 @@
-import re
-import shutil, os, datetime
 import warnings
 
 import numpy as np
 
-from typing import Iterable, Tuple, Union, Any
+from collections import OrderedDict
+from typing import Iterable, Any, Optional
 
 import pandas as pd
 
-from ..utils import generate_id
-from ..utils.excel_ops import get_excel_df, save_to_excel
+from .category_index import CategoryIndex
+from .scores import reconcile_scores, remove_entry_scores
+from .storage import get_storage
+from ..answer_evaluators.answer_key import AnswerKey, AnswerKeyCache
+from ..utils import fill_missing_ids, parse_ids, to_id_array
+from ..utils.excel_ops import get_excel_df
+
+
+# The default size (in bytes) the loaded sheets can take in memory before the inactive ones are dropped
+DEFAULT_MEMORY_BUDGET = 256 * 2**20
+# The columns of a vocabulary sheet
+DATABASE_COLUMNS = ['ID', 'Word_s', 'Word_p', 'Word_fs', 'Word_fp', 'Category', 'Translation',
+                    'Translation_f', 'Alternative Forward', 'Alternative Backward']
 
 
 class DatabaseHandler:
     """ This class handles loading, saving, and sampling from the database of vocabulary"""
-    def __init__(self, excel_file, sheet_name):
-        # define a private attribute to store the direction
-        # of the training session
-        
-        self.database = {}
-        self.load_all_sheets(excel_file)
-
-        # Set the first dataframe as the active dataframe
-        self.active_sheet = next(iter(self.database))
-        self.active_df = self.database[self.active_sheet]
-        self.used_ids = self.active_df['ID'].values
+    def __init__(self, database_file, sheet_name=None, memory_budget:Optional[int]=DEFAULT_MEMORY_BUDGET,
+                 use_journal:bool=True):
+        """
+        :param database_file: the path to the database, an Excel file or an SQLite database (see get_storage)
+        :param sheet_name: the sheet to activate (the first sheet is used if it's None or not in the database)
+        :param memory_budget: the size (in bytes) the loaded sheets can take before the least recently used,
+         unmodified sheets are unloaded, None to never unload sheets. Only the dataframes count against it: an
+         Excel storage also keeps every sheet in its serialized form (see ExcelStorage), which stays in memory
+         whatever the budget since the unloaded sheets are loaded again from it
+        :param use_journal: if True the edits of an Excel database are appended to a journal next to the file as
+         they happen, the journal is replayed when the database is loaded and written to the file in the background
+        """
+        self.memory_budget = memory_budget
+        # The sheets loaded in memory as dataframes, from the least to the most recently used
+        self.database = OrderedDict()
+        self.storage = get_storage(database_file, use_journal)
+        self.sheet_names = self.storage.get_sheet_names()
+        # The sheets that differ from the storage, only these are written when saving,
+        # and they're never unloaded before being saved
+        self.modified_sheets = set()
+        # The approximate memory taken by the dataframe of each loaded sheet (see memory_budget)
+        self.sheet_memory = {}
+        # Maps every sheet to a dictionary {entry ID: row label}, so an entry can be
+        # found without scanning the whole sheet
+        self.id_index = {}
+        # Maps every sheet to its CategoryIndex, built the first time the sheet is filtered
+        self.category_index = {}
+        # The recorded edits of the sheets that aren't loaded yet {sheet_name: [edit, ...]}
+        self.pending_edits = {}
+        # The modified sheets with changes the storage didn't record (e.g. the IDs assigned on load)
+        self.unjournaled_sheets = set()
+        # The compiled answer keys of the entries of the active sheet, dropped when an entry is edited
+        self.answer_keys = AnswerKeyCache()
+        self.replay_pending_edits()
 
-        # Now try to load the database with the following sheet name
+        self.active_sheet = None
         self.set_active_df(sheet_name)
 
     def set_active_df(self, sheet_name):
-        # FIXME: Handle for when the sheetname isn't in the excel file (maybe just load the first sheet)
-        self.active_df = self.database[sheet_name]
-        self.used_ids = self.active_df['ID'].tolist()
+        if sheet_name not in self.sheet_names:
+            if sheet_name is not None:
+                warnings.warn(f'The sheet "{sheet_name}" isn\'t in the database, using "{self.sheet_names[0]}" instead')
+            sheet_name = self.sheet_names[0]
         self.active_sheet = sheet_name
+        self.active_df = self.get_sheet(sheet_name)
+        self.answer_keys.clear()
+        self.used_ids = self.active_df['ID'].tolist()
+
+    def get_sheet(self, sheet_name) -> pd.DataFrame:
+        """
+        Returns the dataframe of a sheet, loading it if it isn't in memory
+        :param sheet_name: the name of the sheet
+        :returns: the dataframe of the sheet
+        """
+        if sheet_name not in self.database:
+            self.add_sheet(sheet_name, self.storage.read_sheet(sheet_name))
+        self.database.move_to_end(sheet_name)
+        self.unload_unused_sheets()
+        return self.database[sheet_name]
+
+    def unload_sheet(self, sheet_name) -> None:
+        """ Drops a sheet from memory (it's loaded again from the storage when needed)"""
+        assert sheet_name not in self.modified_sheets, 'Modified sheets should be saved before being unloaded'
+        self.database.pop(sheet_name)
+        self.sheet_memory.pop(sheet_name)
+        self.id_index.pop(sheet_name)
+        self.category_index.pop(sheet_name, None)
+
+    def unload_unused_sheets(self) -> None:
+        """ Unloads the least recently used sheets until the loaded sheets fit in the memory budget, the active
+            sheet and the modified sheets are always kept"""
+        if self.memory_budget is None:
+            return
+        used_memory = sum(self.sheet_memory.values())
+        for sheet_name in list(self.database.keys()):
+            if used_memory <= self.memory_budget:
+                break
+            if sheet_name == self.active_sheet or sheet_name in self.modified_sheets:
+                continue
+            used_memory -= self.sheet_memory[sheet_name]
+            self.unload_sheet(sheet_name)
+
+    def get_ids_in_other_sheets(self, sheet_name) -> np.ndarray:
+        """ Returns the IDs used in all the sheets except one (the sheets aren't kept in memory if not loaded)"""
+        ids = [np.zeros(0, dtype=np.int64)]
+        for name in self.sheet_names:
+            if name == sheet_name:
+                continue
+            if name in self.database:
+                ids.append(self.database[name]['ID'].values)
+            else:
+                ids.append(self.storage.read_ids(name))
+        return np.concatenate(ids)
 
     def load_excel_sheet(self, excel_file, sheet_name) -> None:
         """
-        Adds a dataframe loaded from an excel sheet to the database
-        :param df: the dataframe containing the data
+        Adds a dataframe loaded from an excel sheet to the database (it's written to the storage on the next save)
+        :param excel_file: the path to the Excel file
         :param sheet_name: the name of the sheet containing the data
         """
-        df = get_excel_df(excel_file, sheet_name)
+        self.add_sheet(sheet_name, get_excel_df(excel_file, sheet_name))
+        self.modified_sheets.add(sheet_name)
+        self.unjournaled_sheets.add(sheet_name)
+
+    def add_sheet(self, sheet_name, df:pd.DataFrame) -> None:
+        """
+        Adds a dataframe to the database, assigning IDs to the entries that don't have one
+        :param sheet_name: the name of the sheet containing the data
+        :param df: the dataframe containing the data
+        """
         # Take care of the ID column
         if not 'ID' in df.columns:
             df.insert(loc=0, column='ID', value=0)
-        df['ID'].fillna(0, inplace=True)
-        id_digits = 8
-        for idx, word_id in enumerate(df['ID'].values):
-            if word_id=='' or word_id < 10**(id_digits-1):
-                df.loc[df.index==idx, 'ID'] = generate_id(id_digits, df['ID'])
+        # Assign the missing IDs in bulk, making sure they're not used in the other sheets either
+        missing = parse_ids(df['ID'].values, 8)[1]
+        reserved_ids = self.get_ids_in_other_sheets(sheet_name) if missing.any() else []
+        df['ID'] = fill_missing_ids(df['ID'].values, 8, reserved_ids)
+        if missing.any():
+            # The new IDs only exist in memory until the sheet is saved
+            self.modified_sheets.add(sheet_name)
+            self.unjournaled_sheets.add(sheet_name)
+        if sheet_name not in self.sheet_names:
+            self.sheet_names.append(sheet_name)
         self.database[sheet_name] = df
+        self.sheet_memory[sheet_name] = int(df.memory_usage(deep=True).sum())
+        self.id_index[sheet_name] = self.build_id_index(df)
+        self.category_index.pop(sheet_name, None)
+        for edit in self.pending_edits.pop(sheet_name, []):
+            self.apply_edit(edit)
 
-
-    def save_database(self, excel_file:Union[str, os.PathLike]) -> None:
+    def append_entries(self, sheet_name, entries:pd.DataFrame) -> np.ndarray:
         """
-        Save the database to an Excel file
-        :param excel_file: the name of the Excel file
+        Appends entries at the end of a sheet (the sheet is created if it doesn't exist), the IDs are assigned in
+        bulk to the entries that don't have one. Every call copies the sheet, so many entries are better appended
+        in a single call (see VocabularyImporter.import_chunks)
+        :param sheet_name: the name of the sheet
+        :param entries: a dataframe with some of the sheet columns, the other columns are left empty
+        :returns: the IDs of the appended entries
         """
-        self.backup_excel_file(excel_file, True)
-        for sheet_name, df in self.database.items():
-            save_to_excel(df, excel_file, sheet_name)
+        if sheet_name in self.sheet_names:
+            df = self.get_sheet(sheet_name)
+        else:
+            df = pd.DataFrame(columns=DATABASE_COLUMNS)
+        entries = entries.reindex(columns=df.columns, fill_value='')
+        # The IDs shouldn't collide with the ones in this or the other sheets
+        reserved_ids = np.concatenate([to_id_array(df['ID'].values), self.get_ids_in_other_sheets(sheet_name)])
+        ids = fill_missing_ids(entries['ID'].values, 8, reserved_ids)
+        entries['ID'] = ids
+        # Continue the row labels after the last one, so the labels of the existing rows stay valid
+        start = int(df.index.max()) + 1 if len(df) > 0 else 0
+        entries.index = pd.RangeIndex(start, start + len(entries))
+        df = pd.concat([df, entries])
+        df['ID'] = df['ID'].astype(np.int64)
+        if sheet_name not in self.sheet_names:
+            self.sheet_names.append(sheet_name)
+            self.id_index[sheet_name] = {}
+        self.database[sheet_name] = df
+        # Only measure the new entries, measuring the whole sheet on every append would get slow
+        self.sheet_memory[sheet_name] = self.sheet_memory.get(sheet_name, 0) + int(entries.memory_usage(deep=True).sum())
+        self.id_index[sheet_name].update(zip(ids.tolist(), entries.index.tolist()))
+        self.category_index.pop(sheet_name, None)
+        # The storage doesn't record appended entries, so the sheet has to be written
+        self.modified_sheets.add(sheet_name)
+        self.unjournaled_sheets.add(sheet_name)
+        if sheet_name == self.active_sheet:
+            self.set_active_df(sheet_name)
+        return ids
 
     @staticmethod
-    def backup_excel_file(excel_file:Union[str, os.PathLike], add_timestamp:bool=True):
+    def build_id_index(df:pd.DataFrame) -> dict:
+        """
+        Builds the index mapping the entries IDs to their row labels in a dataframe
+        :param df: the dataframe containing the 'ID' column
+        :returns: a dictionary with the form {entry_id: row_label}
+        """
+        return dict(zip(df['ID'].astype(int).tolist(), df.index.tolist()))
+
+    def get_row_label(self, entry_id:int):
         """
-        Backup the database to a backup path
-        :param excel_file: the excel file to backup
-        :param add_timestamp:  (Default value = True)
+        Returns the label of the row holding an entry in the active dataframe
+        :param entry_id: the id of the entry in the database
+        :returns: the row label, usable with active_df.loc and active_df.at
         """
-        # Copy the database to a backup file
-        file_name = os.path.basename(excel_file)
+        return self.id_index[self.active_sheet][int(entry_id)]
 
-        if add_timestamp:
-            # Add a stamp at the start of the file name
-            stamp = str(datetime.datetime.now()).replace(':', '-') + '_'
-            back_up_path = os.path.join('backup', stamp + file_name)
+    def get_category_index(self) -> CategoryIndex:
+        """ Returns the category index of the active sheet, building it if needed"""
+        if self.active_sheet not in self.category_index:
+            # A sheet without categories (e.g. a list of abbreviations) has no category tokens
+            categories = self.active_df['Category'].values if 'Category' in self.active_df.columns \
+                else [''] * len(self.active_df)
+            self.category_index[self.active_sheet] = CategoryIndex(categories)
+        return self.category_index[self.active_sheet]
+
+
+    def save_database(self, background:bool=False) -> None:
+        """
+        Write the modified sheets of the database to its storage (nothing is done if no sheet was modified)
+        :param background: if True the sheets may be written in a separate thread (see Storage.write_sheets)
+        """
+        self.storage.wait()
+        if len(self.modified_sheets) == 0:
+            return
+        # Keep the order of the sheets in the database when writing them
+        dfs = {name:self.database[name] for name in self.sheet_names if name in self.modified_sheets}
+        self.storage.write_sheets(dfs, background)
+        self.modified_sheets.clear()
+        self.unjournaled_sheets.clear()
+        self.unload_unused_sheets()
+
+    def wait_for_compaction(self) -> None:
+        """ Waits until the database is written if it's being written in the background"""
+        self.storage.wait()
+
+    def close(self) -> None:
+        """ Makes sure every edit is persisted before the application exits, the database is only written if
+            some changes weren't recorded by the storage as they happened"""
+        if not self.storage.edits_are_durable or len(self.unjournaled_sheets) > 0:
+            self.save_database()
+        self.storage.wait()
+
+    def replay_pending_edits(self) -> None:
+        """ Applies the edits the storage recorded without writing them (e.g. the journal of the previous
+            sessions), then writes them in the background"""
+        for edit in self.storage.get_pending_edits():
+            if edit['sheet'] not in self.sheet_names:
+                warnings.warn(f'Ignoring a journaled edit of the sheet "{edit["sheet"]}" (not in the database)')
+                continue
+            self.pending_edits.setdefault(edit['sheet'], []).append(edit)
+        # Loading the sheets applies their edits
+        for sheet_name in list(self.pending_edits.keys()):
+            self.get_sheet(sheet_name)
+        self.save_database(background=True)
+
+    def export_database(self, database_file) -> None:
+        """
+        Copies every sheet of the database to another file, e.g. from Excel to SQLite or the other way around
+        :param database_file: the path to the new database (see get_storage), existing sheets are replaced
+        """
+        target = get_storage(database_file, use_journal=False)
+        target.write_sheets({name:self.get_sheet(name) for name in self.sheet_names})
+
+    def edit(self, edit:dict) -> None:
+        """
+        Applies an edit to the database and records it in the storage
+        :param edit: a dictionary describing the edit, one of:
+         - {'op':'set', 'sheet':sheet_name, 'id':entry_id, 'column':column, 'value':new_value}
+         - {'op':'delete', 'sheet':sheet_name, 'id':entry_id}
+        """
+        self.apply_edit(edit)
+        self.storage.record_edit(edit)
+        if self.storage.edits_in_place and edit['sheet'] not in self.unjournaled_sheets:
+            # The stored sheet already has the edit, so the sheet can be unloaded without being written
+            self.modified_sheets.discard(edit['sheet'])
+
+    def apply_edit(self, edit:dict) -> None:
+        """ Applies an edit (see edit) to a loaded sheet, without recording it in the storage"""
+        sheet_name, entry_id = edit['sheet'], int(edit['id'])
+        df = self.database[sheet_name]
+        if entry_id not in self.id_index[sheet_name]:
+            warnings.warn(f'Ignoring an edit of the entry {entry_id} (not in the sheet "{sheet_name}")')
+            return
+        idx = self.id_index[sheet_name][entry_id]
+        # e.g. a new target or an alternative translation changes the accepted answers
+        self.answer_keys.invalidate(entry_id)
+        if edit['op'] == 'set':
+            df.at[idx, edit['column']] = edit['value']
+        elif edit['op'] == 'delete':
+            df.drop(idx, axis=0, inplace=True)
+            # The labels of the remaining rows don't change, so only the deleted entry is unindexed
+            self.id_index[sheet_name].pop(entry_id)
+            # The category bitmaps are positional, so they're rebuilt on the next filter
+            self.category_index.pop(sheet_name, None)
         else:
-            back_up_path = os.path.join('backup', file_name)
-        # Create the backup directory if it doesn't exist
-        if not os.path.exists('backup'):
-            os.mkdir('backup')
-        shutil.copy(excel_file, back_up_path)
-    
-    
+            raise ValueError(f'Unknown edit operation "{edit["op"]}"')
+        self.modified_sheets.add(sheet_name)
+
     def get_matching_indices(self, category:str) -> Iterable[int]:
         """
         Returns the indices of rows matching a specific category
         :param category: string containing the category used for filtering
         :returns: the list of matching indices
         """
-        categories = self.active_df['Category'].unique()
-        categories = [x for x in categories if category in x]
-        indices = self.active_df[self.active_df['Category'].isin(categories)].index
-        return indices
+        return self.active_df.index[self.get_category_index().match(category)]
     
     def add_alternative_translation(self, entry_id:int, translation:str, direction:str):
         """ Add an alternative translation to specific word
@@ -101,24 +315,24 @@ class DatabaseHandler:
             :param translation: the alternative translation to add
             :param direction: the direction of the translation
         """
-        idx = np.where(self.active_df['ID'].values==entry_id)[0][0]
+        idx = self.get_row_label(entry_id)
         assert direction in ['Forward', 'Backward']
         column = f'Alternative {direction}'
         if ';' in translation or ',' in translation:
             warnings.warn(f'{translation} contains an invalid character, ignoring the command')
             return False
         # If there's already an alternative translation separate the new entry with a ';'
-        if self.active_df[column].values[idx] != '':
-            self.active_df.loc[self.active_df.index==idx, column] += ';' + translation
+        value = self.active_df.at[idx, column]
+        if value != '':
+            value += ';' + translation
         else:
-            self.active_df.loc[self.active_df.index==idx, column] = translation
+            value = translation
+        self.edit({'op':'set', 'sheet':self.active_sheet, 'id':int(entry_id), 'column':column, 'value':value})
         return True
     
     def delete_entry(self, entry_id:int):
         """ Delete a specific entry in the database"""
-
-        idx = np.where(self.active_df['ID'].values==entry_id)[0][0]
-        self.active_df.drop(int(idx), axis=0, inplace=True)
+        self.edit({'op':'delete', 'sheet':self.active_sheet, 'id':int(entry_id)})
 
         self.used_ids = self.active_df['ID'].values
         
@@ -128,51 +342,59 @@ class DatabaseHandler:
             :param old_target: the old translation target (to determine which fields to change
             :param new_target: the new translation target (to replace the old one)
         """
-        idx = np.where(self.active_df['ID'].values==entry_id)[0][0]
+        idx = self.get_row_label(entry_id)
         entry = self.active_df.loc[idx].to_dict()
         for key, value in entry.items():
             if value == old_target:
-                self.active_df.loc[self.active_df.index==idx, key] = new_target
+                self.edit({'op':'set', 'sheet':self.active_sheet, 'id':int(entry_id), 'column':key,
+                           'value':new_target})
     
     def apply_filter(self, exercise:str, n_samples:int=0, included_categories:Iterable[str]=[], excluded_categories:Iterable[str]=[]):
         """ Apply a filter to the available questions
             :param exercise: the name of the exercise to use for getting the weights when sampling
             :param n_samples: the number of samples to be set in the final filtering
-            :param included_categories: the categories to be sampled in (white filter)
+            :param included_categories: the categories to be sampled in (white filter), every element
+             could be a filter expression like 'noun | verb' (see CategoryIndex)
             :param excluded_categories: the categories to be sampled out (black filter)
         """
-        df = self.active_df # Just to have a shorter code
-        self.used_ids = df['ID'].values
-
-        matches_category = lambda x, category: category in df.loc[df['ID']==x, 'Category'].values[0]
-        # Exclude the categories in excluded categories
-        for cat in excluded_categories:
-            self.used_ids = [x for x in self.used_ids if not matches_category(x, cat)]
-        # Include only the categories in included_categories
-        for cat in included_categories:
-            self.used_ids = [x for x in self.used_ids if matches_category(x, cat)]
-        # Sample the needed number of words
-        if n_samples > 0:
-            sampled_entries = df.sample(n=n_samples, replace=False)
+        filters = [x for x in list(included_categories) + list(excluded_categories) if str(x).strip() != '']
+        if len(filters) == 0 or 'Category' not in self.active_df.columns:
+            if len(filters) > 0:
+                warnings.warn(f'The sheet "{self.active_sheet}" has no categories, ignoring the category filters')
+            # Without filters every entry is kept, the index isn't needed
+            mask = np.ones(len(self.active_df), dtype=bool)
         else:
-            sampled_entries = df.sample(len(df), replace=False)
-
+            mask = self.get_category_index().select(included_categories, excluded_categories)
+        filtered_ids = self.active_df['ID'].values[mask]
+        # Sample the needed number of words from the filtered entries only
+        if 0 < n_samples < len(filtered_ids):
+            sampled_ids = np.random.choice(filtered_ids, size=n_samples, replace=False)
+        else:
+            sampled_ids = np.random.permutation(filtered_ids)
 
-        self.used_ids = sampled_entries.loc[:, 'ID'].tolist()
+        self.used_ids = sampled_ids.tolist()
 
     def get_scores_summary(self, scores):
         """ Return the score summary for a particular exercise"""
         summary = scores.summarize()
         # Replace the ids by their names
-        ids = self.active_df['ID'].values
         for key in ['max', 'min']:
-            element_id = int(summary[key][0])
-            idx = np.where(ids==element_id)[0][0]
-            summary[key][0] = self.active_df.loc[self.active_df.index==idx, 'Word_s'].values[0]
+            idx = self.get_row_label(summary[key][0])
+            summary[key][0] = self.active_df.at[idx, 'Word_s']
         # Round the average score to two decimal points
         summary['average'] = round(summary['average'], 2)
         return summary
 
+    def reconcile_scores(self, scores_dir:str="resources/scores") -> dict:
+        """ Drops the scores of the deleted entries and adds the new entries to the score files of every exercise
+            on the active sheet (see reconcile_scores)"""
+        return reconcile_scores(self.active_sheet, self.active_df['ID'].values, scores_dir)
+
+    def remove_entry_scores(self, entry_ids, scores_dir:str="resources/scores", skipped_files:Iterable[str]=()) -> dict:
+        """ Drops the scores of deleted entries from the score files of every exercise on the active sheet (see
+            remove_entry_scores)"""
+        return remove_entry_scores(self.active_sheet, entry_ids, scores_dir, skipped_files)
+
     def get_scores_path(self, exercise):
          direction = exercise.split()[-1]
          exercise_type = exercise.split()[0]
@@ -187,14 +409,22 @@ class DatabaseHandler:
         :returns: the sampled row as a dictionary
         """
         draw = np.random.choice(ids, p=weights)
+        return self.get_entry(draw)
 
-        available_ids = self.active_df['ID'].values
-        indices = [np.where(available_ids==draw)[0][0]]
-        entries = [self.active_df.loc[idx].to_dict() for idx in indices]
-        return entries[0]
+    def get_entry(self, entry_id:int) -> dict[str, str | Any]:
+        """
+        Returns an entry of the active sheet
+        :param entry_id: the id of the entry
+        :returns: the row of the entry as a dictionary
+        """
+        return self.active_df.loc[self.get_row_label(entry_id)].to_dict()
 
-    def load_all_sheets(self, excel_file):
-        """ Loads all the data in the sheets of an Excel files into memory"""
-        xlsx = pd.ExcelFile(excel_file)
-        for sheet_name in xlsx.sheet_names:
-            self.load_excel_sheet(excel_file, sheet_name)
+    def get_answer_key(self, entry_id:int, direction:str) -> AnswerKey:
+        """
+        Returns the answers accepted for an entry of the active sheet, compiled once and cached until the entry
+         is edited (see AnswerKey)
+        :param entry_id: the id of the entry
+        :param direction: the direction of the translation, 'Forward' or 'Backward'
+        :returns: the answer key
+        """
+        return self.answer_keys.get(entry_id, direction, self.get_entry)
@@ -0,0 +1,184 @@
+import os
+import re
+import html
+import shutil
+import sqlite3
+import tempfile
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from typing import Dict, Iterable, Iterator, Optional, Union
+
+from .database import DatabaseHandler
+
+
+# The database columns an imported list can fill
+IMPORTED_COLUMNS = ['Word_s', 'Word_p', 'Translation', 'Category']
+# The collections inside an .apkg file, from the newest format to the oldest
+ANKI_COLLECTIONS = ['collection.anki21', 'collection.anki2']
+
+
+class VocabularyImporter:
+    """ Imports large word lists (CSV/TSV files or Anki decks) into a sheet of the database. The lists are read
+        chunk by chunk: every chunk is mapped onto the database columns and cleared of the entries already in the
+        sheet, and only its new entries are kept. Once the list is read, the new entries of all the chunks are
+        cleared of the repeated ones and appended to the sheet at once, with IDs assigned in bulk. So the memory
+        grows with the new entries (which end up in the sheet anyway) rather than with the lines of the list, and
+        the sheet is copied once per import instead of once per chunk.
+        The sheet is written on the next save of the database.
+    """
+    def __init__(self, db_handler:DatabaseHandler, sheet_name:str, category:str='', chunk_size:int=10_000):
+        """
+        :param db_handler: the database to import into
+        :param sheet_name: the sheet receiving the entries (it's created if it doesn't exist)
+        :param category: the category given to the imported entries that don't have one
+        :param chunk_size: the number of lines read at once
+        """
+        self.db_handler = db_handler
+        self.sheet_name = sheet_name
+        self.category = category
+        self.chunk_size = chunk_size
+
+    def import_table(self, path:Union[str, os.PathLike], column_map:Optional[Dict[Union[str, int], str]]=None,
+                     sep:Optional[str]=None, header:bool=True) -> dict:
+        """
+        Imports a CSV or TSV file
+        :param path: the path to the file
+        :param column_map: maps the columns of the file to the database columns ({file_column: database_column}),
+         the file columns are names if the file has a header, positions otherwise. If None, the columns named like
+         a database column are imported (or the first two columns as 'Word_s' and 'Translation' without a header)
+        :param sep: the separator of the columns, guessed from the extension if None ('.tsv' and '.tab' files
+         are tab separated, anything else is comma separated)
+        :param header: whether the first line of the file has the names of the columns
+        :returns: the counts of the 'imported' and 'skipped' entries
+        """
+        if sep is None:
+            sep = '\t' if os.path.splitext(str(path))[1].lower() in ['.tsv', '.tab'] else ','
+        if column_map is None:
+            column_map = {0:'Word_s', 1:'Translation'} if not header else {x:x for x in IMPORTED_COLUMNS}
+        # A header may miss some of the mapped columns, so its names are filtered instead of selected
+        usecols = (lambda x: x in column_map) if header else sorted(column_map)
+        reader = pd.read_csv(path, sep=sep, header=0 if header else None, usecols=usecols, dtype=str,
+                             keep_default_na=False, chunksize=self.chunk_size)
+        with reader:
+            return self.import_chunks(x.rename(columns=column_map) for x in reader)
+
+    def import_anki(self, path:Union[str, os.PathLike], field_map:Optional[Dict[int, str]]=None,
+                    tags_as_category:bool=True) -> dict:
+        """
+        Imports the notes of an Anki deck
+        :param path: the path to an .apkg file, or to the SQLite collection of Anki itself
+        :param field_map: maps the positions of the note fields to the database columns, the front and back
+         of the notes are imported as 'Word_s' and 'Translation' by default
+        :param tags_as_category: whether to use the tags of the notes as their category
+        :returns: the counts of the 'imported' and 'skipped' entries
+        """
+        field_map = field_map or {0:'Word_s', 1:'Translation'}
+        if not zipfile.is_zipfile(path):
+            return self.import_chunks(read_anki_notes(path, field_map, tags_as_category, self.chunk_size))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            collection = extract_anki_collection(path, tmp_dir)
+            return self.import_chunks(read_anki_notes(collection, field_map, tags_as_category, self.chunk_size))
+
+    def import_chunks(self, chunks:Iterable[pd.DataFrame]) -> dict:
+        """
+        Imports entries chunk by chunk
+        :param chunks: dataframes with some of the IMPORTED_COLUMNS
+        :returns: the counts of the 'imported' and 'skipped' entries
+        """
+        counts = {'imported':0, 'skipped':0}
+        if self.sheet_name in self.db_handler.sheet_names:
+            sheet_keys = set(get_entry_keys(self.db_handler.get_sheet(self.sheet_name)))
+        else:
+            sheet_keys = set()
+        # Only the new entries of every chunk are kept, the sheet is copied once when they're appended
+        new_entries = []
+        for chunk in chunks:
+            chunk = self.map_chunk(chunk)
+            keys = get_entry_keys(chunk)
+            # Skip the empty lines and the entries already in the sheet
+            new = (chunk['Word_s'] != '').values
+            new &= np.fromiter((x not in sheet_keys for x in keys), dtype=bool, count=len(keys))
+            counts['skipped'] += int(len(chunk) - new.sum())
+            if new.any():
+                new_entries.append(chunk[new])
+        if len(new_entries) == 0:
+            return counts
+        entries = pd.concat(new_entries, ignore_index=True)
+        new_entries.clear()
+        # The entries seen earlier in the list
+        new = ~get_entry_keys(entries).duplicated().values
+        counts['skipped'] += int(len(entries) - new.sum())
+        self.db_handler.append_entries(self.sheet_name, entries if new.all() else entries[new])
+        counts['imported'] += int(new.sum())
+        return counts
+
+    def map_chunk(self, chunk:pd.DataFrame) -> pd.DataFrame:
+        """ Keeps the imported columns of a chunk (adding the missing ones) with their values cleaned"""
+        chunk = chunk.reindex(columns=IMPORTED_COLUMNS, fill_value='')
+        chunk = chunk.fillna('').astype(str).apply(lambda x: x.str.strip())
+        chunk.loc[chunk['Category'] == '', 'Category'] = self.category
+        return chunk.reset_index(drop=True)
+
+
+def get_entry_keys(df:pd.DataFrame) -> pd.Series:
+    """ Returns the keys used to find duplicated entries (the word and its translation, case insensitive)"""
+    word = df['Word_s'].astype(str).str.strip().str.lower()
+    if 'Translation' not in df.columns:
+        return word
+    return word + '\x1f' + df['Translation'].astype(str).str.strip().str.lower()
+
+
+def extract_anki_collection(path:Union[str, os.PathLike], folder:str) -> str:
+    """
+    Extracts the SQLite collection from an .apkg file (streaming it to the disk)
+    :param path: the path to the .apkg file
+    :param folder: the folder to extract the collection to
+    :returns: the path to the extracted collection
+    """
+    with zipfile.ZipFile(path) as apkg:
+        names = apkg.namelist()
+        for name in ANKI_COLLECTIONS:
+            if name in names:
+                collection = os.path.join(folder, name)
+                with apkg.open(name) as f_in, open(collection, 'wb') as f_out:
+                    shutil.copyfileobj(f_in, f_out)
+                return collection
+    raise ValueError(f'{path} has no Anki collection (the compressed format of the recent Anki versions '
+                     f'isn\'t supported, export the deck with "Support older Anki versions")')
+
+
+def read_anki_notes(collection:str, field_map:Dict[int, str], tags_as_category:bool=True,
+                    chunk_size:int=10_000) -> Iterator[pd.DataFrame]:
+    """
+    Reads the notes of an Anki collection chunk by chunk
+    :param collection: the path to the SQLite collection
+    :param field_map: maps the positions of the note fields to the database columns
+    :param tags_as_category: whether to use the tags of the notes as their category
+    :param chunk_size: the number of notes read at once
+    :returns: a generator of dataframes with the mapped columns
+    """
+    connection = sqlite3.connect(collection)
+    try:
+        cursor = connection.execute('SELECT flds, tags FROM notes ORDER BY id')
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if len(rows) == 0:
+                break
+            # The fields of a note are separated by the unit separator
+            fields = [x[0].split('\x1f') for x in rows]
+            chunk = pd.DataFrame({column:[clean_anki_field(x[pos]) if pos < len(x) else '' for x in fields]
+                                  for pos, column in field_map.items()})
+            if tags_as_category:
+                chunk['Category'] = [', '.join(x[1].split()) for x in rows]
+            yield chunk
+    finally:
+        connection.close()
+
+
+def clean_anki_field(field:str) -> str:
+    """ Removes the HTML formatting of an Anki field"""
+    field = re.sub(r'<br\s*/?>', ' ', field)
+    return html.unescape(re.sub(r'<[^>]+>', '', field)).strip()
@@ -0,0 +1,71 @@
+import json, os
+import warnings
+
+from typing import List
+
+
+def get_journal_path(excel_file:str) -> str:
+    """ Returns the path of the edit journal kept next to an Excel file"""
+    folder, file_name = os.path.split(excel_file)
+    return os.path.join(folder, f'.{file_name}.journal')
+
+
+class EditJournal:
+    """ An append-only log of the edits made to the database since it was last written to Excel.
+        Every record is a json line written and synced to disk as soon as the edit happens, so a crash
+        doesn't lose the session. The records should be idempotent (e.g. the new value of a cell instead
+        of the text appended to it), so replaying a record that already reached the Excel file is harmless.
+        While the database is being written (compacted), the journal is moved aside and new edits go to a
+        fresh journal, the moved journal is deleted once the write succeeds.
+    """
+    def __init__(self, path:str):
+        self.path = path
+        self.compacting_path = path + '.compacting'
+
+    def append(self, record:dict) -> None:
+        """ Appends a record to the journal and makes sure it's on disk"""
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self) -> List[dict]:
+        """ Returns all the records in the journal, from the oldest to the newest (including the records of a
+            compaction that didn't finish)"""
+        records = []
+        for path in [self.compacting_path, self.path]:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                continue
+            for line_nb, line in enumerate(lines):
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Only the last line could be cut by a crash, anything else is a corrupted journal
+                    if line_nb != len(lines) - 1:
+                        warnings.warn(f'Skipping a corrupted record in {path}')
+        return records
+
+    def is_empty(self) -> bool:
+        return not os.path.exists(self.path) and not os.path.exists(self.compacting_path)
+
+    def start_compaction(self) -> None:
+        """ Moves the current records aside, the edits from now on are written to a fresh journal"""
+        if not os.path.exists(self.path):
+            return
+        if not os.path.exists(self.compacting_path):
+            os.replace(self.path, self.compacting_path)
+            return
+        # A previous compaction failed, so its records are still needed
+        with open(self.path, 'r', encoding='utf-8') as f_in, open(self.compacting_path, 'a', encoding='utf-8') as f_out:
+            f_out.write(f_in.read())
+            f_out.flush()
+            os.fsync(f_out.fileno())
+        os.remove(self.path)
+
+    def finish_compaction(self) -> None:
+        """ Drops the records moved aside by start_compaction (they're now in the Excel file)"""
+        if os.path.exists(self.compacting_path):
+            os.remove(self.compacting_path)
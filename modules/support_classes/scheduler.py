@@ -0,0 +1,128 @@
+import os
+import heapq
+
+import numpy as np
+
+from typing import Iterable, Optional, Union
+
+from ..utils import to_id_array
+
+
+# The layout of a schedule file: the Leitner box of every entry, when it's due and when it was last answered
+SCHEDULE_DTYPE = np.dtype([('id', '<i8'), ('box', 'i1'), ('due', '<f8'), ('answered', '<f8')])
+# The time (in seconds) before an entry is asked again, for every box
+BOX_INTERVALS = (0, 5 * 60, 60 * 60, 86400, 3 * 86400, 7 * 86400, 30 * 86400)
+
+
+class LeitnerScheduler:
+    """ A spaced-repetition schedule with Leitner boxes: an entry answered correctly moves to the next box, an
+        entry answered wrongly goes back to the first box, and every box has an interval before the entry is due
+        again (see BOX_INTERVALS). The new entries are in the first box and due right away.
+        The next question is the entry due the soonest, taken from a heap of (due, order, id) in O(log N). Like the
+        heaps of ScoreStatistics, the heap isn't updated in place: a rescheduled entry is pushed again and the
+        outdated items are dropped when they reach the top.
+    """
+    def __init__(self, ids:Iterable[int]=(), boxes:Optional[Iterable[int]]=None, due:Optional[Iterable[float]]=None,
+                 answered:Optional[Iterable[float]]=None):
+        """
+        :param ids: the IDs of the entries
+        :param boxes: the boxes of the entries (the first box if None)
+        :param due: when the entries are due, in seconds since the epoch (right away if None)
+        :param answered: when the entries were last answered (never if None)
+        """
+        ids = to_id_array(ids).tolist()
+        n_ids = len(ids)
+        boxes = [0] * n_ids if boxes is None else np.asarray(boxes).tolist()
+        due = [0.0] * n_ids if due is None else np.asarray(due).tolist()
+        answered = [0.0] * n_ids if answered is None else np.asarray(answered).tolist()
+        # {entry_id: [box, due, answered]}, the entries are few enough for a dictionary
+        self.entries = {x:list(y) for x, y in zip(ids, zip(boxes, due, answered))}
+        # The random generator ordering the entries due at the same time, the global numpy generator if None
+        self.rng = None
+        # The entries the questions are drawn from (see build_queue)
+        self.queued_ids = set()
+        self.heap = []
+
+    @classmethod
+    def load(cls, path:Union[str, os.PathLike]) -> 'LeitnerScheduler':
+        """ Loads a schedule saved with save"""
+        data = np.load(path)
+        return cls(data['id'], data['box'], data['due'], data['answered'])
+
+    def save(self, path:Union[str, os.PathLike]) -> None:
+        """ Saves the schedule as a binary array (written to a temporary file first, so a crash never leaves a
+            half written file)"""
+        data = np.zeros(len(self.entries), dtype=SCHEDULE_DTYPE)
+        data['id'] = list(self.entries.keys())
+        if len(data) > 0:
+            data['box'], data['due'], data['answered'] = zip(*self.entries.values())
+        with open(str(path) + '.tmp', 'wb') as f:
+            np.save(f, data)
+        os.replace(str(path) + '.tmp', path)
+
+    def add_ids(self, ids:Iterable[Union[int, str]]) -> None:
+        """ Adds the entries that aren't in the schedule yet, in the first box"""
+        for entry_id in to_id_array(ids).tolist():
+            if entry_id not in self.entries:
+                self.entries[entry_id] = [0, 0.0, 0.0]
+
+    def keep_ids(self, ids:Iterable[Union[int, str]]) -> None:
+        """ Removes every entry that isn't in ids"""
+        kept = set(to_id_array(ids).tolist())
+        self.entries = {x:y for x, y in self.entries.items() if x in kept}
+        self.queued_ids &= kept
+
+    def remove(self, entry_id:Union[int, str]) -> None:
+        """ Removes an entry from the schedule (its items in the heap are dropped when they reach the top)"""
+        self.entries.pop(int(entry_id), None)
+        self.queued_ids.discard(int(entry_id))
+
+    def answer(self, entry_id:Union[int, str], correct:bool, answer_time:float) -> None:
+        """
+        Moves an entry to its next box after an answer and schedules it again, an answer not newer than the last
+         answer of the entry is skipped (so replaying the answer log is harmless)
+        :param entry_id: the id of the answered entry
+        :param correct: whether the answer was correct
+        :param answer_time: the time of the answer (seconds since the epoch)
+        """
+        entry_id = int(entry_id)
+        entry = self.entries.setdefault(entry_id, [0, 0.0, 0.0])
+        if answer_time <= entry[2]:
+            return
+        box = min(entry[0] + 1, len(BOX_INTERVALS) - 1) if correct else 0
+        entry[:] = [box, answer_time + BOX_INTERVALS[box], answer_time]
+        if entry_id in self.queued_ids:
+            self.push(entry_id)
+            if len(self.heap) > 2 * len(self.queued_ids) + 64:
+                # Too many outdated items, rebuilding is cheaper than keeping them
+                self.build_queue(self.queued_ids)
+
+    def build_queue(self, sample_ids:Iterable[Union[int, str]]) -> None:
+        """ Builds the heap of the entries the questions are drawn from, the entries due at the same time are
+            asked in a random order"""
+        sample_ids = to_id_array(sample_ids)
+        self.add_ids(sample_ids)
+        self.queued_ids = set(sample_ids.tolist())
+        order = (np.random if self.rng is None else self.rng).permutation(len(sample_ids)).tolist()
+        self.heap = [(self.entries[x][1], y, x) for x, y in zip(sample_ids.tolist(), order)]
+        heapq.heapify(self.heap)
+
+    def push(self, entry_id:int) -> None:
+        order = (np.random if self.rng is None else self.rng).random() * len(self.queued_ids)
+        heapq.heappush(self.heap, (self.entries[entry_id][1], order, entry_id))
+
+    def next_due(self) -> int:
+        """ Returns the id of the entry due the soonest (it stays in the heap until it's answered)"""
+        while self.heap:
+            due, _, entry_id = self.heap[0]
+            entry = self.entries.get(entry_id)
+            if entry_id in self.queued_ids and entry is not None and entry[1] == due:
+                return entry_id
+            heapq.heappop(self.heap)
+        raise IndexError('There is no entry to draw')
+
+    def __contains__(self, entry_id) -> bool:
+        return int(entry_id) in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
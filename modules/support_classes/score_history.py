@@ -0,0 +1,189 @@
+import os
+
+import numpy as np
+
+from typing import Dict, Tuple, Union
+
+from .answer_log import ANSWER_DTYPE
+
+
+# The rollup of the answers given to an entry during a period: how many, how many were correct and the score after
+# the last one
+ROLLUP_DTYPE = np.dtype([('id', '<i8'), ('period', '<i4'), ('answers', '<i4'), ('correct', '<i4'), ('score', '<i4')])
+# The length of the rollup periods in days
+PERIOD_DAYS = {'daily':1, 'weekly':7}
+# The epoch was a Thursday, the weeks are shifted to start on Monday
+WEEK_SHIFT_DAYS = 3
+
+
+class ScoreHistory:
+    """ The history of the score transitions of an exercise, kept for plotting learning curves.
+        The raw answers (see ANSWER_DTYPE) are stored column by column, every column in its own binary file that is
+        only appended to. On every append, the answers are also rolled up by entry and by day and week (see
+        ROLLUP_DTYPE), the rollups are sorted by entry then period and the curves are computed from them only, so
+        a query never reads the raw history.
+        Note: the periods are in UTC.
+    """
+    def __init__(self, folder:Union[str, os.PathLike]):
+        """
+        :param folder: the folder of the history (created on the first append)
+        """
+        self.folder = folder
+
+    def get_column_path(self, column:str) -> str:
+        return os.path.join(self.folder, f'{column}.bin')
+
+    def get_rollup_path(self, period:str) -> str:
+        return os.path.join(self.folder, f'{period}.npy')
+
+    def read_column(self, column:str) -> np.ndarray:
+        try:
+            return np.fromfile(self.get_column_path(column), dtype=ANSWER_DTYPE[column])
+        except FileNotFoundError:
+            return np.zeros(0, dtype=ANSWER_DTYPE[column])
+
+    def read(self) -> np.ndarray:
+        """ Returns the raw history (see ANSWER_DTYPE), it's only needed to rebuild the rollups"""
+        columns = {x:self.read_column(x) for x in ANSWER_DTYPE.names}
+        # A crash while appending could leave some columns longer than the others
+        n_records = min(len(x) for x in columns.values())
+        records = np.zeros(n_records, dtype=ANSWER_DTYPE)
+        for name, values in columns.items():
+            records[name] = values[:n_records]
+        return records
+
+    def __len__(self) -> int:
+        return min(self.get_column_length(x) for x in ANSWER_DTYPE.names)
+
+    def get_column_length(self, column:str) -> int:
+        try:
+            return os.path.getsize(self.get_column_path(column)) // ANSWER_DTYPE[column].itemsize
+        except FileNotFoundError:
+            return 0
+
+    def get_last_time(self) -> float:
+        """ Returns the time of the last answer in the history (0 if it's empty)"""
+        n_records = len(self)
+        if n_records == 0:
+            return 0
+        itemsize = ANSWER_DTYPE['time'].itemsize
+        with open(self.get_column_path('time'), 'rb') as f:
+            f.seek((n_records - 1) * itemsize)
+            return float(np.frombuffer(f.read(itemsize), dtype=ANSWER_DTYPE['time'])[0])
+
+    def append(self, records:np.ndarray) -> None:
+        """
+        Appends answers to the history and updates the rollups, the answers already in the history (not newer
+        than its last answer) are skipped, so appending the same answers twice is harmless
+        :param records: the answers, from the oldest to the newest (see AnswerLog.read)
+        """
+        records = records[records['time'] > self.get_last_time()]
+        if len(records) == 0:
+            return
+        os.makedirs(self.folder, exist_ok=True)
+        n_records = len(self)
+        for name in ANSWER_DTYPE.names:
+            with open(self.get_column_path(name), 'ab') as f:
+                # Drop what a crash left after the last complete record
+                f.truncate(n_records * ANSWER_DTYPE[name].itemsize)
+                f.write(np.ascontiguousarray(records[name]).tobytes())
+        for period in PERIOD_DAYS:
+            rollup = self.get_rollup(period)
+            if rollup['answers'].sum() != n_records:
+                # The rollup missed some answers (e.g. a crash before it was written), rebuild it
+                rollup = roll_up(self.read(), period)
+            else:
+                rollup = merge_rollups(np.concatenate([rollup, roll_up(records, period)]))
+            save_array(self.get_rollup_path(period), rollup)
+
+    def get_rollup(self, period:str='daily') -> np.ndarray:
+        """ Returns the rollup of a period (see ROLLUP_DTYPE), sorted by entry then period"""
+        try:
+            return np.load(self.get_rollup_path(period))
+        except FileNotFoundError:
+            return np.zeros(0, dtype=ROLLUP_DTYPE)
+
+    def get_entry_curve(self, entry_id:int, period:str='daily') -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the score of an entry at the end of every period it was answered in
+        :param entry_id: the id of the entry
+        :param period: 'daily' or 'weekly'
+        :returns: the start of the periods (as datetime64) and the scores
+        """
+        rollup = self.get_rollup(period)
+        # The rollup is sorted by entry, so the rows of the entry are found with a binary search
+        start, end = np.searchsorted(rollup['id'], [entry_id, entry_id + 1])
+        rows = rollup[start:end]
+        return get_period_starts(rows['period'], period), rows['score']
+
+    def get_exercise_curve(self, period:str='daily') -> Dict[str, np.ndarray]:
+        """
+        Returns the progress of the whole exercise over the periods with answers
+        :param period: 'daily' or 'weekly'
+        :returns: a dictionary with the 'start' of every period (as datetime64), the number of 'answers', the
+         'accuracy' of the answers and the 'average score' of the entries answered in the period
+        """
+        rollup = self.get_rollup(period)
+        if len(rollup) == 0:
+            return {'start':np.zeros(0, dtype='datetime64[D]'), 'answers':np.zeros(0), 'accuracy':np.zeros(0),
+                    'average score':np.zeros(0)}
+        first = rollup['period'].min()
+        periods = rollup['period'] - first
+        answers = np.bincount(periods, weights=rollup['answers'])
+        correct = np.bincount(periods, weights=rollup['correct'])
+        n_entries = np.bincount(periods)
+        scores = np.bincount(periods, weights=rollup['score'])
+        used = n_entries > 0
+        return {
+            'start':get_period_starts(np.flatnonzero(used) + first, period),
+            'answers':answers[used].astype(np.int64),
+            'accuracy':correct[used] / answers[used],
+            'average score':scores[used] / n_entries[used],
+        }
+
+
+def get_periods(times:np.ndarray, period:str) -> np.ndarray:
+    """ Returns the index of the period (since the epoch) every time (in seconds since the epoch) falls in"""
+    days = np.floor_divide(times, 86400).astype(np.int64)
+    if period == 'weekly':
+        return (days + WEEK_SHIFT_DAYS) // PERIOD_DAYS['weekly']
+    return days
+
+def get_period_starts(periods:np.ndarray, period:str) -> np.ndarray:
+    """ Returns the first day of periods (see get_periods) as datetime64"""
+    days = np.asarray(periods, dtype=np.int64) * PERIOD_DAYS[period]
+    if period == 'weekly':
+        days -= WEEK_SHIFT_DAYS
+    return days.astype('datetime64[D]')
+
+def roll_up(records:np.ndarray, period:str) -> np.ndarray:
+    """ Rolls up answers (see ANSWER_DTYPE, from the oldest to the newest) by entry and period"""
+    rows = np.zeros(len(records), dtype=ROLLUP_DTYPE)
+    rows['id'] = records['id']
+    rows['period'] = get_periods(records['time'], period)
+    rows['answers'] = 1
+    rows['correct'] = records['correct']
+    rows['score'] = records['score']
+    return merge_rollups(rows)
+
+def merge_rollups(rows:np.ndarray) -> np.ndarray:
+    """ Merges the rollup rows of the same entry and period, the rows should be in chronological order (the score
+        of the last row of a group is kept)"""
+    if len(rows) == 0:
+        return rows
+    # Sort by entry then period, the stable sort keeps the chronological order inside a group
+    rows = rows[np.lexsort((rows['period'], rows['id']))]
+    new_group = np.ones(len(rows), dtype=bool)
+    new_group[1:] = (rows['id'][1:] != rows['id'][:-1]) | (rows['period'][1:] != rows['period'][:-1])
+    starts = np.flatnonzero(new_group)
+    ends = np.append(starts[1:], len(rows)) - 1
+    merged = rows[ends]
+    merged['answers'] = np.add.reduceat(rows['answers'], starts)
+    merged['correct'] = np.add.reduceat(rows['correct'], starts)
+    return merged
+
+def save_array(path:str, array:np.ndarray) -> None:
+    """ Saves an array, writing to a temporary file first so a crash never leaves a half written file"""
+    with open(path + '.tmp', 'wb') as f:
+        np.save(f, array)
+    os.replace(path + '.tmp', path)
@@ -0,0 +1,251 @@
+import os
+import heapq
+
+import numpy as np
+
+from collections import Counter
+from collections.abc import MutableMapping
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+from ..utils import to_id_array
+
+
+# The layout of a score file: one record per entry
+SCORE_DTYPE = np.dtype([('id', '<i8'), ('score', '<i4')])
+
+
+class ScoreStore(MutableMapping):
+    """ The scores of the entries kept in a dense integer array, with a map from the entry IDs to their slot in
+        the array. The scores of many entries are read with a vectorized lookup (see get_slots) instead of a loop,
+        and the store is saved as a binary array that is read back in one block.
+        The store can be used as a dictionary {entry_id: score}, its keys are strings like in the old json files
+        but integer IDs are accepted as well.
+    """
+    def __init__(self, ids:Iterable[int]=(), scores:Optional[Iterable[int]]=None):
+        """
+        :param ids: the IDs of the entries
+        :param scores: the scores of the entries (0 for every entry if None)
+        """
+        ids = to_id_array(ids)
+        self.ids = ids.copy()
+        self.values = np.zeros(len(ids), dtype=np.int32) if scores is None else np.array(scores, dtype=np.int32)
+        # The number of used slots, the arrays have some spare capacity for the added entries
+        self.size = len(ids)
+        self.slots = dict(zip(ids.tolist(), range(len(ids))))
+        assert len(self.slots) == len(ids), 'The IDs of a score store should be unique'
+        # The slots sorted by ID, used for the vectorized lookups (rebuilt after the IDs change)
+        self.sorted_slots = None
+        self.stats = ScoreStatistics(self)
+
+    @classmethod
+    def from_dict(cls, scores:dict) -> 'ScoreStore':
+        """ Builds a store from a dictionary {entry_id: score}, e.g. loaded from an old json file"""
+        return cls(list(scores.keys()), list(scores.values()))
+
+    @classmethod
+    def load(cls, path:Union[str, os.PathLike]) -> 'ScoreStore':
+        """ Loads a store saved with save, the records are read in one block without parsing"""
+        data = np.load(path)
+        return cls(data['id'], data['score'])
+
+    def save(self, path:Union[str, os.PathLike]) -> None:
+        """ Saves the store as a binary array (written to a temporary file first, so a crash never leaves a
+            half written file)"""
+        data = np.empty(self.size, dtype=SCORE_DTYPE)
+        data['id'] = self.ids[:self.size]
+        data['score'] = self.values[:self.size]
+        with open(str(path) + '.tmp', 'wb') as f:
+            np.save(f, data)
+        os.replace(str(path) + '.tmp', path)
+
+    def get_slots(self, ids:Iterable[Union[int, str]]) -> np.ndarray:
+        """
+        Returns the slots of several entries in one vectorized lookup
+        :param ids: the IDs of the entries
+        :returns: an array with the slot of every entry (the scores are self.values[slots])
+        """
+        ids = to_id_array(ids)
+        if len(ids) == 0:
+            return np.empty(0, dtype=np.intp)
+        if self.sorted_slots is None:
+            self.sorted_slots = np.argsort(self.ids[:self.size], kind='stable')
+        sorted_ids = self.ids[self.sorted_slots]
+        positions = np.searchsorted(sorted_ids, ids).clip(0, max(self.size - 1, 0))
+        if self.size == 0 or not np.array_equal(sorted_ids[positions], ids):
+            missing = ids if self.size == 0 else ids[sorted_ids[positions] != ids]
+            raise KeyError(f'No score for the entries {missing[:5].tolist()}')
+        return self.sorted_slots[positions]
+
+    def get_scores(self, ids:Optional[Iterable[Union[int, str]]]=None) -> np.ndarray:
+        """ Returns the scores of some entries (all the entries, in the order of the slots, if ids is None)"""
+        if ids is None:
+            return self.values[:self.size]
+        return self.values[self.get_slots(ids)]
+
+    def set_scores(self, ids:Iterable[Union[int, str]], scores:Iterable[int]) -> None:
+        """ Sets the scores of several entries (the entries that aren't in the store are added)"""
+        ids = to_id_array(ids)
+        self.add_ids(ids)
+        slots = self.get_slots(ids)
+        self.stats.remove_scores(self.values[slots])
+        self.values[slots] = scores
+        self.stats.add_scores(self.values[slots])
+
+    def add_ids(self, ids:Iterable[Union[int, str]]) -> None:
+        """ Adds the entries that aren't in the store yet, with a score of 0"""
+        ids = np.unique(to_id_array(ids))
+        ids = ids[~np.isin(ids, self.ids[:self.size])]
+        if len(ids) == 0:
+            return
+        self.reserve(self.size + len(ids))
+        self.ids[self.size:self.size + len(ids)] = ids
+        self.values[self.size:self.size + len(ids)] = 0
+        self.slots.update(zip(ids.tolist(), range(self.size, self.size + len(ids))))
+        self.size += len(ids)
+        self.sorted_slots = None
+        self.stats.add_scores(self.values[self.size - len(ids):self.size])
+
+    def keep_ids(self, ids:Iterable[Union[int, str]]) -> None:
+        """ Removes every entry that isn't in ids"""
+        kept = np.isin(self.ids[:self.size], to_id_array(ids))
+        if kept.all():
+            return
+        self.stats.remove_scores(self.values[:self.size][~kept])
+        self.ids = self.ids[:self.size][kept]
+        self.values = self.values[:self.size][kept]
+        self.size = len(self.ids)
+        self.slots = dict(zip(self.ids.tolist(), range(self.size)))
+        self.sorted_slots = None
+
+    def reserve(self, capacity:int) -> None:
+        """ Grows the arrays (doubling them) so they can hold capacity entries"""
+        if capacity <= len(self.ids):
+            return
+        capacity = max(capacity, 2 * len(self.ids))
+        self.ids = np.concatenate([self.ids, np.zeros(capacity - len(self.ids), dtype=np.int64)])
+        self.values = np.concatenate([self.values, np.zeros(capacity - len(self.values), dtype=np.int32)])
+
+    def __getitem__(self, entry_id:Union[int, str]) -> int:
+        return int(self.values[self.slots[int(entry_id)]])
+
+    def __setitem__(self, entry_id:Union[int, str], score:int) -> None:
+        entry_id = int(entry_id)
+        if entry_id not in self.slots:
+            self.add_ids([entry_id])
+        slot = self.slots[entry_id]
+        self.stats.change_score(entry_id, int(self.values[slot]), score)
+        self.values[slot] = score
+
+    def __delitem__(self, entry_id:Union[int, str]) -> None:
+        # Move the last entry to the freed slot, so the slots stay dense
+        slot = self.slots.pop(int(entry_id))
+        self.stats.remove_scores(self.values[slot:slot + 1])
+        last = self.size - 1
+        if slot != last:
+            self.ids[slot], self.values[slot] = self.ids[last], self.values[last]
+            self.slots[int(self.ids[slot])] = slot
+        self.size -= 1
+        self.sorted_slots = None
+
+    def __contains__(self, entry_id) -> bool:
+        try:
+            return int(entry_id) in self.slots
+        except (TypeError, ValueError):
+            return False
+
+    def __iter__(self) -> Iterator[str]:
+        return (str(x) for x in self.ids[:self.size].tolist())
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class ScoreStatistics:
+    """ Aggregates of the scores in a ScoreStore, kept up to date as the scores change so a summary doesn't
+        scan the scores: the sum and the count for the average, the number of entries with every score, and two
+        heaps for the best and worst entries.
+        The heaps aren't updated in place, a changed score is pushed again and the outdated items are dropped
+        when they reach the top (the heaps are rebuilt after bulk changes or when they hold too many outdated items).
+    """
+    def __init__(self, store:ScoreStore):
+        self.store = store
+        self.total = 0
+        self.count = 0
+        self.histogram = Counter()
+        # Heaps of (-score, id) and (score, id), None when they need to be rebuilt
+        self.best_heap = None
+        self.worst_heap = None
+        self.add_scores(store.get_scores())
+
+    def add_scores(self, scores:np.ndarray) -> None:
+        """ Counts new scores (the heaps are rebuilt on the next query)"""
+        self.update_aggregates(scores, 1)
+        self.best_heap = self.worst_heap = None
+
+    def remove_scores(self, scores:np.ndarray) -> None:
+        """ Stops counting removed scores (the heaps drop them when they reach the top)"""
+        self.update_aggregates(scores, -1)
+
+    def update_aggregates(self, scores:np.ndarray, sign:int) -> None:
+        if len(scores) == 0:
+            return
+        self.total += sign * int(scores.sum(dtype=np.int64))
+        self.count += sign * len(scores)
+        values, counts = np.unique(scores, return_counts=True)
+        self.histogram.update({x:sign * y for x, y in zip(values.tolist(), counts.tolist())})
+        # Don't keep the scores no entry has anymore
+        for value in values.tolist():
+            if self.histogram[value] == 0:
+                del self.histogram[value]
+
+    def change_score(self, entry_id:int, old_score:int, new_score:int) -> None:
+        """ Updates the aggregates after the score of an entry changed, in O(log N)"""
+        self.total += new_score - old_score
+        self.histogram[old_score] -= 1
+        if self.histogram[old_score] == 0:
+            del self.histogram[old_score]
+        self.histogram[new_score] += 1
+        if self.best_heap is not None:
+            heapq.heappush(self.best_heap, (-new_score, entry_id))
+            heapq.heappush(self.worst_heap, (new_score, entry_id))
+            if len(self.best_heap) > 2 * self.count + 64:
+                # Too many outdated items, rebuilding is cheaper than keeping them
+                self.best_heap = self.worst_heap = None
+
+    def average(self) -> float:
+        return self.total / self.count
+
+    def best(self) -> Tuple[int, int]:
+        """ Returns the id and the score of the entry with the highest score"""
+        entry_id, score = self.get_top(self.get_heaps()[0])
+        return entry_id, -score
+
+    def worst(self) -> Tuple[int, int]:
+        """ Returns the id and the score of the entry with the lowest score"""
+        return self.get_top(self.get_heaps()[1])
+
+    def distribution(self) -> Counter:
+        """ Returns the number of entries with every score"""
+        return Counter(self.histogram)
+
+    def get_heaps(self) -> Tuple[list, list]:
+        if self.count == 0:
+            raise ValueError('The store has no scores')
+        if self.best_heap is None:
+            scores = self.store.get_scores().tolist()
+            ids = self.store.ids[:self.store.size].tolist()
+            self.best_heap = [(-x, y) for x, y in zip(scores, ids)]
+            self.worst_heap = [(x, y) for x, y in zip(scores, ids)]
+            heapq.heapify(self.best_heap)
+            heapq.heapify(self.worst_heap)
+        return self.best_heap, self.worst_heap
+
+    def get_top(self, heap:list) -> Tuple[int, int]:
+        """ Drops the outdated items at the top of a heap, then returns the (id, heap score) at the top"""
+        sign = -1 if heap is self.best_heap else 1
+        while True:
+            score, entry_id = heap[0]
+            slot = self.store.slots.get(entry_id)
+            if slot is not None and self.store.values[slot] == sign * score:
+                return entry_id, score
+            heapq.heappop(heap)
@@ -1,70 +1,229 @@
-import json, os
-from typing import Iterable, Union, List
+import json, os, time
+from typing import Dict, Iterable, Union, List, Tuple
 import numpy as np
 
 from collections import Counter
-from ..utils import normalize_weights
+from .answer_log import AnswerLog
+from .scheduler import LeitnerScheduler
+from .score_history import ScoreHistory
+from .score_store import ScoreStore
+from .weighted_sampler import WeightedSampler
+from ..utils import get_raw_weights, normalize_weights, to_id_array
+
+
+# The size (in bytes) of the answer log above which it's compacted into the scores snapshot
+DEFAULT_MAX_LOG_SIZE = 2**20
+# The number of days with answers above which the learning curve is shown by week
+MAX_DAILY_PERIODS = 60
 
 
 class ScoresHandler:
-    def __init__(self, scores_file, loaded_ids, scores_dir="resources/scores"):
+    """ Keeps the scores of an exercise: a snapshot of the scores in a binary file, plus a log with the answers
+        given since the snapshot (see AnswerLog). Every answer is appended to the log as it's scored, the scores are
+        rebuilt by replaying the log over the snapshot, and the log is compacted into a new snapshot when saving or
+        once it's larger than max_log_size.
+    """
+    def __init__(self, scores_file, loaded_ids, scores_dir="resources/scores", max_log_size:int=DEFAULT_MAX_LOG_SIZE,
+                 sync_log:bool=True):
         if not os.path.exists(scores_dir):
             os.mkdir(scores_dir)
 
         super().__init__()
 
         self.scores_path = os.path.join(scores_dir, scores_file)
+        self.max_log_size = max_log_size
+        # Whether the answers are synced to disk as they're logged (see AnswerLog)
+        self.sync_log = sync_log
         self.scores = self.load(loaded_ids)
+        # The sampler of the questions, its weights follow the scores (see build_sampler)
+        self.sampler = None
+        # The spaced-repetition schedule, only used when the questions are scheduled (see load_schedule)
+        self.scheduler = None
+
+    @property
+    def scores(self) -> ScoreStore:
+        """ The scores of the entries, usable as a dictionary {entry_id: score}"""
+        return self._scores
+
+    @scores.setter
+    def scores(self, scores:Union[ScoreStore, dict]):
+        self._scores = scores if isinstance(scores, ScoreStore) else ScoreStore.from_dict(scores)
+
+    @property
+    def store_path(self) -> str:
+        """ The path of the binary score file, next to the (old) json file of the scores"""
+        return os.path.splitext(self.scores_path)[0] + '.npy'
 
-    def load(self, loaded_ids:Iterable[str]) -> dict:
-        """Load the scores for a particular task
+    @property
+    def answer_log(self) -> AnswerLog:
+        """ The log of the answers given since the scores snapshot was saved"""
+        return AnswerLog(os.path.splitext(self.scores_path)[0] + '.log', self.sync_log)
+
+    @property
+    def schedule_path(self) -> str:
+        """ The path of the binary file of the spaced-repetition schedule, next to the score files"""
+        return os.path.splitext(self.scores_path)[0] + '.sched'
+
+    @property
+    def history(self) -> ScoreHistory:
+        """ The history of the answers of the exercise, kept for the learning curves"""
+        return ScoreHistory(os.path.splitext(self.scores_path)[0] + '.history')
+
+    def load(self, loaded_ids:Iterable[str]) -> ScoreStore:
+        """Load the scores for a particular task, the scores saved as json by the previous versions
+         are migrated (they're saved in the binary format the next time)
         :param loaded_ids: the ids loaded from the database, used to drop or add entries to
          the loaded scores
-        :returns: a dictionary containing the path to the scores and their values
-         e.g. {'path':'path/to/scores', 'scores':{'123432':1, '126432':-3, '123532':2, '123332':5}}
+        :returns: the scores, usable as a dictionary
+         e.g. {'123432':1, '126432':-3, '123532':2, '123332':5}
         """
-        try:
-            scores = json.load(open(self.scores_path, 'r'))
-        except FileNotFoundError:
-            scores = {}
+        if os.path.exists(self.store_path):
+            scores = ScoreStore.load(self.store_path)
+        else:
+            try:
+                scores = ScoreStore.from_dict(json.load(open(self.scores_path, 'r')))
+            except FileNotFoundError:
+                scores = ScoreStore()
+
+        # Replay the answers given since the snapshot, only the last score of every entry matters
+        records = self.answer_log.read()
+        if len(records) > 0:
+            ids, last = np.unique(records['id'][::-1], return_index=True)
+            scores.set_scores(ids, records['score'][::-1][last])
 
         # Fill in for the new IDs that still have no entry in the score
-        for sample_id in loaded_ids:
-            if not str(sample_id) in scores.keys():
-                scores[str(sample_id)] = 0
+        scores.add_ids(loaded_ids)
         return scores
 
+    def load_schedule(self, loaded_ids:Iterable[Union[int, str]]) -> LeitnerScheduler:
+        """
+        Loads the spaced-repetition schedule of the exercise (see LeitnerScheduler), it's then kept up to date
+         by update and saved with the scores
+        :param loaded_ids: the ids loaded from the database, the new ones are added to the schedule
+        :returns: the schedule
+        """
+        try:
+            scheduler = LeitnerScheduler.load(self.schedule_path)
+        except FileNotFoundError:
+            scheduler = LeitnerScheduler()
+        # Replay the answers given since the schedule was saved (the answers it already has are skipped)
+        for record in self.answer_log.read().tolist():
+            scheduler.answer(record[1], record[2], record[0])
+        scheduler.add_ids(loaded_ids)
+        self.scheduler = scheduler
+        return scheduler
+
     def save(self) -> None:
-        """ Saves the updated file back to the file they were loaded from"""
-        with open(self.scores_path, 'w') as file_out:
-            json.dump(self.scores, file_out)
+        """ Saves the updated scores in the binary file next to the file they were loaded from, the answer
+            log is then moved to the history (it's all in the saved scores)"""
+        self.history.append(self.answer_log.read())
+        self.scores.save(self.store_path)
+        if self.scheduler is not None:
+            self.scheduler.save(self.schedule_path)
+        self.answer_log.clear()
+
+    def get_learning_curve(self, period:str=None) -> Dict[str, np.ndarray]:
+        """
+        Returns the progress in the exercise over time (see ScoreHistory.get_exercise_curve), including the
+        answers of the current session
+        :param period: 'daily' or 'weekly', if None the weekly curve is used when the daily one is too long
+        :returns: a dictionary with the 'start' of every period, the number of 'answers', the 'accuracy' of
+         the answers and the 'average score' of the entries answered in the period
+        """
+        history = self.history
+        history.append(self.answer_log.read())
+        if period is not None:
+            return history.get_exercise_curve(period)
+        curve = history.get_exercise_curve('daily')
+        if len(curve['start']) > MAX_DAILY_PERIODS:
+            curve = history.get_exercise_curve('weekly')
+        return curve
 
     def update(self, sample_id:Union[str, int], scored_a_point:bool):
         """ Update the score for a given id based on how the user answered"""
-        sample_id = str(sample_id) # Make sure that id is a string
+        score = self.scores[sample_id]
         if scored_a_point:
-            self.scores[sample_id] += 1
-            # set the row to zero if it's still negative
-            self.scores[sample_id] = max(0, self.scores[sample_id])
+            # set the score to zero if it's still negative
+            score = max(0, score + 1)
         else:
-            self.scores[sample_id] -= 1
+            score -= 1
+        self.scores[sample_id] = score
+        if self.sampler is not None and sample_id in self.sampler:
+            self.sampler.update(sample_id, float(get_raw_weights(score)))
+        answer_time = time.time()
+        if self.scheduler is not None:
+            self.scheduler.answer(sample_id, scored_a_point, answer_time)
+        answer_log = self.answer_log
+        answer_log.append(int(sample_id), scored_a_point, score, answer_time)
+        if answer_log.size() > self.max_log_size:
+            self.save()
 
-    def get_weights(self, sample_ids:List[Union[int, str]]=None):
+    def apply_score_deltas(self, entry_ids:Iterable[Union[int, str]], deltas:Iterable[int]) -> None:
+        """
+        Changes the scores of several entries at once, e.g. after regrading past answers (see regrade_answers),
+         the scores are then saved so replaying the answer log doesn't override them
+        :param entry_ids: the ids of the entries, without duplicates
+        :param deltas: the change of the score of every entry
+        """
+        entry_ids = to_id_array(entry_ids)
+        scores = self.scores.get_scores(entry_ids) + np.asarray(deltas, dtype=np.int64)
+        self.scores.set_scores(entry_ids, scores)
+        if self.sampler is not None:
+            sampled = np.array([x in self.sampler for x in entry_ids.tolist()], dtype=bool)
+            if sampled.any():
+                self.sampler.update_many(entry_ids[sampled], get_raw_weights(scores[sampled]))
+        self.save()
+
+    def get_weights(self, sample_ids:Iterable[Union[int, str]]=None):
         """ Returns a list of weights for given ids
-            :param sample_ids: the list of ids included in the sampling process, if empty
-             the scores are not filtered
+            :param sample_ids: the ids included in the sampling process (a list or an array), if None
+             the weights of all the scores are returned
             :returns: a list of numbers between 0 and 1 corresponding to the weights
              of the input ids"""
-        if isinstance(sample_ids, list):
-            scores = [self.scores[str(x)] for x in sample_ids]
-        else:
-            scores = self.scores.values()
-        return normalize_weights(list(scores))
+        return normalize_weights(self.scores.get_scores(sample_ids))
+
+    def build_sampler(self, sample_ids:Iterable[Union[int, str]]) -> WeightedSampler:
+        """
+        Builds a sampler drawing the ids with the weights of get_weights, it's then kept up to date as the
+         scores are updated, so drawing a question doesn't need the weights of all the ids
+        :param sample_ids: the ids included in the sampling process
+        :returns: the sampler
+        """
+        sample_ids = to_id_array(sample_ids)
+        self.sampler = WeightedSampler(sample_ids, get_raw_weights(self.scores.get_scores(sample_ids)))
+        return self.sampler
 
     def remove_id(self, sample_id:Union[str, int]):
         """ Delete all the scores for a given id"""
-        self.scores.pop(str(sample_id))
+        del self.scores[sample_id]
+        if self.sampler is not None and sample_id in self.sampler:
+            self.sampler.remove(sample_id)
+        if self.scheduler is not None:
+            self.scheduler.remove(sample_id)
 
+    def remove_ids(self, entry_ids:Iterable[Union[int, str]]) -> int:
+        """
+        Drops deleted entries from the scores and writes only that change: the snapshot and the schedule are saved
+        without the entries and their answers are dropped from the log, the other answers stay in the log (unlike
+        save, nothing is moved to the history)
+        :param entry_ids: the ids of the deleted entries
+        :returns: the number of removed scores
+        """
+        removed = [x for x in to_id_array(entry_ids).tolist() if x in self.scores]
+        if len(removed) == 0:
+            return 0
+        for entry_id in removed:
+            self.remove_id(entry_id)
+        self.scores.save(self.store_path)
+        self.answer_log.drop_ids(removed)
+        if self.scheduler is None and os.path.exists(self.schedule_path):
+            # The answers in the log are replayed when the schedule is loaded for an exercise
+            self.scheduler = LeitnerScheduler.load(self.schedule_path)
+            for entry_id in removed:
+                self.scheduler.remove(entry_id)
+        if self.scheduler is not None:
+            self.scheduler.save(self.schedule_path)
+        return len(removed)
 
     def clean_unused_ids(self, used_ids):
         """
@@ -72,24 +231,93 @@ class ScoresHandler:
         :param used_ids: the ids that are still available in the database
         """
         # Remove scores for words that have been deleted manually by the user
-        for sample_id in self.scores.keys():
-            if int(sample_id) not in used_ids:
-                self.scores.pop(sample_id)
+        self.scores.keep_ids(used_ids)
 
 
-    def summarize(self):
-        """ Return a summary to describe certain scores"""
-        scores = list(self.scores.values())
-        ids = list(self.scores.keys())
+    def reconcile(self, used_ids) -> Tuple[int, int]:
+        """
+        Makes the scores match the entries of the database: the scores of the deleted entries are dropped and
+        the new entries get a score of 0, then the scores are saved
+        :param used_ids: the ids of all the entries in the database sheet
+        :returns: the number of removed and added scores
+        """
+        used_ids = to_id_array(used_ids)
+        n_scores = len(self.scores)
+        self.scores.keep_ids(used_ids)
+        n_removed = n_scores - len(self.scores)
+        self.scores.add_ids(used_ids)
+        n_added = len(self.scores) - n_scores + n_removed
+        if self.scheduler is None and os.path.exists(self.schedule_path):
+            self.load_schedule([])
+        if self.scheduler is not None:
+            self.scheduler.keep_ids(used_ids)
+            self.scheduler.add_ids(used_ids)
+        self.save()
+        return n_removed, n_added
 
-        max_idx = scores.index(max(scores))
-        min_idx = scores.index(min(scores))
+    def summarize(self):
+        """ Return a summary to describe certain scores, from the statistics the store keeps up to date"""
+        stats = self.scores.stats
+        min_id, min_score = stats.worst()
+        max_id, max_score = stats.best()
 
         summary = {
-            'average':np.average(scores),
-            'min':[ids[min_idx], scores[min_idx]],
-            'max':[ids[max_idx], scores[max_idx]],
-            'distribution':Counter(scores),
-            'entries count':len(scores)
+            'average':stats.average(),
+            'min':[str(min_id), min_score],
+            'max':[str(max_id), max_score],
+            'distribution':stats.distribution(),
+            'entries count':stats.count
         }
         return summary
+
+
+def get_score_files(sheet_name:str, scores_dir:str="resources/scores") -> List[str]:
+    """
+    Finds the score files of all the exercises on a sheet (see DatabaseHandler.get_scores_path)
+    :param sheet_name: the name of the sheet
+    :param scores_dir: the folder of the score files
+    :returns: the names of the score files, with the '.json' extension used by ScoresHandler (whether the
+     scores are in a json file, a binary file or only in an answer log)
+    """
+    try:
+        names = os.listdir(scores_dir)
+    except FileNotFoundError:
+        return []
+    score_files = set()
+    for name in names:
+        stem, extension = os.path.splitext(name)
+        # The names have the form {exercise_type}_{sheet_name}_{direction}
+        parts = stem.split('_')
+        if extension in ['.json', '.npy', '.log'] and len(parts) >= 3 and '_'.join(parts[1:-1]) == sheet_name:
+            score_files.add(stem + '.json')
+    return sorted(score_files)
+
+
+def reconcile_scores(sheet_name:str, used_ids, scores_dir:str="resources/scores") -> Dict[str, Tuple[int, int]]:
+    """
+    Reconciles the score files of every exercise on a sheet with the entries of the sheet (see
+    ScoresHandler.reconcile), e.g. after deleting entries or editing the database outside the application
+    :param sheet_name: the name of the sheet
+    :param used_ids: the ids of all the entries in the sheet
+    :param scores_dir: the folder of the score files
+    :returns: the number of removed and added scores for every file {file_name: (removed, added)}
+    """
+    used_ids = to_id_array(used_ids)
+    return {x:ScoresHandler(x, [], scores_dir).reconcile(used_ids) for x in get_score_files(sheet_name, scores_dir)}
+
+
+def remove_entry_scores(sheet_name:str, entry_ids, scores_dir:str="resources/scores",
+                        skipped_files:Iterable[str]=()) -> Dict[str, int]:
+    """
+    Drops the scores of deleted entries from the score files of every exercise on a sheet (see
+    ScoresHandler.remove_ids), without reconciling the files with the whole sheet like reconcile_scores
+    :param sheet_name: the name of the sheet
+    :param entry_ids: the ids of the deleted entries
+    :param scores_dir: the folder of the score files
+    :param skipped_files: the score files left as they are, e.g. the one of the running exercise (it drops the
+     entries from its scores itself, see Exercise.remove_entry)
+    :returns: the number of removed scores for every file {file_name: removed}
+    """
+    entry_ids = to_id_array(entry_ids)
+    return {x:ScoresHandler(x, [], scores_dir).remove_ids(entry_ids) for x in get_score_files(sheet_name, scores_dir)
+            if x not in skipped_files}
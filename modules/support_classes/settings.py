@@ -6,7 +6,7 @@ from json import JSONDecodeError
 from pygame_menu.examples import create_example_window
 
 from typing import Optional
-from ..utils.default_settings import DEFAULT_SETTINGS
+from ..utils.default_settings import DEFAULT_SETTINGS, SAMPLING_POLICIES
 from .pygame_menu import PygameMenu
 
 class SettingsHandler(dict):
@@ -42,10 +42,20 @@ class SettingsHandler(dict):
         try:
             with open(self.path, 'r') as f:
                 settings = json.load(f)
-            self._copy_settings_from_dict(settings)
+            # The settings added after the file was saved take their default value
+            self._copy_settings_from_dict({**DEFAULT_SETTINGS, **settings})
         except:
             warnings.warn('Failed to recover settings file. Restoring to default settings.')
             self.restore_default_settings()
+        self.check_sampling_policy()
+
+    def check_sampling_policy(self):
+        """ Falls back to the default sampling policy if the one in the settings isn't known (e.g. a typo in the
+            settings file)"""
+        if self['Sampling Policy'] not in SAMPLING_POLICIES:
+            warnings.warn(f'Unknown sampling policy "{self["Sampling Policy"]}", it should be one of '
+                          f'{SAMPLING_POLICIES}. Using "{DEFAULT_SETTINGS["Sampling Policy"]}" instead.')
+            self['Sampling Policy'] = DEFAULT_SETTINGS['Sampling Policy']
 
     def display_options(self, screen=None):
         # FIXME: this still doesn't work, all the program will migrate to pygame_menu for menus
@@ -66,6 +76,10 @@ class SettingsHandler(dict):
 
         for name, default_value in text_sections:
             settings_menu.add_text_input(name, default=default_value, input_id=name)
+        # The policy is chosen from the known ones rather than typed
+        settings_menu.add.selector('Sampling Policy  ', [(x,) for x in SAMPLING_POLICIES],
+                                   default=SAMPLING_POLICIES.index(self['Sampling Policy']),
+                                   selector_id='Sampling Policy')
         settings_menu.add_number_input('Number of Samples  ', id="Sample Size", default=self["Sample Size"])
 
         settings_menu.add.button('Open Database', self.open_db, button_id='open_db')  # Call function
@@ -87,6 +101,8 @@ class SettingsHandler(dict):
             self.settings_restored = False
             return
         menu_data['Screen Resolution'] = [menu_data.pop("Screen Width"), menu_data.pop("Screen Height")]
+        # A selector gives the selected item and its position
+        menu_data['Sampling Policy'] = menu_data['Sampling Policy'][0][0]
         for key in menu_data.keys():
             self[key] = menu_data[key]
 
@@ -0,0 +1,243 @@
+import os
+import sqlite3
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from abc import abstractmethod
+from typing import Dict, List, Optional, Union
+
+from .backups import BackupManager
+from .journal import EditJournal, get_journal_path
+from ..utils import parse_ids
+from ..utils.excel_ops import load_serialized_sheets, stream_sheets_to_excel, write_excel_cache
+from ..utils.excel_ops import serialize_df, deserialize_df
+
+
+class Storage:
+    """ The interface between DatabaseHandler and the file the vocabulary is stored in.
+        Edits are given as dictionaries (see DatabaseHandler.edit), a storage either writes them in place
+        (edits_in_place) or records them until the modified sheets are written with write_sheets.
+    """
+    # Whether record_edit writes the edit to the stored sheet itself (so the sheet doesn't need to be written)
+    edits_in_place = False
+    # Whether the edits passed to record_edit survive a crash
+    edits_are_durable = False
+
+    def __init__(self, path:Union[str, os.PathLike]):
+        self.path = path
+
+    @abstractmethod
+    def get_sheet_names(self) -> List[str]:
+        """ Returns the names of the stored sheets, in their order"""
+        pass
+
+    @abstractmethod
+    def read_sheet(self, sheet_name:str) -> pd.DataFrame:
+        """ Returns a stored sheet as a dataframe (with empty cells as '')"""
+        pass
+
+    def read_ids(self, sheet_name:str) -> np.ndarray:
+        """ Returns the integer IDs of a stored sheet (0 for the missing ones)"""
+        df = self.read_sheet(sheet_name)
+        if 'ID' not in df.columns:
+            return np.zeros(0, dtype=np.int64)
+        return parse_ids(df['ID'].values, 8)[0]
+
+    @abstractmethod
+    def write_sheets(self, dfs:Dict[str, pd.DataFrame], background:bool=False) -> None:
+        """
+        Replaces (or adds) whole sheets in the storage
+        :param dfs: the sheets to write {sheet_name: dataframe}
+        :param background: whether the sheets could be written in a separate thread (see wait)
+        """
+        pass
+
+    def record_edit(self, edit:dict) -> None:
+        """ Stores an edit made to a sheet as it happens"""
+        pass
+
+    def get_pending_edits(self) -> List[dict]:
+        """ Returns the recorded edits that aren't in the stored sheets yet (e.g. from a crashed session)"""
+        return []
+
+    def wait(self) -> None:
+        """ Waits until the sheets written in the background are stored"""
+        pass
+
+
+class ExcelStorage(Storage):
+    """ Stores the sheets in an Excel file. The sheets are parsed once (or read from the binary cache next to the
+        file) and kept in their compact serialized form, the edits are appended to a journal (if used) and the
+        Excel file is only rewritten by write_sheets.
+    """
+    def __init__(self, path:Union[str, os.PathLike], use_journal:bool=True, backups:Optional[BackupManager]=None):
+        """
+        :param path: the path to the Excel file
+        :param use_journal: whether to append the edits to a journal next to the file
+        :param backups: the manager backing up the file before it's overwritten (the default BackupManager if None)
+        """
+        super().__init__(path)
+        self.backups = backups if backups is not None else BackupManager()
+        # A write killed before the file was replaced leaves its temporary file behind (see save_workbook)
+        if os.path.exists(str(path) + '.tmp'):
+            os.remove(str(path) + '.tmp')
+        # The serialized form of every sheet in the file, used to load the sheets on demand
+        if os.path.exists(path):
+            self.serialized_sheets = load_serialized_sheets(path)
+        else:
+            self.serialized_sheets = {}
+        self.journal = EditJournal(get_journal_path(path)) if use_journal else None
+        self.edits_are_durable = use_journal
+        # The thread writing the Excel file in the background (if any)
+        self.write_thread = None
+
+    def get_sheet_names(self) -> List[str]:
+        return list(self.serialized_sheets.keys())
+
+    def read_sheet(self, sheet_name:str) -> pd.DataFrame:
+        return deserialize_df(self.serialized_sheets[sheet_name])
+
+    def record_edit(self, edit:dict) -> None:
+        if self.journal is not None:
+            self.journal.append(edit)
+
+    def get_pending_edits(self) -> List[dict]:
+        if self.journal is None:
+            return []
+        return self.journal.read()
+
+    def write_sheets(self, dfs:Dict[str, pd.DataFrame], background:bool=False) -> None:
+        """
+        Writes sheets to the Excel file, updates its cache and drops the journal records written with them
+        :param dfs: the sheets to write {sheet_name: dataframe}
+        :param background: if True the file is written in a separate thread, the edits recorded meanwhile go to
+         a new journal and failing to write the file only gives a warning (the edits stay in the journal and are
+         written the next time)
+        """
+        self.wait()
+        # Copy the sheets so the edits made while writing in the background don't interfere
+        dfs = {name:df.copy() for name, df in dfs.items()}
+        for sheet_name, df in dfs.items():
+            self.serialized_sheets[sheet_name] = serialize_df(df.reset_index(drop=True))
+        if self.journal is not None:
+            self.journal.start_compaction()
+        if background:
+            self.write_thread = threading.Thread(target=self.write_excel_file,
+                                                 args=(dfs, dict(self.serialized_sheets), False))
+            self.write_thread.start()
+        else:
+            self.write_excel_file(dfs, self.serialized_sheets)
+
+    def write_excel_file(self, dfs:Dict[str, pd.DataFrame], serialized_sheets:Dict[str, bytes],
+                         interactive:bool=True) -> None:
+        """
+        Writes sheets to the Excel file (after backing it up) and caches all the sheets
+        :param dfs: the sheets to write {sheet_name: dataframe}
+        :param serialized_sheets: all the sheets of the file in their serialized form, to be cached
+        :param interactive: if False, failing to write the file only gives a warning
+        Note: the whole file is streamed from the sheets in memory (the other sheets are restored from
+         serialized_sheets), which is faster than loading the workbook to replace some of its sheets. It's streamed
+         to a temporary file that replaces the Excel file once complete, so a crash while writing (e.g. during the
+         compaction of the journal at startup) leaves the previous file and the journal as they were
+        """
+        all_dfs = {name:dfs[name] if name in dfs else deserialize_df(data) for name, data in serialized_sheets.items()}
+        try:
+            if os.path.exists(self.path):
+                self.backups.backup(self.path)
+            stream_sheets_to_excel(all_dfs, self.path, interactive)
+            # The saved dataframes are what the next session would parse, so cache them directly
+            write_excel_cache(self.path, serialized_sheets)
+        except Exception as e:
+            if interactive:
+                raise
+            warnings.warn(f'Failed to write the database to {self.path}, the edits are kept in the journal: {e}')
+            return
+        if self.journal is not None:
+            self.journal.finish_compaction()
+
+    def wait(self) -> None:
+        if self.write_thread is not None:
+            self.write_thread.join()
+            self.write_thread = None
+
+
+def quote(name:str) -> str:
+    """ Quotes an SQL identifier (a table or a column name)"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class SQLiteStorage(Storage):
+    """ Stores the sheets in an SQLite database, one table per sheet with an indexed 'ID' (and 'Category' when
+        the sheet has one). The table 'sheets' keeps the order of the sheets. Every edit is a transactional
+        update of a single row, so nothing has to be written when the application exits.
+    """
+    edits_in_place = True
+    edits_are_durable = True
+
+    def __init__(self, path:Union[str, os.PathLike]):
+        super().__init__(path)
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS sheets (name TEXT PRIMARY KEY, position INTEGER)')
+
+    def get_sheet_names(self) -> List[str]:
+        rows = self.connection.execute('SELECT name FROM sheets ORDER BY position').fetchall()
+        return [x[0] for x in rows]
+
+    def read_sheet(self, sheet_name:str) -> pd.DataFrame:
+        # The rowid keeps the order the rows were written in
+        df = pd.read_sql_query(f'SELECT * FROM {quote(sheet_name)} ORDER BY rowid', self.connection)
+        return df.fillna('')
+
+    def read_ids(self, sheet_name:str) -> np.ndarray:
+        rows = self.connection.execute(f'SELECT ID FROM {quote(sheet_name)}').fetchall()
+        return np.array([x[0] for x in rows], dtype=np.int64)
+
+    def write_sheets(self, dfs:Dict[str, pd.DataFrame], background:bool=False) -> None:
+        """ Replaces (or adds) whole sheets, every sheet is written in a single transaction"""
+        for sheet_name, df in dfs.items():
+            self.write_sheet(sheet_name, df)
+
+    def write_sheet(self, sheet_name:str, df:pd.DataFrame) -> None:
+        table = quote(sheet_name)
+        # The 'ID' is unique (so it's indexed) but not the rowid, which keeps the order of the rows
+        columns = ['ID INTEGER NOT NULL UNIQUE'] + [quote(x) for x in df.columns if x != 'ID']
+        rows = df[['ID'] + [x for x in df.columns if x != 'ID']].astype(object).values.tolist()
+        placeholders = ', '.join(['?'] * (len(df.columns)))
+        with self.connection:
+            self.connection.execute(f'DROP TABLE IF EXISTS {table}')
+            self.connection.execute(f'CREATE TABLE {table} ({", ".join(columns)})')
+            self.connection.executemany(f'INSERT INTO {table} VALUES ({placeholders})', rows)
+            if 'Category' in df.columns:
+                index = quote(f'{sheet_name}_category')
+                self.connection.execute(f'CREATE INDEX {index} ON {table} (Category)')
+            position = self.connection.execute('SELECT position FROM sheets WHERE name = ?', (sheet_name,)).fetchone()
+            if position is None:
+                position = self.connection.execute('SELECT COUNT(*) FROM sheets').fetchone()
+                self.connection.execute('INSERT INTO sheets VALUES (?, ?)', (sheet_name, position[0]))
+
+    def record_edit(self, edit:dict) -> None:
+        table = quote(edit['sheet'])
+        with self.connection:
+            if edit['op'] == 'set':
+                self.connection.execute(f'UPDATE {table} SET {quote(edit["column"])} = ? WHERE ID = ?',
+                                        (edit['value'], int(edit['id'])))
+            elif edit['op'] == 'delete':
+                self.connection.execute(f'DELETE FROM {table} WHERE ID = ?', (int(edit['id']),))
+            else:
+                raise ValueError(f'Unknown edit operation "{edit["op"]}"')
+
+
+def get_storage(path:Union[str, os.PathLike], use_journal:bool=True) -> Storage:
+    """
+    Returns the storage matching the extension of a database file
+    :param path: the path to the database, '.sqlite', '.sqlite3' and '.db' files are SQLite databases,
+     anything else is an Excel file
+    :param use_journal: whether to journal the edits of an Excel database (see ExcelStorage)
+    """
+    if os.path.splitext(str(path))[1].lower() in ['.sqlite', '.sqlite3', '.db']:
+        return SQLiteStorage(path)
+    return ExcelStorage(path, use_journal)
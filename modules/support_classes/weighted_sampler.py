@@ -0,0 +1,110 @@
+import numpy as np
+
+from typing import Iterable, List, Optional, Union
+
+from ..utils import to_id_array
+
+
+class WeightedSampler:
+    """ Draws entries with a probability proportional to their weight, the weights are kept in a Fenwick tree
+        (every node holds the sum of a range of weights) so changing the weight of an entry and drawing an entry
+        both take O(log N), instead of normalizing all the weights before every draw.
+    """
+    def __init__(self, ids:Iterable[Union[int, str]], weights:Iterable[float]):
+        """
+        :param ids: the IDs of the entries
+        :param weights: the (unnormalized) weights of the entries, see get_raw_weights
+        """
+        self.ids = to_id_array(ids)
+        self.weights = np.array(weights, dtype=np.float64)
+        assert len(self.ids) == len(self.weights), 'Every entry should have a weight'
+        self.slots = {x:i for i, x in enumerate(self.ids.tolist())}
+        self.build()
+
+    def build(self) -> None:
+        """ Builds the tree from the weights in O(N), node i (1-based) holds the sum of the weights in
+            (i - lowbit(i), i]"""
+        size = len(self.weights)
+        cumulative = np.concatenate([[0], np.cumsum(self.weights)])
+        nodes = np.arange(1, size + 1)
+        tree = np.zeros(size + 1)
+        tree[1:] = cumulative[nodes] - cumulative[nodes - (nodes & -nodes)]
+        # Plain lists, indexing them one item at a time is faster than indexing an array
+        self.tree = tree.tolist()
+        self.total = float(cumulative[-1])
+        # The number of entries that can be drawn
+        self.n_positive = int(np.count_nonzero(self.weights > 0))
+        # The largest power of 2 not above the size, where the search starts
+        self.top_step = 1 << (size.bit_length() - 1) if size > 0 else 0
+
+    def update(self, entry_id:Union[int, str], weight:float) -> None:
+        """ Changes the weight of an entry in O(log N)"""
+        slot = self.slots[int(entry_id)]
+        delta = weight - self.weights[slot]
+        self.n_positive += int(weight > 0) - int(self.weights[slot] > 0)
+        self.weights[slot] = weight
+        self.total += delta
+        node = slot + 1
+        tree = self.tree
+        while node < len(tree):
+            tree[node] += delta
+            node += node & -node
+
+    def update_many(self, ids:Iterable[Union[int, str]], weights:Iterable[float]) -> None:
+        """ Changes the weights of several entries, the tree is rebuilt in O(N) (cheaper than N updates)"""
+        slots = [self.slots[x] for x in to_id_array(ids).tolist()]
+        self.weights[slots] = weights
+        self.build()
+
+    def remove(self, entry_id:Union[int, str]) -> None:
+        """ Stops drawing an entry (its weight is set to 0)"""
+        self.update(entry_id, 0)
+
+    def sample(self, rng:Optional[np.random.Generator]=None) -> int:
+        """
+        Draws an entry in O(log N)
+        :param rng: the random generator to use, the global numpy generator if None
+        :returns: the id of the drawn entry
+        """
+        while True:
+            assert self.total > 0, 'There is no entry to draw'
+            remaining = (np.random.random() if rng is None else rng.random()) * self.total
+            # Walk down the tree to the first slot where the cumulative weight exceeds the drawn value
+            tree, size = self.tree, len(self.tree) - 1
+            node, step = 0, self.top_step
+            while step > 0:
+                if node + step <= size and tree[node + step] <= remaining:
+                    node += step
+                    remaining -= tree[node]
+                step >>= 1
+            if node < size and self.weights[node] > 0:
+                return int(self.ids[node])
+            # The rounding errors of the updates pointed to an empty or a missing slot, rebuild the tree (which
+            # clears the errors) and draw again
+            self.build()
+
+    def sample_distinct(self, size:int, rng:Optional[np.random.Generator]=None) -> List[int]:
+        """
+        Draws distinct entries in O(size * log N): every drawn entry gets a weight of 0 until the draws are done,
+         which is the same as drawing them one by one without replacement
+        :param size: the number of entries to draw (less are drawn if there aren't enough entries with a weight)
+        :param rng: the random generator to use, the global numpy generator if None
+        :returns: the ids of the drawn entries, in the order they were drawn
+        """
+        drawn, weights = [], []
+        try:
+            for _ in range(min(size, self.n_positive)):
+                entry_id = self.sample(rng)
+                drawn.append(entry_id)
+                weights.append(float(self.weights[self.slots[entry_id]]))
+                self.update(entry_id, 0)
+        finally:
+            for entry_id, weight in zip(drawn, weights):
+                self.update(entry_id, weight)
+        return drawn
+
+    def __contains__(self, entry_id) -> bool:
+        return int(entry_id) in self.slots
+
+    def __len__(self) -> int:
+        return len(self.ids)
@@ -1,3 +1,4 @@
 from .utils import *
+from .text_normalizer import TextNormalizer, text_normalizer
 from .gui import *
 from .excel_ops import save_to_excel
\ No newline at end of file
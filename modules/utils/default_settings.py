@@ -1,6 +1,10 @@
 from typing import final
 
 
+# The ways of choosing the next question: drawn with the weights of the scores, or the entry due the soonest in a
+# spaced-repetition schedule
+SAMPLING_POLICIES: final = ['Weighted', 'Spaced Repetition']
+
 DEFAULT_SETTINGS: final = {
     'Screen Resolution':(1000, 700),
     'Head Color':(255, 324, 102),
@@ -13,5 +17,6 @@ DEFAULT_SETTINGS: final = {
     'Full Screen':False,
     'Included Categories':'',
     'Excluded Categories':'phrase',
-    'Source of Sampled Words':None
+    'Source of Sampled Words':None,
+    'Sampling Policy':'Weighted'
 }
\ No newline at end of file
@@ -1,9 +1,14 @@
 import pandas as pd
-from typing import Optional, Iterable, Union
+from typing import Optional, Iterable, Union, Dict
 
 import os
+import pickle
+import hashlib
+
+from copy import copy
 
 from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.utils import get_column_letter
@@ -19,11 +24,32 @@ def get_excel_df(excel_file:str, sheetname:Optional[str]=None) -> pd.DataFrame:
     :returns: dataframe found in the Excel sheet
 
     """
-    wb = load_workbook(excel_file)
+    wb = load_workbook(excel_file, read_only=True)
     if sheetname is None:
         sheet = wb.active
     else:
         sheet = wb[sheetname]
+    df = sheet_to_df(sheet)
+    wb.close()
+    return df
+
+def get_excel_dfs(excel_file:str) -> Dict[str, pd.DataFrame]:
+    """
+    Reads all the sheets of an Excel file, parsing the workbook only once
+    :param excel_file: path to Excel file
+    :returns: a dictionary with the form {sheet_name: dataframe}, in the order of the sheets in the file
+    """
+    wb = load_workbook(excel_file, read_only=True)
+    dfs = {sheet.title:sheet_to_df(sheet) for sheet in wb.worksheets}
+    wb.close()
+    return dfs
+
+def sheet_to_df(sheet:Worksheet) -> pd.DataFrame:
+    """
+    Converts an openpyxl worksheet to a dataframe, using the first row as the header
+    :param sheet: the worksheet to convert
+    :returns: the dataframe, with empty cells replaced by ''
+    """
     df = pd.DataFrame(sheet.values)
     # Get the column names from the first row
     df.columns = df.iloc[0]
@@ -31,6 +57,100 @@ def get_excel_df(excel_file:str, sheetname:Optional[str]=None) -> pd.DataFrame:
     df = df.iloc[1:].fillna('')
     return df.reset_index(drop=True)
 
+def get_cache_path(excel_file:str) -> str:
+    """ Returns the path of the binary cache kept next to an Excel file"""
+    folder, file_name = os.path.split(excel_file)
+    return os.path.join(folder, f'.{file_name}.cache')
+
+def get_file_signature(excel_file:str, with_hash:bool=True) -> dict:
+    """
+    Returns the information used to know whether a file changed
+    :param excel_file: path to the file
+    :param with_hash: whether to compute the hash of the content (needs reading the whole file)
+    :returns: a dictionary with the 'size', 'mtime' and 'hash' of the file ('hash' is None if with_hash is False)
+    """
+    stat = os.stat(excel_file)
+    content_hash = None
+    if with_hash:
+        with open(excel_file, 'rb') as f:
+            content_hash = hashlib.sha1(f.read()).hexdigest()
+    return {'size':stat.st_size, 'mtime':stat.st_mtime_ns, 'hash':content_hash}
+
+def serialize_df(df:pd.DataFrame) -> bytes:
+    """ Serializes a dataframe to a compact binary form (a lot smaller in memory than the dataframe)"""
+    return pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+
+def deserialize_df(data:bytes) -> pd.DataFrame:
+    """ Restores a dataframe serialized with serialize_df"""
+    return pickle.loads(data)
+
+def read_excel_cache(excel_file:str) -> Optional[Dict[str, bytes]]:
+    """
+    Loads the sheets cached for an Excel file
+    :param excel_file: path to the Excel file
+    :returns: the serialized dataframes ({sheet_name: serialized_df}, see deserialize_df), or None
+     if there's no valid cache
+    Note: the cache is valid if the file has the same size and content hash it had when the cache was
+     written, the hash is only computed if the modification time changed
+    """
+    try:
+        with open(get_cache_path(excel_file), 'rb') as f:
+            cache = pickle.load(f)
+        signature = get_file_signature(excel_file, with_hash=False)
+    except Exception:
+        # A missing, corrupted or incompatible (e.g. written by another pandas version) cache
+        return None
+    if signature['size'] != cache['signature']['size']:
+        return None
+    if signature['mtime'] != cache['signature']['mtime']:
+        # The file was touched, only trust the cache if the content is the same
+        if get_file_signature(excel_file)['hash'] != cache['signature']['hash']:
+            return None
+    return cache['sheets']
+
+def write_excel_cache(excel_file:str, sheets:Dict[str, bytes]) -> None:
+    """
+    Caches the sheets of an Excel file in a binary file next to it
+    :param excel_file: path to the Excel file (it should match the sheets)
+    :param sheets: a dictionary with the form {sheet_name: serialized_df} (see serialize_df)
+    """
+    cache = {'signature':get_file_signature(excel_file), 'sheets':sheets}
+    cache_path = get_cache_path(excel_file)
+    # Write to a temporary file first, so a crash never leaves a half written cache
+    with open(cache_path + '.tmp', 'wb') as f:
+        pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(cache_path + '.tmp', cache_path)
+
+def load_serialized_sheets(excel_file:str, use_cache:bool=True) -> Dict[str, bytes]:
+    """
+    Reads all the sheets of an Excel file in their serialized form, from the cache when it's up-to-date
+    :param excel_file: path to Excel file
+    :param use_cache: if False the file is always parsed and no cache is written
+    :returns: a dictionary with the form {sheet_name: serialized_df} (see deserialize_df)
+    """
+    if use_cache:
+        sheets = read_excel_cache(excel_file)
+        if sheets is not None:
+            return sheets
+    sheets = {name:serialize_df(df) for name, df in get_excel_dfs(excel_file).items()}
+    if use_cache:
+        try:
+            write_excel_cache(excel_file, sheets)
+        except OSError:
+            # The cache is only an optimization, a read-only folder shouldn't stop the loading
+            pass
+    return sheets
+
+def load_excel_dfs(excel_file:str, use_cache:bool=True) -> Dict[str, pd.DataFrame]:
+    """
+    Reads all the sheets of an Excel file, from the cache when it's up-to-date
+    :param excel_file: path to Excel file
+    :param use_cache: if False the file is always parsed and no cache is written
+    :returns: a dictionary with the form {sheet_name: dataframe}
+    """
+    sheets = load_serialized_sheets(excel_file, use_cache)
+    return {name:deserialize_df(data) for name, data in sheets.items()}
+
 def style_dict(header_style:str, body_style:str) -> dict[str, str]:
     """
     Just returns a dictionary with the entered_styles
@@ -148,28 +268,105 @@ def df_to_excel(df:pd.DataFrame, filename:str, sheet_name:str, styles:Iterable[d
      me a lot when testing, so I am leaving it
 
     """
+    dfs_to_excel({sheet_name:df}, filename, {sheet_name:styles}, {sheet_name:dims})
+
+def dfs_to_excel(dfs:Dict[str, pd.DataFrame], filename:str, styles:Dict[str, Iterable[dict]]=None,
+                 dims:Dict[str, Iterable[int]]=None, interactive:bool=True):
+    """
+    Saves several dataframes in the sheets of an Excel file, the file is loaded and saved only once
+    :param dfs: a dictionary with the form {sheet_name: dataframe}, the other sheets in the file are kept
+    :param filename: path to the Excel file
+    :param styles: a dictionary with the styles of every sheet ({sheet_name: styles}, see df_to_excel)
+    :param dims: a dictionary with the widths of the columns of every sheet ({sheet_name: dims}, see df_to_excel)
+    :param interactive: if True and the file can't be written (e.g. it's open), the user is asked to close it
+     and the save is retried, otherwise the PermissionError is raised
+    """
+    styles = styles or {}
+    dims = dims or {}
     # Try to load the existing workbook into a file
     try:
         wb = load_workbook(filename)
-        existing_sheets = wb.sheetnames
-        if sheet_name in existing_sheets:
-            # Make sure to create the function at the same index
-            idx = wb.worksheets.index(wb[sheet_name])
-            wb.remove(wb[sheet_name])
-            ws = wb.create_sheet(title=sheet_name, index=idx)
-        else:
-            ws = wb.create_sheet(title=sheet_name)
     # If the file doesn't exist, create a new workbook
     except FileNotFoundError:
         wb = Workbook()
-        ws = wb.active
-        ws.title = sheet_name
+        # The default sheet is replaced by the first saved sheet
+        wb.active.title = next(iter(dfs))
+    wb = add_styles(wb)
+    for sheet_name, df in dfs.items():
+        write_sheet(wb, df, sheet_name, styles.get(sheet_name), dims.get(sheet_name))
+    save_workbook(wb, filename, interactive)
+
+def stream_dfs_to_excel(dfs:Dict[str, pd.DataFrame], filename:str, styles:Dict[str, Iterable[dict]]=None,
+                        dims:Dict[str, Iterable[int]]=None, interactive:bool=True):
+    """
+    Saves several dataframes in a new Excel file using openpyxl's write-only mode, every row is styled as it's
+    streamed to the file, which is a lot faster than dfs_to_excel for large sheets. The rows are streamed to a
+    temporary file that replaces the Excel file once it's complete (see save_workbook)
+    :param dfs: a dictionary with the form {sheet_name: dataframe}, the file is replaced so it only contains
+     these sheets (in their order)
+    :param filename: path to the Excel file
+    :param styles: a dictionary with the styles of every sheet ({sheet_name: styles}, see df_to_excel)
+    :param dims: a dictionary with the widths of the columns of every sheet ({sheet_name: dims}, see df_to_excel)
+    :param interactive: whether to ask the user to close the file if it can't be written (see dfs_to_excel)
+    """
+    styles = styles or {}
+    dims = dims or {}
+    wb = add_styles(Workbook(write_only=True))
+    for sheet_name, df in dfs.items():
+        stream_sheet(wb, df, sheet_name, styles.get(sheet_name), dims.get(sheet_name))
+    save_workbook(wb, filename, interactive)
+
+def save_workbook(wb:Workbook, filename:str, interactive:bool=True):
+    """
+    Saves a workbook to a file, the workbook is written to a temporary file next to it then moved over it, so a
+    crash while writing never leaves a half written file (the old file stays until the new one is complete)
+    :param wb: the workbook to save
+    :param filename: path to the Excel file
+    :param interactive: if True and the file can't be written (e.g. it's open), the user is asked to close it
+     and the save is retried, otherwise the PermissionError is raised
+    """
+    tmp_path = str(filename) + '.tmp'
+    try:
+        wb.save(tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    # The try block is only for when the file we're trying to save to is open, this happens a lot
+    # to me in testing, so I added the try block (a write-only workbook can only be saved once, so only
+    # the replacing is retried)
+    try:
+        os.replace(tmp_path, filename)
+    except PermissionError:
+        if not interactive:
+            os.remove(tmp_path)
+            raise
+        print(filename, " may be still open, please close and press any key to try again")
+        os.system("pause")
+        os.replace(tmp_path, filename)
+
+def write_sheet(wb:Workbook, df:pd.DataFrame, sheet_name:str, styles:Iterable[dict]=None, dims:Iterable[int]=None):
+    """
+    Writes a dataframe in a sheet of a workbook (replacing the sheet if it exists) with specified styles
+    :param wb: the workbook, it should already contain the styles (see add_styles)
+    :param df: the dataframe to write
+    :param sheet_name: the sheet name
+    :param styles: list containing the styles to be applied for every column
+    :param dims: the width of each column in Excel
+    """
+    existing_sheets = wb.sheetnames
+    if sheet_name in existing_sheets:
+        # Make sure to create the function at the same index
+        idx = wb.worksheets.index(wb[sheet_name])
+        wb.remove(wb[sheet_name])
+        ws = wb.create_sheet(title=sheet_name, index=idx)
+    else:
+        ws = wb.create_sheet(title=sheet_name)
     # Hide the gridlines from the Excel sheet
     ws.sheet_view.showGridLines = False
     # Copy the dataframe rows to the worksheet
     for r in dataframe_to_rows(df, index=False, header=True):
         ws.append(r)
-    wb = add_styles(wb)
     len_match_err = "The number of {} should match the number of columns in the dataframe"
     # Apply styling if a styles' list were passed to the function
     if styles:
@@ -190,15 +387,55 @@ def df_to_excel(df:pd.DataFrame, filename:str, sheet_name:str, styles:Iterable[d
         # Iterate over columns and apply width to each one
         for index, _ in enumerate(ws.iter_cols()):
             ws = adjust_column_width(ws, index, dims[index])
-    # The following block is for saving the workbook, the try block is only for when the file 
-    # we're trying to save to is open, this happens a lot to me in testing, so I added the try
-    # block
-    try:
-        wb.save(filename)
-    except PermissionError:
-        print(filename, " may be still open, please close and press any key to try again")
-        os.system("pause")
-        wb.save(filename)
+
+def stream_sheet(wb:Workbook, df:pd.DataFrame, sheet_name:str, styles:Iterable[dict]=None, dims:Iterable[int]=None):
+    """
+    Streams a dataframe to a new sheet of a write-only workbook, the sheet looks the same as one written by
+    write_sheet
+    :param wb: the write-only workbook, it should already contain the styles (see add_styles)
+    :param df: the dataframe to write
+    :param sheet_name: the sheet name
+    :param styles: list containing the styles to be applied for every column
+    :param dims: the width of each column in Excel
+    """
+    ws = wb.create_sheet(title=sheet_name)
+    # Hide the gridlines from the Excel sheet
+    ws.sheet_view.showGridLines = False
+    len_match_err = "The number of {} should match the number of columns in the dataframe"
+    # The column widths are written before the rows in write-only mode
+    if dims:
+        assert len(dims) == len(df.columns), len_match_err.format("assigned widths")
+        for index, width in enumerate(dims):
+            ws = adjust_column_width(ws, index, width)
+    if styles:
+        assert len(styles) == len(df.columns), len_match_err.format("styles")
+        # Resolve every named style once, the cells get a copy of the resolved style instead of a name
+        header_styles = [resolve_style(ws, x['Header']) for x in styles]
+        body_styles = [resolve_style(ws, x['Body']) for x in styles]
+    else:
+        header_styles = body_styles = [None] * len(df.columns)
+    ws.append(styled_row(ws, df.columns, header_styles))
+    # Missing values are written as empty cells (like dataframe_to_rows does)
+    values = df.astype(object).where(df.notna(), None)
+    for row in values.itertuples(index=False, name=None):
+        ws.append(styled_row(ws, row, body_styles))
+
+def resolve_style(ws:Worksheet, style_name:str):
+    """ Returns the internal style of a cell with a named style, which can be copied to other cells"""
+    cell = WriteOnlyCell(ws)
+    cell.style = style_name
+    return cell._style
+
+def styled_row(ws:Worksheet, values:Iterable, styles:list) -> list:
+    """ Returns the cells of a row in a write-only sheet, styles has a style (see resolve_style) or None
+        for every column"""
+    cells = []
+    for value, style in zip(values, styles):
+        cell = WriteOnlyCell(ws, value)
+        if style is not None:
+            cell._style = copy(style)
+        cells.append(cell)
+    return cells
 
 
 def save_to_excel(df:pd.DataFrame, filename:str, sheetname:str) -> None:
@@ -208,10 +445,35 @@ def save_to_excel(df:pd.DataFrame, filename:str, sheetname:str) -> None:
     :param filename: the path of hte Excel file to save under 
     :param sheetname: the sheet name of the saved database
     """
+    save_sheets_to_excel({sheetname:df}, filename)
+
+def save_sheets_to_excel(dfs:Dict[str, pd.DataFrame], filename:str, interactive:bool=True) -> None:
+    """
+    Saves several language dataframes to an Excel file, loading and saving the file only once
+    :param dfs: a dictionary with the form {sheet_name: dataframe}
+    :param filename: the path of the Excel file to save under
+    :param interactive: whether to ask the user to close the file if it can't be written (see dfs_to_excel)
+    """
+    styles, dims = get_database_format(dfs)
+    # Save the dataframes to an Excel file
+    dfs_to_excel(dfs, filename, styles, dims, interactive)
+
+def stream_sheets_to_excel(dfs:Dict[str, pd.DataFrame], filename:str, interactive:bool=True) -> None:
+    """
+    Saves language dataframes to a new Excel file with the same format as save_sheets_to_excel, but streaming
+    the rows (see stream_dfs_to_excel)
+    :param dfs: a dictionary with the form {sheet_name: dataframe}, the file will only contain these sheets
+    :param filename: the path of the Excel file to save under
+    :param interactive: whether to ask the user to close the file if it can't be written (see dfs_to_excel)
+    """
+    styles, dims = get_database_format(dfs)
+    stream_dfs_to_excel(dfs, filename, styles, dims, interactive)
+
+def get_database_format(dfs:Dict[str, pd.DataFrame]) -> tuple:
+    """ Returns the styles and the column widths of the language dataframes as {sheet_name: styles} and
+        {sheet_name: dims} (see dfs_to_excel)"""
     # Create a list of dictionaries with the styles for each column
-    styles = [{'Header':'BlueHeaderCentered', 'Body':'BodyLeft'}] * len(df.columns)
+    styles = {name:[{'Header':'BlueHeaderCentered', 'Body':'BodyLeft'}] * len(df.columns) for name, df in dfs.items()}
     # Create a list of widths for each column
-    # Create a list of widths with length of 10
-    dims = [0] * len(df.columns)
-    # Save the dataframe to an Excel file
-    df_to_excel(df, filename, sheetname, styles, dims)
\ No newline at end of file
+    dims = {name:[0] * len(df.columns) for name, df in dfs.items()}
+    return styles, dims
@@ -0,0 +1,105 @@
+import re
+
+import pandas as pd
+
+from typing import Callable
+
+
+# The special characters typed as the english char followed by a '_', e.g. 'a_' -> 'ä'
+SPECIAL_CHARS = {'s':'ß', 'a':'ä', 'o':'ö', 'u':'ü', 'A':'Ä', 'O':'Ö', 'U':'Ü', 'S':'ẞ'}
+# The punctuation removed from the texts
+REMOVED_CHARS = '[].?!'
+# The contractions expanded (the ’ is only replaced by ' after "'re " and "'s " are expanded, so "’re " stays)
+CONTRACTIONS = {"'re ":' are ', "'s ":' is ', "won't":'will not', "’m":' am', "’":"'", "'m":' am'}
+ARTICLES = ['a', 'an', 'the']
+# The character joining the texts of a column (see TextNormalizer.clean_column)
+COLUMN_SEPARATOR = '\x00'
+
+
+class TextNormalizer:
+    """ Normalizes the answers and the targets for the matching (see clean_text and add_special_chars), with all
+        the rules compiled once: the punctuation is removed with a translation table and the contractions are
+        expanded by a single regex. The "n't", the brackets and the articles are separate passes since they
+        depend on the text the previous rules leave, e.g. "the (big) dog" -> "the  dog" -> "dog".
+    """
+    def __init__(self):
+        self.removed_chars = str.maketrans('', '', REMOVED_CHARS)
+        self.special_chars = re.compile(f'[{"".join(SPECIAL_CHARS)}]_')
+        self.contractions = re.compile('|'.join(re.escape(x) for x in CONTRACTIONS))
+        self.negations = re.compile(r"\b[A-Za-z]+n't\b")
+        self.brackets = re.compile(r"\([^()]*\)")
+        self.articles = re.compile(rf"(?:^|\s)(?:{'|'.join(ARTICLES)})\s")
+        # The same rules on texts joined with the separator (see clean_column), the separator is a start and an end
+        self.joined_brackets = re.compile(rf"\([^(){COLUMN_SEPARATOR}]*\)")
+        self.joined_articles = re.compile(rf"(?:^|(?<={COLUMN_SEPARATOR})|\s)(?:{'|'.join(ARTICLES)})\s")
+        self.joined_spaces = re.compile(rf"(?:^|(?<={COLUMN_SEPARATOR}))\s+|\s+(?={COLUMN_SEPARATOR}|$)")
+
+    def add_special_chars(self, answer:str) -> str:
+        """ Replaces the special characters typed with a '_', e.g. 'A_pfel' -> 'Äpfel'"""
+        return self.special_chars.sub(lambda x: SPECIAL_CHARS[x.group()[0]], answer)
+
+    def clean(self, text:str) -> str:
+        """ Cleans a string of text for better matching (see clean_text)"""
+        text = text.lower().translate(self.removed_chars)
+        text = self.contractions.sub(lambda x: CONTRACTIONS[x.group()], text)
+        if "n't" in text:
+            text = self.expand_negations(text)
+        text = self.brackets.sub('', text)
+        return self.articles.sub(' ', text).strip()
+
+    def normalize_answer(self, answer:str) -> str:
+        """ Normalizes an answer typed by the user: the special characters then the cleaning"""
+        return self.clean(self.add_special_chars(answer))
+
+    def expand_negations(self, text:str) -> str:
+        """ Replaces all the "not" abbreviations, e.g. doesn't -> does not"""
+        for match in self.negations.findall(text):
+            text = text.replace(match, match.replace("n't", " not"))
+        return text
+
+    def clean_column(self, texts:pd.Series) -> pd.Series:
+        """
+        Cleans a column of texts, the same way as clean
+        :param texts: the texts, the missing values are taken as empty texts
+        :returns: the cleaned texts, with the same index
+        """
+        return self.apply_to_column(texts, self.clean_joined, self.clean)
+
+    def normalize_column(self, answers:pd.Series) -> pd.Series:
+        """ Normalizes a column of answers typed by the user, the same way as normalize_answer"""
+        return self.apply_to_column(answers, lambda x: self.clean_joined(self.add_special_chars(x)),
+                                    self.normalize_answer)
+
+    def apply_to_column(self, texts:pd.Series, joined_fnc:Callable[[str], str],
+                        fnc:Callable[[str], str]) -> pd.Series:
+        """
+        Applies a rule to a column of texts, on the texts joined with the separator so every pattern runs once on
+         the whole column instead of once per text
+        :param texts: the texts, the missing values are taken as empty texts
+        :param joined_fnc: the rule, for texts joined with the separator
+        :param fnc: the rule, for a single text (used if a text holds the separator)
+        :returns: the texts after the rule, with the same index
+        """
+        values = texts.fillna('').astype(str).tolist()
+        joined = COLUMN_SEPARATOR.join(values)
+        if joined.count(COLUMN_SEPARATOR) != max(len(values) - 1, 0):
+            values = [fnc(x) for x in values]
+        elif values:
+            values = joined_fnc(joined).split(COLUMN_SEPARATOR)
+        return pd.Series(values, index=texts.index, dtype=object)
+
+    def clean_joined(self, text:str) -> str:
+        """ Cleans texts joined with the separator, every text the same way as clean"""
+        text = text.lower().translate(self.removed_chars)
+        text = self.contractions.sub(lambda x: CONTRACTIONS[x.group()], text)
+        if "n't" in text:
+            # The abbreviations found in a text are replaced in that text only
+            text = COLUMN_SEPARATOR.join(self.expand_negations(x) if "n't" in x else x
+                                         for x in text.split(COLUMN_SEPARATOR))
+        text = self.joined_brackets.sub('', text)
+        text = self.joined_articles.sub(' ', text)
+        return self.joined_spaces.sub('', text)
+
+
+# The normalizer used by clean_text and add_special_chars
+text_normalizer = TextNormalizer()
@@ -2,6 +2,7 @@ import warnings, re
 import json
 
 import numpy as np
+import pandas as pd
 
 import matplotlib.pyplot as plt
 
@@ -9,14 +10,16 @@ from fuzzywuzzy import fuzz
 from collections import Counter
 
 from langdetect import detect
-from typing import Union, List, Tuple, Iterable
+from typing import Union, List, Optional, Tuple, Iterable
 
-def normalize_weights(scores:List[int]) -> np.ndarray:
+from .text_normalizer import text_normalizer
+
+def get_raw_weights(scores:Iterable[int]) -> np.ndarray:
     """
-    Get the weights from a list of scores, this dictates the sampling distribution to
-     be used when picking questions
+    Get the unnormalized weights from a list of scores, the weights of a sample are proportional to these
+     (see normalize_weights), so they can be kept per entry without knowing the other scores
     :param scores: the list of scores (could be positive or negative)
-    :returns: a list of weights between 0 and 1
+    :returns: an array of positive weights
     """
     weights = np.array(scores)
     # Assign weights for the words that were answered incorrectly or not seen yet.
@@ -27,12 +30,43 @@ def normalize_weights(scores:List[int]) -> np.ndarray:
     weights = np.where(weights > 0, -2/weights, weights)
     # Assign only small chance for the words that were answered correctly more than 10 times.
     weights = np.where(weights > -2/10, -0.01, weights)
+    return -weights
+
+def normalize_weights(scores:List[int]) -> np.ndarray:
+    """
+    Get the weights from a list of scores, this dictates the sampling distribution to
+     be used when picking questions
+    :param scores: the list of scores (could be positive or negative)
+    :returns: a list of weights between 0 and 1
+    """
+    weights = get_raw_weights(scores)
     return weights / np.sum(weights)
 
-def sample_entry(entry, keys):
-    """Randomly selects a key from the list of keys and returns the value of the key and the key itself."""
+def weighted_sample_without_replacement(weights:Iterable[float], size:int,
+                                        rng:np.random.Generator=None) -> np.ndarray:
+    """
+    Draws distinct items with probabilities proportional to their weights, in one vectorized pass (every item gets
+     the key Exp(1)/weight and the items with the smallest keys are drawn, which is the same as drawing them one
+     by one without replacement)
+    :param weights: the (unnormalized) weights of the items, the items with a weight of 0 are never drawn
+    :param size: the number of items to draw (less are drawn if there aren't enough items with a weight)
+    :param rng: the random generator to use, the global numpy generator if None
+    :returns: the indices of the drawn items, in the order they were drawn
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    candidates = np.flatnonzero(weights > 0)
+    size = min(size, len(candidates))
+    if size == 0:
+        return candidates[:0]
+    keys = (np.random if rng is None else rng).exponential(size=len(candidates)) / weights[candidates]
+    drawn = np.argpartition(keys, size - 1)[:size]
+    return candidates[drawn[np.argsort(keys[drawn])]]
+
+def sample_entry(entry, keys, rng:np.random.Generator=None):
+    """Randomly selects a key from the list of keys and returns the value of the key and the key itself
+    (with rng, or the global numpy generator if it's None)."""
     keys = [x for x in keys if entry[x] != '']
-    key = np.random.choice(keys)
+    key = (np.random if rng is None else rng).choice(keys)
     if len(keys)==1:
         return entry[key], ''
     return entry[key], key
@@ -43,13 +77,7 @@ def add_special_chars(answer:str) -> str:
      and since it's my application I decided to type 'a_' instead of 'ä' and this function
      will replace those instances for me
     """
-    special_chars = {'s':'ß', 'a':'ä', 'o':'ö', 'u':'ü', 
-                      'A':'Ä', 'O':'Ö', 'U':'Ü', 'S':'ẞ'}
-    for char in special_chars.keys():
-        # the special char is indicated by the english char proceeded
-        # by a '_'
-        answer = answer.replace(char + '_', special_chars[char])
-    return answer
+    return text_normalizer.add_special_chars(answer)
 
 def delete_list_indices(arr:List, indices:List[int]) -> List:
     """Deletes a list of indices from a list
@@ -88,20 +116,69 @@ def generate_id(digits:int, existing_ids:List[int]) -> int:
     :param digits: the number of digits for the id
     :param existing_ids: a list of ids already used
     :returns: a random id not found in the list of existing_ids
-    Note: for low 'number of digits to needed ids' ratio should be high for better efficiency
-     when generating the ids (so there's a low chance a randomly generated id is found in existing_ids)
     """
+    return int(generate_ids(digits, 1, existing_ids)[0])
+
+def generate_ids(digits:int, n_ids:int, existing_ids:Iterable[int]) -> np.ndarray:
+    """
+    Generate several distinct ids with a fixed number of digits in one go
+    :param digits: the number of digits for the ids
+    :param n_ids: the number of ids to generate
+    :param existing_ids: the ids already used (they won't be generated)
+    :returns: an array of n_ids random ids, all between 10**(digits-1) and 10**digits - 1
+    Note: the draws are vectorized and only the colliding ids are redrawn, for low 'number of digits to
+     needed ids' ratios most ids collide and the function gets slower
+    """
+    existing_ids = np.unique(to_id_array(existing_ids))
+    low, high = 10**(digits-1), 10**digits
     # If not enough ids are available throw and error
-    if len(existing_ids) > (10**digits)/2:
-        raise Exception('generate_id: the number of ids to be generated can\'t be covered by the specified number of digits')
-    # For simplicity the implementation is faster when the number of available ids is much larger than the number to be assigned
-    if len(existing_ids) > (10**digits)/100:
-        warnings.warn('generate_id: the number of ids to be generated is close to the number of available ids, for better efficiency increase the number of digits')
+    if len(existing_ids) + n_ids > (high - low)/2:
+        raise Exception('generate_ids: the number of ids to be generated can\'t be covered by the specified number of digits')
+    if len(existing_ids) + n_ids > (high - low)/100:
+        warnings.warn('generate_ids: the number of ids to be generated is close to the number of available ids, for better efficiency increase the number of digits')
+    new_ids = np.empty(0, dtype=np.int64)
     # We have the proper guards above to not worry about an open loop
-    while True:
-        random_id = int(10**digits * np.random.rand())
-        if random_id not in existing_ids:
-            return random_id
+    while len(new_ids) < n_ids:
+        draws = np.random.randint(low, high, size=n_ids - len(new_ids), dtype=np.int64)
+        draws = np.concatenate([new_ids, draws])
+        # Drop the ids drawn twice (keeping the drawing order) and the ones already used
+        _, first_draws = np.unique(draws, return_index=True)
+        draws = draws[np.sort(first_draws)]
+        new_ids = draws[~np.isin(draws, existing_ids)]
+    return new_ids
+
+def to_id_array(ids:Iterable[int]) -> np.ndarray:
+    """ Converts any iterable of ids (list, set, array, pandas series...) to an integer array"""
+    if isinstance(ids, (set, frozenset)) or not hasattr(ids, '__len__'):
+        ids = list(ids)
+    return np.asarray(ids, dtype=np.int64)
+
+def parse_ids(ids:Iterable, digits:int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converts a column of ids to integers and finds the missing ones
+    :param ids: the ids of the entries, empty values or numbers with less than the required digits
+     are considered missing
+    :param digits: the number of digits for the ids
+    :returns: a tuple with the integer ids (0 for the missing ones) and a boolean mask of the missing ids
+    """
+    ids = pd.to_numeric(pd.Series(ids, dtype=object).replace('', np.nan), errors='coerce')
+    ids = ids.fillna(0).astype(np.int64).values
+    return ids, ids < 10**(digits-1)
+
+def fill_missing_ids(ids:Iterable, digits:int, reserved_ids:Iterable[int]=()) -> np.ndarray:
+    """
+    Assigns new ids to the entries with a missing id
+    :param ids: the ids of the entries, empty values or numbers with less than the required digits
+     are considered missing
+    :param digits: the number of digits for the ids
+    :param reserved_ids: ids used elsewhere (e.g. other sheets) that shouldn't be assigned
+    :returns: an integer array with the same length as ids, with the missing ids filled
+    """
+    ids, missing = parse_ids(ids, digits)
+    if missing.any():
+        used_ids = np.concatenate([ids[~missing], to_id_array(reserved_ids)])
+        ids[missing] = generate_ids(digits, int(missing.sum()), used_ids)
+    return ids
 
 def matching(answer:str, target:str) -> bool:    
     """
@@ -119,7 +196,7 @@ def matching(answer:str, target:str) -> bool:
     # we'll use the fuzzywuzzy library to have some flexibility, but not too much
     return any([fuzz.ratio(answer, correct_answer) > 90 for correct_answer in correct_answers])
 
-def get_all_valid_answers(sentences:Union[str, List[str]], choices:List[Tuple[str, List[str]]]=[]):
+def get_all_valid_answers(sentences:Union[str, List[str]], choices:Optional[List[Tuple[str, List[str]]]]=None):
     """
     Decomposes an answer to all possible implied answers
     :param sentences: a list of valid answers
@@ -131,10 +208,9 @@ def get_all_valid_answers(sentences:Union[str, List[str]], choices:List[Tuple[st
         sentences = [sentences]
         words_with_slash = re.findall(r'[^ ]+/[^ ]+', sentences[0])    
         choices = [(x, x.split('/')) for x in words_with_slash]
-    if len(choices) == 0:
+    if not choices:
         return sentences
-    choice = choices[0]
-    choices.remove(choice)
+    choice, choices = choices[0], choices[1:]
     tmp = sentences
     sentences = []
     for sent in tmp:
@@ -150,28 +226,7 @@ def clean_text(text):
         - Change to lower case
         - Remove articles (a, an, and the)
     """
-    text = text.lower()
-    pairs2replace = {r"\[|\]|\.*|\?||\!":"",
-                        '\'re ':' are ',
-                        '\'s ':' is ',
-                        "won't":"will not",
-                        "’": "'",
-                        "'m":" am",
-                    }
-
-    for key, replacement in pairs2replace.items():
-        text = re.sub(key, replacement, text)
-    # Replace all the "not" abbreviations, e.g. doesn't -> does not
-    regex = re.compile(r"\b[A-Za-z]+n't\b")
-    matches = re.findall(regex, text)
-    for match in matches:
-        replacement = match.replace("n't", " not")
-        text = text.replace(match, replacement)
-    # Remove everything between parenthesis
-    text = re.sub(r"\([^()]*\)", '', text)
-    pattern = '|'.join(f'^{x}\s|\s{x}\s' for x in ['a', 'an', 'the'])
-    text = re.sub(pattern, ' ', text)
-    return text.strip()
+    return text_normalizer.clean(text)
 
 def detect_language(text:Union[List, str], lang_mapping_file:str='resources/lang_codes.json'):
     """ Detects the language of a list of texts or a string of texts"""
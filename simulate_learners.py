@@ -0,0 +1,28 @@
+import argparse
+
+from modules.learner_simulator import simulate, DEFAULT_RUN
+from modules.exercises.exercise import SAMPLING_POLICIES
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='Runs synthetic learners through the translation exercise (without '
+                                                 'the GUI) to compare the sampling policies')
+    parser.add_argument('--policies', nargs='*', default=SAMPLING_POLICIES, choices=SAMPLING_POLICIES)
+    parser.add_argument('--entries', type=int, default=DEFAULT_RUN['n_entries'], help='the number of entries')
+    parser.add_argument('--steps', type=int, default=DEFAULT_RUN['n_steps'], help='the number of questions per learner')
+    parser.add_argument('--learning-rate', type=float, default=DEFAULT_RUN['learning_rate'],
+                        help='the fraction of the gap to a perfect recall closed every time an entry is asked')
+    parser.add_argument('--initial-recall', type=float, nargs=2, default=DEFAULT_RUN['initial_recall'],
+                        metavar=('LOW', 'HIGH'), help='the range of the recall probabilities before the first question')
+    parser.add_argument('--repeats', type=int, default=4, help='the number of learners per policy')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None, help='the size of the process pool (all the CPUs by default)')
+    args = parser.parse_args()
+
+    runs = [{'policy':x, 'n_entries':args.entries, 'n_steps':args.steps, 'learning_rate':args.learning_rate,
+             'initial_recall':tuple(args.initial_recall)} for x in args.policies]
+    for summary in simulate(runs, args.repeats, args.seed, args.processes):
+        print(f"{summary['run']['policy']}: {summary['questions per second']:.0f} questions/s, "
+              f"steps to mastery: {summary['steps to mastery']}")
+        print(f"  {'step':>10}{'coverage':>10}{'recall':>10}{'mastered':>10}")
+        for values in zip(summary['steps'], summary['coverage'], summary['recall'], summary['mastered']):
+            print(f'  {values[0]:>10}' + ''.join(f'{x:>10.3f}' for x in values[1:]))
@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from modules.answer_evaluators import FuzzyEvaluator, AnswerKeyCache, match_answers, regrade_answers
+from modules.answer_evaluators.batch_evaluator import get_score_deltas
+from modules.support_classes.scores import ScoresHandler
+from modules.utils import get_raw_weights
+
+
+class DummyDBHandler:
+    def __init__(self):
+        self.entries = {
+            1:{'ID':1, 'Word_s':'Apfel', 'Word_p':'Äpfel', 'Word_fs':'', 'Word_fp':'',
+               'Translation':'apple, the fruit/snack', 'Translation_f':'', 'Alternative Forward':'pome',
+               'Alternative Backward':''},
+            2:{'ID':2, 'Word_s':'legen', 'Word_p':'', 'Word_fs':'', 'Word_fp':'',
+               'Translation':'to put/place the book/notebook', 'Translation_f':'to lay',
+               'Alternative Forward':'', 'Alternative Backward':''},
+        }
+        self.answer_keys = AnswerKeyCache()
+
+    def get_entry(self, entry_id):
+        return dict(self.entries[int(entry_id)])
+
+    def get_answer_key(self, entry_id, direction):
+        return self.answer_keys.get(entry_id, direction, self.get_entry)
+
+
+class TestBatchEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.db_handler = DummyDBHandler()
+        self.evaluator = FuzzyEvaluator()
+        rows = [
+            ('apple', 1, 'Forward', 'apple, the fruit/snack'), ('The snack', 1, 'Forward', 'apple, the fruit/snack'),
+            ('apples', 1, 'Forward', 'apple, the fruit/snack'), ('pear', 1, 'Forward', 'apple, the fruit/snack'),
+            ('pome', 1, 'Forward', 'apple, the fruit/snack'), ('A_pfel', 1, 'Backward', 'Äpfel'),
+            ('apfel', 1, 'Backward', 'Äpfel'), ('to place the notebok', 2, 'Forward', 'to put/place the book/notebook'),
+            ('to lay', 2, 'Forward', 'to put/place the book/notebook'), ('to lay', 2, 'Forward', 'to lay'),
+            ('', 2, 'Forward', 'to lay'), ('legen', 2, 'Backward', 'legen'),
+        ]
+        # Every answer a few times, in a shuffled order
+        rows = [rows[x] for x in np.random.default_rng(0).permutation(np.tile(np.arange(len(rows)), 3))]
+        self.answers, self.ids, self.directions, self.targets = [list(x) for x in zip(*rows)]
+
+    def test_match_answers(self):
+        expected = [self.evaluator.match_answer(x, t, self.db_handler.get_answer_key(i, d))
+                    for x, i, d, t in zip(self.answers, self.ids, self.directions, self.targets)]
+        decisions = match_answers(self.answers, self.ids, self.directions, self.db_handler, self.targets)
+        self.assertEqual(decisions.tolist(), expected)
+        # The same decisions in a pool of processes
+        decisions = match_answers(self.answers, self.ids, self.directions, self.db_handler, self.targets,
+                                  processes=2, min_pool_size=0)
+        self.assertEqual(decisions.tolist(), expected)
+        # Without the targets, the answers can match any target of their direction
+        decisions = match_answers(['to lay', 'to put the book', 'pear'], [2, 2, 1], ['Forward'] * 3, self.db_handler)
+        self.assertEqual(decisions.tolist(), [True, True, False])
+        self.assertEqual(match_answers([], [], [], self.db_handler).tolist(), [])
+
+    def test_regrade_answers(self):
+        ids, deltas = get_score_deltas([1, 2, 1, 3, 2], [False, True, True, True, False],
+                                       [True, True, False, False, True])
+        self.assertEqual(ids.tolist(), [2, 3])
+        self.assertEqual(deltas.tolist(), [2, -2])
+
+        scores_dir = tempfile.mkdtemp()
+        try:
+            scores = ScoresHandler('scores.json', [1, 2], scores_dir=scores_dir)
+            scores.build_sampler([1, 2])
+            scores.update(1, False)
+            scores.update(2, False)
+            # The first answer of 1 was wrong, and the target of 2 changed since its answer
+            self.db_handler.entries[2]['Translation'] = 'to place'
+            decisions = regrade_answers(['apples', 'to place'], [1, 2], ['Forward'] * 2, self.db_handler,
+                                        previous=[False, False], scores=scores)
+            self.assertEqual(decisions.tolist(), [True, True])
+            self.assertEqual(scores.scores.get_scores([1, 2]).tolist(), [1, 1])
+            self.assertEqual(scores.sampler.weights.tolist(), get_raw_weights([1, 1]).tolist())
+            # The scores are saved, and not overridden by the answers of the log
+            self.assertEqual(ScoresHandler('scores.json', [1, 2], scores_dir=scores_dir).scores.get_scores().tolist(),
+                             [1, 1])
+        finally:
+            shutil.rmtree(scores_dir)
@@ -2,7 +2,8 @@ import unittest
 
 from fuzzywuzzy import fuzz
 
-from modules.answer_evaluators import FuzzyEvaluator
+from modules.answer_evaluators import FuzzyEvaluator, AnswerKey, AnswerKeyCache, AnswerAutomaton
+from modules.answer_evaluators.indel_scorer import bounded_indel_distance, length_fits, ratio_exceeds
 
 
 class TestDenseNet(unittest.TestCase):
@@ -37,4 +38,81 @@ class TestDenseNet(unittest.TestCase):
                ["apple", "banana", "cherry", "peach"]
 
         assert self.evaluator.get_all_valid_answers("I love/hate python/php") == \
-               ["I love python", "I hate python", "I love php", "I hate php"]
\ No newline at end of file
+               ["I love python", "I hate python", "I love php", "I hate php"]
+
+    def test_answer_key(self):
+        entry = {'ID': 1, 'Word_s': 'Apfel', 'Word_p': 'Äpfel', 'Word_fs': '', 'Word_fp': '',
+                 'Translation': 'apple, the fruit/snack', 'Translation_f': '', 'Alternative Forward': 'pome;pome',
+                 'Alternative Backward': ''}
+        answer_key = AnswerKey(entry, 'Forward')
+        self.assertEqual([x.text for x in answer_key.get_answers('apple, the fruit/snack')],
+                         ['apple', 'fruit/snack', 'pome'])
+        # The compiled key gives the same decisions as the target, and accepts the alternatives
+        for answer in ['apple', 'The snack', 'apples', 'pear']:
+            self.assertEqual(self.evaluator.match_answer(answer, 'apple, the fruit/snack', answer_key),
+                             self.evaluator.match_answer(answer, 'apple, the fruit/snack'))
+        self.assertTrue(self.evaluator.match_answer('pome', 'apple, the fruit/snack', answer_key))
+        self.assertTrue(self.evaluator.match_answer('A_pfel', 'Äpfel', AnswerKey(entry, 'Backward')))
+
+        # The least recently used keys are dropped first
+        cache = AnswerKeyCache(max_size=2)
+        get_entry = lambda x: {**entry, 'ID': x}
+        first = cache.get(1, 'Forward', get_entry)
+        cache.get(2, 'Forward', get_entry)
+        self.assertIs(cache.get(1, 'Forward', get_entry), first)
+        cache.get(3, 'Forward', get_entry)
+        self.assertEqual(list(cache.keys), [(1, 'Forward'), (3, 'Forward')])
+        cache.invalidate(1)
+        self.assertEqual(len(cache), 1)
+
+    def test_answer_automaton(self):
+        # The same answers as the expansion of the alternatives, stripped like them
+        for target in ['I love/hate python/php', 'put/place the book/notebook', 'the//a', '/put/ran a', 'go run//']:
+            self.assertEqual(sorted(AnswerAutomaton(target).expand()),
+                             sorted(x.strip() for x in self.evaluator.get_all_valid_answers(target)))
+        # The same decisions as fuzz.ratio (with python-Levenshtein) on every expanded answer
+        automaton = AnswerAutomaton('I love/hate python/php')
+        for answer in ['i hate php', 'I hate phpp', 'I hate', 'I loved python', 'I hate python/php', '']:
+            self.assertEqual(automaton.matches(answer),
+                             any(fuzz.ratio(answer, x) > 90 for x in automaton.expand()), answer)
+        self.assertTrue(AnswerAutomaton('go run//').matches('go'))
+        self.assertFalse(AnswerAutomaton('go run//').matches('go '))
+        self.assertTrue(AnswerAutomaton('').matches(''))
+        self.assertFalse(AnswerAutomaton('apple').matches(''))
+        self.assertFalse(AnswerAutomaton('a/b', expand_slashes=False).matches('a'))
+        # The size of the automaton is linear in the number of words with alternatives, not exponential
+        long_phrase = ' '.join(['put/place/set'] * 40)
+        automaton = AnswerAutomaton(long_phrase)
+        self.assertLess(len(automaton.edges), 1000)
+        self.assertTrue(automaton.matches(' '.join(['place'] * 40)))
+        self.assertFalse(automaton.matches(' '.join(['pull'] * 40)))
+
+    def test_mutable_default(self):
+        sentences = ['a/b c']
+        self.assertEqual(self.evaluator.get_all_valid_answers(sentences, [('a/b', ['a', 'b'])]), ['a c', 'b c'])
+        self.assertEqual(self.evaluator.get_all_valid_answers(['x y']), ['x y'])
+
+    def test_indel_scorer(self):
+        self.assertEqual(bounded_indel_distance('kitten', 'sitting', 10), 5)
+        self.assertEqual(bounded_indel_distance('kitten', 'sitting', 5), 5)
+        self.assertIsNone(bounded_indel_distance('kitten', 'sitting', 4))
+        self.assertEqual(bounded_indel_distance('', 'abc', 3), 3)
+        self.assertIsNone(bounded_indel_distance('abcdefgh', 'hgfedcba', 3))
+        # The lengths alone: 'apple' (5) can match answers from 5 to 6 chars, 'notebook' (8) from 7 to 9
+        self.assertTrue(length_fits(5, 6))
+        self.assertFalse(length_fits(4, 5))
+        self.assertFalse(length_fits(7, 5))
+        self.assertTrue(length_fits(8, 9))
+        self.assertFalse(length_fits(8, 10))
+        self.assertTrue(length_fits(8, 2, 20))
+        # The same decisions as fuzz.ratio, where difflib finds the longest common subsequence
+        pairs = [('apple', 'apple'), ('apples', 'apple'), ('apple', 'aple'), ('banana', 'bananas'), ('', ''),
+                 ('', 'a'), ('osterreich', 'österreich'), ('the notebook', 'the noteboook'), ('abcd', 'dcba'),
+                 ('to leave something behind', 'to leave somethin behind'), ('a' * 40, 'a' * 44)]
+        for answer, target in pairs:
+            self.assertEqual(ratio_exceeds(answer, target), fuzz.ratio(answer, target) > 90, (answer, target))
+            self.assertEqual(ratio_exceeds(answer, target, 80), fuzz.ratio(answer, target) > 80, (answer, target))
+        # The plain targets and the automata give the same decisions
+        for answer in ['notebook', 'notebok', 'note', 'notebooks', 'book', 'the notebook']:
+            self.assertEqual(AnswerAutomaton('notebook').matches(answer),
+                             AnswerAutomaton('notebook/notebook').matches(answer))
@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+
+from modules.learner_simulator import simulate_run, simulate
+
+
+class TestLearnerSimulator(unittest.TestCase):
+    def test_simulate_run(self):
+        run = {'n_entries':20, 'n_steps':400, 'n_checkpoints':4, 'seed':3}
+        metrics = simulate_run(run)
+        self.assertEqual(metrics['steps'], [100, 200, 300, 400])
+        self.assertEqual(metrics['coverage'], sorted(metrics['coverage']))
+        self.assertEqual(metrics['recall'], sorted(metrics['recall']))
+        self.assertGreater(metrics['questions per second'], 0)
+        # The runs are reproducible with their seed
+        other = simulate_run(run)
+        for key in ['coverage', 'recall', 'mastered', 'steps to mastery']:
+            self.assertEqual(metrics[key], other[key])
+        self.assertNotEqual(metrics['recall'], simulate_run({**run, 'seed':4})['recall'])
+        # The runs don't use (or change) the global numpy generator
+        for policy in ['Weighted', 'Spaced Repetition']:
+            np.random.seed(1)
+            repeated = simulate_run({**run, 'policy':policy})
+            self.assertEqual(np.random.random(), np.random.RandomState(1).random_sample())
+            np.random.seed(2)
+            self.assertEqual(simulate_run({**run, 'policy':policy})['recall'], repeated['recall'])
+
+    def test_simulate(self):
+        runs = [{'policy':x, 'n_entries':10, 'n_steps':200, 'n_checkpoints':2}
+                for x in ['Weighted', 'Spaced Repetition']]
+        summaries = simulate(runs, n_repeats=2, seed=0, processes=2)
+        self.assertEqual([x['run']['policy'] for x in summaries], ['Weighted', 'Spaced Repetition'])
+        self.assertEqual(len(summaries[0]['coverage']), 2)
+        # Every entry is asked before any entry comes back with the spaced repetition
+        self.assertEqual(summaries[1]['coverage'], [1, 1])
+        self.assertEqual(simulate(runs, n_repeats=2, seed=0, processes=2)[0]['recall'], summaries[0]['recall'])
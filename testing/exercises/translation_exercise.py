@@ -1,10 +1,23 @@
+import os
+import shutil
+import tempfile
 import unittest
 
+import numpy as np
+
 from modules.exercises import TranslationExercise
-from modules.answer_evaluators import FuzzyEvaluator
+from modules.answer_evaluators import FuzzyEvaluator, AnswerKey
+from modules.exercises.question_queue import QuestionQueue
+from modules.utils import weighted_sample_without_replacement
 
 
 class TestTranslationExercise(unittest.TestCase):
+    def tearDown(self):
+        # The evaluated answers are logged as they're scored, they shouldn't be left in the scores folder
+        log_path = os.path.join('resources', 'scores', 'scores.log')
+        if os.path.exists(log_path):
+            os.remove(log_path)
+
     def test_init(self):
         exercise = TranslationExercise(scores_path='scores.json', loaded_ids=[1, 2, 3], direction='Forward')
         self.assertEqual(exercise.direction, 'Forward')
@@ -20,10 +33,13 @@ class TestTranslationExercise(unittest.TestCase):
     def test_sample_question(self):
         # Set up mock db_handler
         class DummyDBHandler:
-            def sample_random_entry(self, ids, weights):
+            def get_entry(self, entry_id):
                 return {'ID': 1, 'Word_s': 'apple', 'Word_p': 'apples', 'Word_fs': '', 'Word_fp': '',
                         'Translation': 'manzana', 'Translation_f': ''}
 
+            def get_answer_key(self, entry_id, direction):
+                return AnswerKey(self.get_entry(entry_id), direction)
+
         exercise = TranslationExercise(scores_path='scores.json', loaded_ids=[1, 2, 3], direction='Forward')
         question = exercise.sample_question(DummyDBHandler())
         self.assertEqual(question, {'question': 'apple', 'ID': 1, 'target': 'manzana'})
@@ -63,7 +79,7 @@ class TestTranslationExercise(unittest.TestCase):
     def test_evaluate_answer(self):
         # Set up mock evaluator
         class DummyEvaluator:
-            def match_answer(self, answer, target):
+            def match_answer(self, answer, target, answer_key=None):
                 return answer == target
 
         exercise = TranslationExercise(scores_path='scores.json', loaded_ids=[1, 2, 3], direction='Forward')
@@ -71,4 +87,55 @@ class TestTranslationExercise(unittest.TestCase):
         exercise.evaluator = DummyEvaluator()
 
         self.assertTrue(exercise.evaluate_answer('manzana'))
-        self.assertFalse(exercise.evaluate_answer('banana'))
\ No newline at end of file
+        self.assertFalse(exercise.evaluate_answer('banana'))
+
+    def test_question_queue(self):
+        exercise = TranslationExercise(scores_path='scores.json', loaded_ids=[1, 2, 3, 4, 5], direction='Forward')
+        exercise.scores.remove_id(5)
+        queue = QuestionQueue(exercise.sampler, size=3, rng=np.random.default_rng(0))
+        # A batch holds distinct entries, the deleted entry is never drawn
+        batch = [queue.pop() for _ in range(3)]
+        self.assertEqual(len(set(batch)), 3)
+        self.assertEqual(len(queue), 0)
+        self.assertNotIn(5, batch + [queue.pop() for _ in range(30)])
+        # Only the invalidated entry is dropped from the queue
+        queue.refill()
+        pending = list(queue.pending)
+        queue.invalidate(pending[0])
+        self.assertEqual(queue.pending, pending[1:])
+
+        # The drawing frequencies follow the weights
+        rng = np.random.default_rng(0)
+        weights = np.array([1, 0, 2, 5])
+        firsts = [weighted_sample_without_replacement(weights, 2, rng)[0] for _ in range(8000)]
+        frequencies = np.bincount(firsts, minlength=4) / len(firsts)
+        np.testing.assert_allclose(frequencies, weights / weights.sum(), atol=0.02)
+        self.assertEqual(sorted(weighted_sample_without_replacement(weights, 10, rng).tolist()), [0, 2, 3])
+
+        # The answered and deleted entries are dropped from the queue of the exercise
+        exercise.queue.refill()
+        exercise.update_score(exercise.queue.pending[0], True)
+        exercise.remove_entry(exercise.queue.pending[0])
+        self.assertEqual(len(exercise.queue), 2)
+        self.assertEqual(len(exercise.sampled_ids), 4)
+
+    def test_spaced_repetition(self):
+        exercise = TranslationExercise(scores_path='scores.json', loaded_ids=[1, 2, 3], direction='Forward',
+                                       policy='Spaced Repetition')
+        # Every new entry is asked once before an entry comes back
+        asked = []
+        for _ in range(3):
+            asked.append(exercise.next_question_id())
+            exercise.update_score(asked[-1], True)
+        self.assertEqual(sorted(asked), [1, 2, 3])
+        with self.assertRaises(ValueError):
+            TranslationExercise(scores_path='scores.json', loaded_ids=[1, 2, 3], direction='Forward', policy='Other')
+        # The answers given with the weighted policy move the entries in the schedule too
+        scores_dir = tempfile.mkdtemp()
+        exercise = TranslationExercise('scores.json', [1, 2, 3], 'Forward', scores_dir=scores_dir)
+        exercise.update_score(2, True)
+        exercise.save_scores()
+        exercise = TranslationExercise('scores.json', [1, 2, 3], 'Forward', 'Spaced Repetition', scores_dir=scores_dir)
+        self.assertEqual([exercise.scores.scheduler.entries[x][0] for x in [1, 2, 3]], [0, 1, 0])
+        self.assertNotEqual(exercise.next_question_id(), 2)
+        shutil.rmtree(scores_dir)
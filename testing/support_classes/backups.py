@@ -0,0 +1,64 @@
+import datetime
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from modules.support_classes.backups import BackupManager, STAMP_FORMAT
+
+
+class TestBackupManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file = os.path.join(self.tmp_dir, 'database.xlsx')
+        with open(self.file, 'wb') as f:
+            f.write(b'first version')
+        self.backup_dir = os.path.join(self.tmp_dir, 'backup')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_backup(self):
+        manager = BackupManager(self.backup_dir)
+        first = manager.backup(self.file, prune_in_background=False)
+        self.assertIsNotNone(first)
+        # The same content isn't backed up twice
+        self.assertIsNone(manager.backup(self.file, prune_in_background=False))
+        with open(self.file, 'wb') as f:
+            f.write(b'second version')
+        second = manager.backup(self.file)
+        # The application can exit while the old backups are pruned
+        self.assertTrue(manager.prune_thread.daemon)
+        manager.wait()
+        self.assertEqual(sorted(os.listdir(self.backup_dir)), sorted([os.path.basename(first), os.path.basename(second)]))
+        with open(second, 'rb') as f:
+            self.assertEqual(f.read(), b'second version')
+
+    def test_compression(self):
+        manager = BackupManager(self.backup_dir, compress=True)
+        backup_path = manager.backup(self.file, prune_in_background=False)
+        self.assertTrue(backup_path.endswith('.gz'))
+        with gzip.open(backup_path, 'rb') as f:
+            self.assertEqual(f.read(), b'first version')
+        self.assertIsNone(manager.backup(self.file, prune_in_background=False))
+
+    def test_retention(self):
+        manager = BackupManager(self.backup_dir, keep_last=2, keep_daily=3, keep_weekly=2)
+        os.makedirs(self.backup_dir)
+        now = datetime.datetime(2024, 3, 20, 18)
+        # Two backups a day for 30 days, plus one with the old naming
+        times = [now - datetime.timedelta(hours=12 * x) for x in range(60)]
+        for idx, time in enumerate(times):
+            name = f'{time.strftime(STAMP_FORMAT)}_{idx:016x}_database.xlsx'
+            open(os.path.join(self.backup_dir, name), 'w').close()
+        open(os.path.join(self.backup_dir, '2023-01-01 10-00-00.5_database.xlsx'), 'w').close()
+        open(os.path.join(self.backup_dir, 'unrelated.txt'), 'w').close()
+        self.assertEqual(len(manager.list_backups('database.xlsx')), 61)
+
+        manager.prune('database.xlsx')
+        kept = [x[0] for x in manager.list_backups('database.xlsx')]
+        # The last two, the newest of the last three days, and the newest of the last two weeks
+        expected = [times[0], times[1], times[2], times[4], datetime.datetime(2024, 3, 17, 18)]
+        self.assertEqual(kept, expected)
+        self.assertTrue(os.path.exists(os.path.join(self.backup_dir, 'unrelated.txt')))
@@ -0,0 +1,29 @@
+import unittest
+
+from modules.support_classes.category_index import CategoryIndex
+
+
+class TestCategoryIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = CategoryIndex(['noun', 'verb', 'noun, food', 'phrase, greeting', 'Noun, people', ''])
+
+    def test_match(self):
+        self.assertEqual(self.index.match('noun').tolist(), [True, False, True, False, True, False])
+        self.assertEqual(self.index.match(' FOOD ').tolist(), [False, False, True, False, False, False])
+        self.assertEqual(self.index.match('missing').tolist(), [False] * 6)
+
+    def test_evaluate(self):
+        self.assertIsNone(self.index.evaluate(''))
+        self.assertEqual(self.index.evaluate('noun & !food').tolist(), [True, False, False, False, True, False])
+        self.assertEqual(self.index.evaluate('verb | phrase').tolist(), [False, True, False, True, False, False])
+        self.assertEqual(self.index.evaluate('!(noun | verb) & !greeting').tolist(),
+                         [False, False, False, False, False, True])
+        for expression in ['noun &', '(noun', 'noun verb)', '| noun']:
+            with self.assertRaises(ValueError):
+                self.index.evaluate(expression)
+
+    def test_select(self):
+        self.assertEqual(self.index.select([''], ['phrase']).tolist(), [True, True, True, False, True, True])
+        self.assertEqual(self.index.select(['noun', 'food'], []).tolist(), [False, False, True, False, False, False])
+        self.assertEqual(self.index.select(['noun | verb'], ['people']).tolist(),
+                         [True, True, True, False, False, False])
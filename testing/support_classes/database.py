@@ -0,0 +1,267 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from modules.support_classes.database import DatabaseHandler
+from modules.utils.excel_ops import save_to_excel, get_excel_df, get_cache_path, read_excel_cache
+from modules.utils.excel_ops import deserialize_df, stream_sheets_to_excel
+
+
+def make_sheet(ids, categories):
+    n = len(ids)
+    return pd.DataFrame({
+        'ID': ids,
+        'Word_s': [f'wort{i}' for i in range(n)],
+        'Word_p': [''] * n,
+        'Word_fs': [''] * n,
+        'Word_fp': [''] * n,
+        'Category': categories,
+        'Translation': [f'word{i}' for i in range(n)],
+        'Translation_f': [''] * n,
+        'Alternative Forward': [''] * n,
+        'Alternative Backward': [''] * n,
+    })
+
+
+class TestDatabaseHandler(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        # The backups are written relative to the working directory
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        self.excel_file = os.path.join(self.tmp_dir, 'database.xlsx')
+        save_to_excel(make_sheet([11111111, 22222222, 33333333, 44444444],
+                                 ['noun', 'verb', 'noun, food', 'phrase']), self.excel_file, 'A1')
+        save_to_excel(make_sheet([55555555, 66666666], ['adj', 'noun']), self.excel_file, 'A2')
+        self.db_handler = DatabaseHandler(self.excel_file, 'A1')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def test_id_index(self):
+        self.assertEqual(self.db_handler.get_row_label(33333333), 2)
+        self.db_handler.set_active_df('A2')
+        self.assertEqual(self.db_handler.get_row_label(66666666), 1)
+        with self.assertRaises(KeyError):
+            self.db_handler.get_row_label(33333333)
+
+    def test_delete_entry(self):
+        self.db_handler.delete_entry(22222222)
+        self.assertNotIn(22222222, self.db_handler.active_df['ID'].tolist())
+        with self.assertRaises(KeyError):
+            self.db_handler.get_row_label(22222222)
+        # The entries after the deleted one should still be reachable
+        self.db_handler.set_translation_target(44444444, 'word3', 'new word')
+        self.assertEqual(self.db_handler.active_df.at[self.db_handler.get_row_label(44444444), 'Translation'],
+                         'new word')
+        self.db_handler.delete_entry(44444444)
+        self.assertEqual(self.db_handler.active_df['ID'].tolist(), [11111111, 33333333])
+
+    def test_add_alternative_translation(self):
+        self.assertTrue(self.db_handler.add_alternative_translation(33333333, 'meal', 'Forward'))
+        self.assertTrue(self.db_handler.add_alternative_translation(33333333, 'dish', 'Forward'))
+        self.assertEqual(self.db_handler.active_df.at[2, 'Alternative Forward'], 'meal;dish')
+        self.assertFalse(self.db_handler.add_alternative_translation(33333333, 'a, b', 'Forward'))
+
+    def test_answer_key(self):
+        answer_key = self.db_handler.get_answer_key(33333333, 'Forward')
+        self.assertEqual([x.text for x in answer_key.get_answers('word2')], ['word2'])
+        self.assertIs(self.db_handler.get_answer_key(33333333, 'Forward'), answer_key)
+        # The edits of the entry drop its keys, the new target and the alternatives are in the next key
+        self.db_handler.add_alternative_translation(33333333, 'The meal', 'Forward')
+        self.db_handler.set_translation_target(33333333, 'word2', 'dish/plate')
+        answer_key = self.db_handler.get_answer_key(33333333, 'Forward')
+        self.assertEqual([x.text for x in answer_key.get_answers('dish/plate')], ['dish/plate', 'meal'])
+        answer_key = self.db_handler.get_answer_key(33333333, 'Backward')
+        self.assertEqual([x.text for x in answer_key.get_answers('wort2')], ['wort2'])
+
+    def test_sample_random_entry(self):
+        entry = self.db_handler.sample_random_entry([11111111, 44444444], [0, 1])
+        self.assertEqual(entry['Word_s'], 'wort3')
+
+    def test_apply_filter(self):
+        self.db_handler.apply_filter('Forward Translate', 0, [''], ['phrase'])
+        self.assertEqual(sorted(self.db_handler.used_ids), [11111111, 22222222, 33333333])
+        self.db_handler.apply_filter('Forward Translate', 2, ['noun'], [''])
+        self.assertEqual(sorted(self.db_handler.used_ids), [11111111, 33333333])
+        self.db_handler.apply_filter('Forward Translate', 1, ['noun | verb'], ['food'])
+        self.assertIn(self.db_handler.used_ids[0], [11111111, 22222222])
+        # The filter should follow the deleted entries
+        self.db_handler.delete_entry(11111111)
+        self.db_handler.apply_filter('Forward Translate', 0, ['noun'], [])
+        self.assertEqual(self.db_handler.used_ids, [33333333])
+
+    def test_filter_without_categories(self):
+        # e.g. a sheet of abbreviations, the filters are ignored
+        sheet = pd.DataFrame({'ID':[12345678, 23456789], 'Word':['usw.', 'z.B.'],
+                              'Abbreviation':['usw.', 'z.B.'], 'Meaning':['und so weiter', 'zum Beispiel']})
+        save_to_excel(sheet, self.excel_file, 'Abkurzen')
+        db_handler = DatabaseHandler(self.excel_file, 'Abkurzen')
+        db_handler.apply_filter('Forward Translate', 0, [''], [''])
+        self.assertEqual(sorted(db_handler.used_ids), [12345678, 23456789])
+        with self.assertWarns(UserWarning):
+            db_handler.apply_filter('Forward Translate', 0, ['noun'], [])
+        self.assertEqual(sorted(db_handler.used_ids), [12345678, 23456789])
+        self.assertEqual(len(db_handler.get_matching_indices('noun')), 0)
+
+    def test_missing_ids(self):
+        sheet = make_sheet(['', 12345678, '', 42], ['noun'] * 4)
+        save_to_excel(sheet, self.excel_file, 'A3')
+        db_handler = DatabaseHandler(self.excel_file, 'A3')
+        ids = db_handler.active_df['ID'].tolist()
+        self.assertEqual(ids[1], 12345678)
+        self.assertTrue(all(10**7 <= x < 10**8 for x in ids))
+        # The new IDs shouldn't collide with the ones in this or the other sheets
+        all_ids = [x for name in db_handler.sheet_names for x in db_handler.get_sheet(name)['ID'].tolist()]
+        self.assertEqual(len(all_ids), len(set(all_ids)))
+        self.assertEqual(db_handler.get_row_label(ids[3]), 3)
+
+    def test_excel_cache(self):
+        cache_path = get_cache_path(self.excel_file)
+        self.assertTrue(os.path.exists(cache_path))
+        cached = read_excel_cache(self.excel_file)
+        self.assertEqual(list(cached.keys()), ['A1', 'A2'])
+        self.assertTrue(deserialize_df(cached['A1']).equals(get_excel_df(self.excel_file, 'A1')))
+        # Changing the file should make the cache stale
+        save_to_excel(make_sheet([77777777], ['verb']), self.excel_file, 'A3')
+        self.assertIsNone(read_excel_cache(self.excel_file))
+        db_handler = DatabaseHandler(self.excel_file, 'A3')
+        self.assertEqual(db_handler.active_df['ID'].tolist(), [77777777])
+        self.assertEqual(list(read_excel_cache(self.excel_file).keys()), ['A1', 'A2', 'A3'])
+        # Saving the database refreshes the cache
+        db_handler.delete_entry(77777777)
+        db_handler.save_database()
+        self.assertEqual(len(deserialize_df(read_excel_cache(self.excel_file)['A3'])), 0)
+
+    def test_lazy_loading(self):
+        self.assertEqual(list(self.db_handler.database.keys()), ['A1'])
+        self.assertEqual(self.db_handler.sheet_names, ['A1', 'A2'])
+        db_handler = DatabaseHandler(self.excel_file, 'A2', memory_budget=0)
+        db_handler.set_active_df('A1')
+        # Only the active sheet fits in the budget
+        self.assertEqual(list(db_handler.database.keys()), ['A1'])
+        # Modified sheets stay in memory until they're saved
+        db_handler.delete_entry(11111111)
+        db_handler.set_active_df('A2')
+        self.assertEqual(list(db_handler.database.keys()), ['A1', 'A2'])
+        db_handler.set_active_df('A1')
+        self.assertNotIn(11111111, db_handler.used_ids)
+        # Unknown sheets fall back to the first one
+        with self.assertWarns(UserWarning):
+            db_handler.set_active_df('B1')
+        self.assertEqual(db_handler.active_sheet, 'A1')
+
+    def test_save_database(self):
+        # Nothing changed, so nothing should be written (not even a backup)
+        mtime = os.stat(self.excel_file).st_mtime_ns
+        self.db_handler.save_database()
+        self.assertEqual(os.stat(self.excel_file).st_mtime_ns, mtime)
+        self.assertFalse(os.path.exists('backup'))
+        # Only the modified sheets are written
+        self.db_handler.add_alternative_translation(11111111, 'wording', 'Backward')
+        self.db_handler.set_active_df('A2')
+        self.db_handler.delete_entry(55555555)
+        self.assertEqual(self.db_handler.modified_sheets, {'A1', 'A2'})
+        self.db_handler.save_database()
+        self.assertEqual(self.db_handler.modified_sheets, set())
+        self.assertEqual(len(os.listdir('backup')), 1)
+        self.assertEqual(get_excel_df(self.excel_file, 'A1').at[0, 'Alternative Backward'], 'wording')
+        self.assertEqual(get_excel_df(self.excel_file, 'A2')['ID'].tolist(), [66666666])
+        self.assertEqual(DatabaseHandler(self.excel_file, 'A2').active_df['ID'].tolist(), [66666666])
+        self.assertTrue(self.db_handler.storage.journal.is_empty())
+
+    def test_saved_format(self):
+        # The file is streamed as a whole, the sheets that weren't modified should be kept as they were
+        a1 = get_excel_df(self.excel_file, 'A1')
+        self.db_handler.set_active_df('A2')
+        self.db_handler.delete_entry(55555555)
+        self.db_handler.save_database()
+        pd.testing.assert_frame_equal(get_excel_df(self.excel_file, 'A1'), a1)
+        wb = load_workbook(self.excel_file)
+        self.assertEqual(wb.sheetnames, ['A1', 'A2'])
+        for ws in wb.worksheets:
+            self.assertFalse(ws.sheet_view.showGridLines)
+            self.assertTrue(all(cell.style == 'BlueHeaderCentered' for cell in ws[1]))
+            self.assertTrue(all(cell.style == 'BodyLeft' for row in ws.iter_rows(min_row=2) for cell in row))
+
+    def test_interrupted_export(self):
+        # A write that stops halfway leaves the previous file as it was, without a temporary file
+        a1 = get_excel_df(self.excel_file, 'A1')
+        dfs = {'A1':make_sheet([1], ['noun']), 'A2':make_sheet([2], ['noun'])}
+        with mock.patch('modules.utils.excel_ops.stream_sheet', side_effect=[None, RuntimeError('killed')]):
+            with self.assertRaises(RuntimeError):
+                stream_sheets_to_excel(dfs, self.excel_file)
+        pd.testing.assert_frame_equal(get_excel_df(self.excel_file, 'A1'), a1)
+        self.assertFalse(os.path.exists(self.excel_file + '.tmp'))
+        stream_sheets_to_excel(dfs, self.excel_file)
+        self.assertEqual(get_excel_df(self.excel_file, 'A2')['ID'].tolist(), [2])
+        self.assertFalse(os.path.exists(self.excel_file + '.tmp'))
+
+    def test_interrupted_compaction(self):
+        self.db_handler.delete_entry(33333333)
+        self.db_handler.close()
+        # The compaction of the journal is killed while streaming the file
+        with mock.patch('modules.utils.excel_ops.stream_sheet', side_effect=RuntimeError('killed')):
+            with self.assertWarns(UserWarning):
+                DatabaseHandler(self.excel_file, 'A1').wait_for_compaction()
+        self.assertEqual(get_excel_df(self.excel_file, 'A1')['ID'].tolist(),
+                         [11111111, 22222222, 33333333, 44444444])
+        # e.g. the temporary file of a write killed before the file was replaced
+        open(self.excel_file + '.tmp', 'wb').close()
+        db_handler = DatabaseHandler(self.excel_file, 'A1')
+        db_handler.wait_for_compaction()
+        self.assertEqual(get_excel_df(self.excel_file, 'A1')['ID'].tolist(), [11111111, 22222222, 44444444])
+        self.assertTrue(db_handler.storage.journal.is_empty())
+        self.assertFalse(os.path.exists(self.excel_file + '.tmp'))
+
+    def test_journal(self):
+        self.db_handler.add_alternative_translation(11111111, 'wording', 'Forward')
+        self.db_handler.set_translation_target(22222222, 'word1', 'other word')
+        self.db_handler.delete_entry(33333333)
+        # Closing doesn't write the Excel file, the edits are in the journal
+        mtime = os.stat(self.excel_file).st_mtime_ns
+        self.db_handler.close()
+        self.assertEqual(os.stat(self.excel_file).st_mtime_ns, mtime)
+        self.assertEqual(len(self.db_handler.storage.journal.read()), 3)
+        # The next session replays the journal and writes it to the Excel file
+        db_handler = DatabaseHandler(self.excel_file, 'A1')
+        db_handler.wait_for_compaction()
+        self.assertTrue(db_handler.storage.journal.is_empty())
+        for df in [db_handler.active_df, get_excel_df(self.excel_file, 'A1')]:
+            self.assertEqual(df['ID'].tolist(), [11111111, 22222222, 44444444])
+            self.assertEqual(df['Alternative Forward'].tolist(), ['wording', '', ''])
+            self.assertEqual(df['Translation'].tolist(), ['word0', 'other word', 'word3'])
+        # Replaying records that already reached the Excel file changes nothing
+        db_handler.storage.journal.append({'op':'set', 'sheet':'A1', 'id':11111111, 'column':'Alternative Forward',
+                                   'value':'wording'})
+        db_handler.storage.journal.append({'op':'delete', 'sheet':'A1', 'id':33333333})
+        with self.assertWarns(UserWarning):
+            db_handler = DatabaseHandler(self.excel_file, 'A1')
+        db_handler.wait_for_compaction()
+        self.assertEqual(db_handler.active_df['Alternative Forward'].tolist(), ['wording', '', ''])
+
+    def test_sqlite_storage(self):
+        sqlite_file = os.path.join(self.tmp_dir, 'database.sqlite')
+        self.db_handler.export_database(sqlite_file)
+        db_handler = DatabaseHandler(sqlite_file, 'A2')
+        self.assertEqual(db_handler.sheet_names, ['A1', 'A2'])
+        self.assertTrue(db_handler.active_df.equals(self.db_handler.get_sheet('A2')))
+        # The edits are written to the database as they happen
+        db_handler.set_active_df('A1')
+        db_handler.add_alternative_translation(11111111, 'wording', 'Forward')
+        db_handler.delete_entry(22222222)
+        self.assertEqual(db_handler.modified_sheets, set())
+        db_handler = DatabaseHandler(sqlite_file, 'A1')
+        self.assertEqual(db_handler.active_df['ID'].tolist(), [11111111, 33333333, 44444444])
+        self.assertEqual(db_handler.active_df.at[0, 'Alternative Forward'], 'wording')
+        # Exporting back to Excel keeps the sheets
+        excel_file = os.path.join(self.tmp_dir, 'exported.xlsx')
+        db_handler.export_database(excel_file)
+        self.assertEqual(get_excel_df(excel_file, 'A1')['ID'].tolist(), [11111111, 33333333, 44444444])
+        self.assertEqual(get_excel_df(excel_file, 'A2')['ID'].tolist(), [55555555, 66666666])
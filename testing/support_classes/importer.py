@@ -0,0 +1,78 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import zipfile
+
+from modules.support_classes.database import DatabaseHandler
+from modules.support_classes.importer import VocabularyImporter
+from modules.utils.excel_ops import save_to_excel
+from testing.support_classes.database import make_sheet
+
+
+class TestVocabularyImporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        self.excel_file = os.path.join(self.tmp_dir, 'database.xlsx')
+        save_to_excel(make_sheet([11111111, 22222222], ['noun', 'verb']), self.excel_file, 'A1')
+        self.db_handler = DatabaseHandler(self.excel_file, 'A1')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def write_file(self, name, lines):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def test_import_table(self):
+        path = self.write_file('words.csv', ['word,meaning,count', 'Haus,house,10', 'wort0,word0,9',
+                                             'Baum,tree,8', 'haus,House,7', ',empty,6', 'Katze,cat,5'])
+        importer = VocabularyImporter(self.db_handler, 'A1', category='noun', chunk_size=2)
+        counts = importer.import_table(path, {'word':'Word_s', 'meaning':'Translation'})
+        # The existing entry, the repeated word and the empty line are skipped
+        self.assertEqual(counts, {'imported':3, 'skipped':3})
+        df = self.db_handler.active_df
+        self.assertEqual(df['Word_s'].tolist(), ['wort0', 'wort1', 'Haus', 'Baum', 'Katze'])
+        self.assertEqual(df['Category'].tolist()[2:], ['noun'] * 3)
+        self.assertEqual(len(set(df['ID'].tolist())), 5)
+        for entry_id in df['ID'].tolist():
+            self.assertEqual(df.at[self.db_handler.get_row_label(entry_id), 'ID'], entry_id)
+        # Importing the list again adds nothing
+        self.assertEqual(importer.import_table(path, {'word':'Word_s', 'meaning':'Translation'})['imported'], 0)
+
+    def test_import_to_new_sheet(self):
+        path = self.write_file('frequency.tsv', ['der\tthe', 'und\tand', 'der\tthe'])
+        counts = VocabularyImporter(self.db_handler, 'Frequency').import_table(path, header=False)
+        self.assertEqual(counts, {'imported':2, 'skipped':1})
+        self.db_handler.save_database()
+        db_handler = DatabaseHandler(self.excel_file, 'Frequency')
+        self.assertEqual(db_handler.sheet_names, ['A1', 'Frequency'])
+        self.assertEqual(db_handler.active_df['Translation'].tolist(), ['the', 'and'])
+        self.assertTrue(all(10**7 <= x < 10**8 for x in db_handler.active_df['ID'].tolist()))
+
+    def test_import_anki(self):
+        collection = os.path.join(self.tmp_dir, 'collection.anki2')
+        connection = sqlite3.connect(collection)
+        with connection:
+            connection.execute('CREATE TABLE notes (id INTEGER PRIMARY KEY, flds TEXT, tags TEXT)')
+            connection.executemany('INSERT INTO notes VALUES (?, ?, ?)', [
+                (1, 'der <b>Hund</b>\x1fthe dog', ' noun animal '),
+                (2, 'laufen\x1fto run<br>to walk', ' verb '),
+                (3, 'wort0\x1fword0', ''),
+            ])
+        connection.close()
+        apkg = os.path.join(self.tmp_dir, 'deck.apkg')
+        with zipfile.ZipFile(apkg, 'w') as f:
+            f.write(collection, 'collection.anki2')
+        counts = VocabularyImporter(self.db_handler, 'A1').import_anki(apkg)
+        self.assertEqual(counts, {'imported':2, 'skipped':1})
+        df = self.db_handler.active_df
+        self.assertEqual(df['Word_s'].tolist()[2:], ['der Hund', 'laufen'])
+        self.assertEqual(df['Translation'].tolist()[2:], ['the dog', 'to run to walk'])
+        self.assertEqual(df['Category'].tolist()[2:], ['noun, animal', 'verb'])
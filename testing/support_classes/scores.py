@@ -1,9 +1,18 @@
+import shutil
+import tempfile
 import unittest
 import json
 import os
+import numpy as np
 from collections import Counter
 
-from modules.support_classes.scores import ScoresHandler
+from modules.support_classes.scores import ScoresHandler, reconcile_scores, get_score_files, remove_entry_scores
+from modules.support_classes.score_store import ScoreStore
+from modules.support_classes.score_history import ScoreHistory
+from modules.support_classes.answer_log import ANSWER_DTYPE
+from modules.support_classes.weighted_sampler import WeightedSampler
+from modules.support_classes.scheduler import LeitnerScheduler, BOX_INTERVALS
+from modules.utils import get_raw_weights, normalize_weights
 
 class TestScoresHandler(unittest.TestCase):
     def setUp(self):
@@ -12,13 +21,21 @@ class TestScoresHandler(unittest.TestCase):
         self.loaded_ids = ['1', '2', '3', '4']
         self.scores_handler = ScoresHandler(self.scores_file, self.loaded_ids, self.scores_dir)
 
+    def tearDown(self):
+        # The answers are logged as they're scored, they shouldn't leak into the other tests
+        for path in [self.scores_handler.answer_log.path, self.scores_handler.store_path,
+                     self.scores_handler.schedule_path]:
+            if os.path.exists(path):
+                os.remove(path)
+        shutil.rmtree(self.scores_handler.history.folder, ignore_errors=True)
 
     def test_load(self):
         # Test loading scores from file
 
+        # The json files of the previous versions are migrated
         self.scores_handler.scores = {'1': 1, '2': 2, '3': 3, '4':0}
         with open(self.scores_handler.scores_path, 'w') as fp:
-            json.dump(self.scores_handler.scores, fp)
+            json.dump(dict(self.scores_handler.scores), fp)
         scores = self.scores_handler.load(self.loaded_ids)
         self.assertEqual(scores, self.scores_handler.scores)
 
@@ -33,9 +50,9 @@ class TestScoresHandler(unittest.TestCase):
         self.scores_handler.scores = {'1': 1, '2': 2, '3': 3}
         self.scores_handler.scores_path = f'{self.scores_dir}/testing_output.json'
         self.scores_handler.save()
-        with open(self.scores_handler.scores_path, 'r') as fp:
-            saved_scores = json.load(fp)
-        self.assertEqual(saved_scores, self.scores_handler.scores)
+        saved_scores = self.scores_handler.load(['3', '5'])
+        self.assertEqual(saved_scores, {'1': 1, '2': 2, '3': 3, '5': 0})
+        os.remove(self.scores_handler.store_path)
 
 
 
@@ -64,4 +81,213 @@ class TestScoresHandler(unittest.TestCase):
         self.scores_handler.remove_id('2')
         self.assertEqual(self.scores_handler.scores, {'1': 1, '3': 3})
 
+    def test_score_store(self):
+        store = ScoreStore([11, 22, 33], [1, -2, 3])
+        self.assertEqual(store.get_scores([33, 11]).tolist(), [3, 1])
+        with self.assertRaises(KeyError):
+            store.get_slots([11, 44])
+        # The slots stay dense after removing an entry
+        del store[11]
+        store.add_ids([44, 22])
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.get_scores(['22', '33', '44']).tolist(), [-2, 3, 0])
+        store.keep_ids([22, 44])
+        self.assertEqual(dict(store), {'22': -2, '44': 0})
+        # e.g. a category filter matching no entry
+        self.assertEqual(ScoreStore().get_scores([]).tolist(), [])
+        scores_dir = tempfile.mkdtemp()
+        sampler = ScoresHandler('Forward_A1_Translate.json', [], scores_dir).build_sampler([])
+        self.assertEqual(len(sampler.weights), 0)
+        shutil.rmtree(scores_dir)
 
+    def test_answer_log(self):
+        self.scores_handler.update('1', False)
+        self.scores_handler.update('1', False)
+        self.scores_handler.update('2', True)
+        self.assertEqual(len(self.scores_handler.answer_log.read()), 3)
+        # The answers are replayed without saving, even with a record cut by a crash
+        with open(self.scores_handler.answer_log.path, 'ab') as f:
+            f.write(b'cut')
+        scores = ScoresHandler(self.scores_file, self.loaded_ids, self.scores_dir).scores
+        self.assertEqual(dict(scores), {'1': -2, '2': 1, '3': 0, '4': 0})
+        self.scores_handler.update('4', True)
+        self.assertEqual(self.scores_handler.answer_log.read()['id'].tolist(), [1, 1, 2, 4])
+        # Past the size threshold, the log is compacted into the snapshot
+        scores_handler = ScoresHandler(self.scores_file, self.loaded_ids, self.scores_dir, max_log_size=100)
+        for _ in range(5):
+            scores_handler.update('3', True)
+        self.assertLessEqual(scores_handler.answer_log.size(), 100)
+        self.assertTrue(os.path.exists(scores_handler.store_path))
+        scores = ScoresHandler(self.scores_file, self.loaded_ids, self.scores_dir).scores
+        self.assertEqual(dict(scores), {'1': -2, '2': 1, '3': 5, '4': 1})
+
+    def test_reconcile_scores(self):
+        scores_dir = tempfile.mkdtemp()
+        with open(os.path.join(scores_dir, 'Forward_A1_Translate.json'), 'w') as fp:
+            json.dump({'11': 2, '22': -1, '33': 4}, fp)
+        scores_handler = ScoresHandler('Backward_A1_Translate.json', [11, 22], scores_dir)
+        scores_handler.update(22, True)
+        ScoresHandler('Forward_A1_1_Translate.json', [11], scores_dir).save()
+        self.assertEqual(get_score_files('A1', scores_dir), ['Backward_A1_Translate.json', 'Forward_A1_Translate.json'])
+        # The deleted entry 22 is dropped and the missing entries are added (only 22 was logged for the
+        # backward exercise), the other sheets aren't touched
+        changes = reconcile_scores('A1', [11, 33, 44], scores_dir)
+        self.assertEqual(changes, {'Backward_A1_Translate.json': (1, 3), 'Forward_A1_Translate.json': (1, 1)})
+        scores = ScoresHandler('Forward_A1_Translate.json', [], scores_dir).scores
+        self.assertEqual(dict(scores), {'11': 2, '33': 4, '44': 0})
+        scores = ScoresHandler('Forward_A1_1_Translate.json', [], scores_dir).scores
+        self.assertEqual(dict(scores), {'11': 0})
+        shutil.rmtree(scores_dir)
+
+    def test_remove_entry_scores(self):
+        scores_dir = tempfile.mkdtemp()
+        scores_handler = ScoresHandler('Forward_A1_Translate.json', [11, 22, 33], scores_dir)
+        scores_handler.load_schedule([11, 22, 33])
+        scores_handler.save()
+        scores_handler.update(22, True)
+        scores_handler.update(33, False)
+        running = ScoresHandler('Backward_A1_Translate.json', [11, 22], scores_dir)
+        running.update(22, False)
+        # Only the deleted entry is dropped, the other answers stay in the log and the running exercise is skipped
+        changes = remove_entry_scores('A1', [22, 44], scores_dir, skipped_files=['Backward_A1_Translate.json'])
+        self.assertEqual(changes, {'Forward_A1_Translate.json': 1})
+        scores_handler = ScoresHandler('Forward_A1_Translate.json', [], scores_dir)
+        self.assertEqual(dict(scores_handler.scores), {'11': 0, '33': -1})
+        self.assertEqual(scores_handler.answer_log.read()['id'].tolist(), [33])
+        self.assertEqual(len(scores_handler.history.read()), 0)
+        self.assertNotIn(22, scores_handler.load_schedule([]))
+        self.assertEqual(running.answer_log.read()['id'].tolist(), [22])
+        self.assertEqual(remove_entry_scores('A1', [22], scores_dir), {'Backward_A1_Translate.json': 1,
+                                                                        'Forward_A1_Translate.json': 0})
+        shutil.rmtree(scores_dir)
+
+    def test_summarize(self):
+        self.scores_handler.scores = {'1': 5, '2': 2, '3': -1, '4': 0}
+        for sample_id, correct in [('1', False), ('3', False), ('4', True), ('2', True), ('1', False)]:
+            self.scores_handler.update(sample_id, correct)
+        # The statistics should follow the bulk changes as well
+        self.scores_handler.scores.add_ids(['5'])
+        self.scores_handler.remove_id('2')
+        summary = self.scores_handler.summarize()
+        self.assertEqual(summary['max'], ['1', 3])
+        self.assertEqual(summary['min'], ['3', -2])
+        self.assertEqual(summary['average'], (3 - 2 + 1 + 0) / 4)
+        self.assertEqual(summary['distribution'], Counter({3: 1, -2: 1, 1: 1, 0: 1}))
+        self.assertEqual(summary['entries count'], 4)
+        self.scores_handler.update('3', True)
+        self.scores_handler.update('3', True)
+        self.assertEqual(self.scores_handler.summarize()['min'], ['5', 0])
+
+    def test_score_history(self):
+        history = ScoreHistory(os.path.join(tempfile.mkdtemp(), 'scores.history'))
+        day = 86400
+        # Two answers on Monday 2024-01-01, one on Wednesday and one the next Monday
+        records = np.array([(19723 * day + 10, 1, False, -1), (19723 * day + 20, 2, True, 1),
+                            (19725 * day, 1, True, 0), (19730 * day, 1, True, 1)], dtype=ANSWER_DTYPE)
+        history.append(records[:2])
+        # The answers already in the history are skipped
+        history.append(records[:3])
+        self.assertEqual(len(history), 3)
+        history.append(records)
+        self.assertEqual(history.read().tolist(), records.tolist())
+
+        dates, scores = history.get_entry_curve(1)
+        self.assertEqual(dates.astype(str).tolist(), ['2024-01-01', '2024-01-03', '2024-01-08'])
+        self.assertEqual(scores.tolist(), [-1, 0, 1])
+        dates, scores = history.get_entry_curve(1, 'weekly')
+        self.assertEqual(dates.astype(str).tolist(), ['2024-01-01', '2024-01-08'])
+        self.assertEqual(scores.tolist(), [0, 1])
+        self.assertEqual(len(history.get_entry_curve(3)[1]), 0)
+
+        curve = history.get_exercise_curve('weekly')
+        self.assertEqual(curve['answers'].tolist(), [3, 1])
+        self.assertEqual(curve['accuracy'].tolist(), [2 / 3, 1])
+        self.assertEqual(curve['average score'].tolist(), [0.5, 1])
+
+        # A rollup that missed some answers (a crash before it was saved) is rebuilt from the raw history
+        os.remove(history.get_rollup_path('daily'))
+        history.append(np.array([(19731 * day, 2, False, 0)], dtype=ANSWER_DTYPE))
+        self.assertEqual(history.get_exercise_curve('daily')['answers'].tolist(), [2, 1, 1, 1])
+        shutil.rmtree(os.path.dirname(history.folder))
+
+    def test_learning_curve(self):
+        self.scores_handler.update('1', True)
+        self.scores_handler.update('2', False)
+        self.scores_handler.save()
+        self.scores_handler.update('1', True)
+        # The answers of the session are included, and appending them again when saving doesn't count them twice
+        curve = self.scores_handler.get_learning_curve()
+        self.assertEqual(curve['answers'].tolist(), [3])
+        self.scores_handler.save()
+        curve = self.scores_handler.get_learning_curve('weekly')
+        self.assertEqual(curve['answers'].tolist(), [3])
+        self.assertEqual(curve['accuracy'].tolist(), [2 / 3])
+        self.assertEqual(curve['average score'].tolist(), [(2 - 1) / 2])
+
+    def test_weighted_sampler(self):
+        rng = np.random.default_rng(0)
+        ids, scores = [10, 20, 30, 40, 50], [-2, 0, 3, 12, 1]
+        sampler = WeightedSampler(ids, get_raw_weights(scores))
+        draws = [sampler.sample(rng) for _ in range(20000)]
+        frequencies = np.array([draws.count(x) for x in ids]) / len(draws)
+        np.testing.assert_allclose(frequencies, normalize_weights(scores), atol=0.01)
+        # A removed entry is never drawn, and an updated weight is used right away
+        sampler.remove(10)
+        sampler.update(50, 0.5)
+        self.assertAlmostEqual(sampler.total, sum(sampler.weights))
+        draws = [sampler.sample(rng) for _ in range(5000)]
+        self.assertNotIn(10, draws)
+        self.assertAlmostEqual(draws.count(50) / len(draws), 0.5 / sampler.total, delta=0.02)
+        # A batch holds distinct entries with a weight, and the weights are restored after it
+        weights = sampler.weights.copy()
+        self.assertEqual(sorted(sampler.sample_distinct(10, rng)), [20, 30, 40, 50])
+        np.testing.assert_array_equal(sampler.weights, weights)
+        self.assertAlmostEqual(sampler.total, sum(weights))
+        first = [sampler.sample_distinct(2, rng)[0] for _ in range(5000)]
+        self.assertAlmostEqual(first.count(50) / len(first), 0.5 / sampler.total, delta=0.02)
+
+        # The sampler of the handler follows the scores
+        sampler = self.scores_handler.build_sampler(['1', '2', '3'])
+        self.scores_handler.update('1', True)
+        self.scores_handler.update('2', False)
+        self.scores_handler.update('4', False)
+        self.scores_handler.remove_id('3')
+        weights = np.array(sampler.weights)
+        np.testing.assert_allclose(weights / weights.sum(), np.append(self.scores_handler.get_weights(['1', '2']), 0))
+
+    def test_scheduler(self):
+        scheduler = LeitnerScheduler([1, 2, 3])
+        scheduler.build_queue([1, 2, 3])
+        # The entries answered correctly move to the next box, the others go back to the first box
+        scheduler.answer(1, True, 100)
+        scheduler.answer(1, True, 200)
+        scheduler.answer(2, True, 100)
+        scheduler.answer(2, False, 150)
+        self.assertEqual(scheduler.entries[1], [2, 200 + BOX_INTERVALS[2], 200])
+        self.assertEqual(scheduler.entries[2], [0, 150, 150])
+        # An answer older than the last one is skipped
+        scheduler.answer(1, False, 150)
+        self.assertEqual(scheduler.entries[1][0], 2)
+        # The entry due the soonest is asked next
+        self.assertEqual(scheduler.next_due(), 3)
+        scheduler.answer(3, True, 300)
+        self.assertEqual(scheduler.next_due(), 2)
+        scheduler.remove(2)
+        self.assertEqual(scheduler.next_due(), 3)
+
+        # The schedule is saved next to the scores, and the answers logged since are replayed
+        self.scores_handler.load_schedule(self.loaded_ids)
+        self.scores_handler.scheduler.build_queue(self.loaded_ids)
+        self.scores_handler.update('1', True)
+        self.scores_handler.save()
+        self.scores_handler.update('1', True)
+        self.scores_handler.update('2', False)
+        scheduler = ScoresHandler(self.scores_file, self.loaded_ids, self.scores_dir).load_schedule(self.loaded_ids)
+        self.assertEqual(scheduler.entries[1][0], 2)
+        self.assertEqual(scheduler.entries[2][0], 0)
+        self.assertEqual(len(scheduler), 4)
+        # The schedule follows the entries of the database
+        self.scores_handler.reconcile(['1', '4', '5'])
+        scheduler = LeitnerScheduler.load(self.scores_handler.schedule_path)
+        self.assertEqual(sorted(scheduler.entries), [1, 4, 5])
+        self.assertEqual(scheduler.entries[1][0], 2)
@@ -0,0 +1,94 @@
+import re
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from modules.utils import TextNormalizer, clean_text, add_special_chars
+
+
+def reference_add_special_chars(answer:str) -> str:
+    """ add_special_chars, as it was written before TextNormalizer"""
+    special_chars = {'s':'ß', 'a':'ä', 'o':'ö', 'u':'ü', 
+                      'A':'Ä', 'O':'Ö', 'U':'Ü', 'S':'ẞ'}
+    for char in special_chars.keys():
+        # the special char is indicated by the english char proceeded
+        # by a '_'
+        answer = answer.replace(char + '_', special_chars[char])
+    return answer
+
+def reference_clean_text(text):
+    """ clean_text, as it was written before TextNormalizer"""
+    text = text.lower()
+    pairs2replace = {r"\[|\]|\.*|\?||\!":"",
+                        '\'re ':' are ',
+                        '\'s ':' is ',
+                        "won't":"will not",
+                        "’": "'",
+                        "'m":" am",
+                    }
+
+    for key, replacement in pairs2replace.items():
+        text = re.sub(key, replacement, text)
+    # Replace all the "not" abbreviations, e.g. doesn't -> does not
+    regex = re.compile(r"\b[A-Za-z]+n't\b")
+    matches = re.findall(regex, text)
+    for match in matches:
+        replacement = match.replace("n't", " not")
+        text = text.replace(match, replacement)
+    # Remove everything between parenthesis
+    text = re.sub(r"\([^()]*\)", '', text)
+    pattern = '|'.join(rf'^{x}\s|\s{x}\s' for x in ['a', 'an', 'the'])
+    text = re.sub(pattern, ' ', text)
+    return text.strip()
+
+
+# Texts covering every rule, and their interactions
+TEXTS = [
+    '', '  ', 'Apple', 'The apple', 'an apple a day', 'a a b', 'theatre', 'the', 'A', 'banana.', 'Why?! [sic]',
+    '...', 'Hello... world!', "they're here", "it's ok", "it's", "it’s mine", "they’re", "I'm", "I’m here",
+    "won't", "won’t", "don't, doesn't", "can't", "idon't don't", "1don't don't", "don'ts", "Ändern't",
+    'to leave (something) behind', '(a (nested) one)', 'the (big) dog', 'a/b the c/d', 'word1;word2, word3',
+    'Österreich', 'tab\tthe\tdog', 'new\nline', 'sep\x1cx\x1d', '\u3000the dog\u2003', "'s 's ", "'re 's 'm", 'wasn’t it', 'Straße',
+]
+
+
+def random_texts(n_texts:int, rng:np.random.Generator) -> list:
+    """ Random texts made of the pieces the rules look for"""
+    pieces = np.array(['a', 'an', 'the', ' ', ' ', ' ', 'x', 'dog', "'", '’', 're', 's', 'm', "n't", 'don', 'won',
+                       't', '(', ')', '.', '?', '!', '[', ']', 'A', 'The', '_', 'u', 'O', 'S', '\t', 'ä'])
+    return [''.join(rng.choice(pieces, size=rng.integers(0, 12))) for _ in range(n_texts)]
+
+
+class TestTextNormalizer(unittest.TestCase):
+    def setUp(self):
+        self.normalizer = TextNormalizer()
+        self.texts = TEXTS + random_texts(5000, np.random.default_rng(0))
+
+    def test_clean(self):
+        for text in self.texts:
+            self.assertEqual(self.normalizer.clean(text), reference_clean_text(text), repr(text))
+            self.assertEqual(clean_text(text), reference_clean_text(text), repr(text))
+        self.assertEqual(self.normalizer.clean("The dog doesn't (really) bark!"), 'dog does not  bark')
+
+    def test_add_special_chars(self):
+        for text in self.texts + ['A_pfel', 's__', 'Sa_S_', 'o_u_a_', '_a']:
+            self.assertEqual(self.normalizer.add_special_chars(text), reference_add_special_chars(text), repr(text))
+            self.assertEqual(add_special_chars(text), reference_add_special_chars(text), repr(text))
+        self.assertEqual(self.normalizer.normalize_answer('The A_pfel'), 'äpfel')
+
+    def test_columns(self):
+        texts = pd.Series(self.texts, index=np.arange(len(self.texts)) * 2)
+        cleaned = self.normalizer.clean_column(texts)
+        self.assertTrue(cleaned.index.equals(texts.index))
+        self.assertEqual(cleaned.tolist(), [reference_clean_text(x) for x in self.texts])
+        normalized = self.normalizer.normalize_column(texts)
+        self.assertEqual(normalized.tolist(),
+                         [reference_clean_text(reference_add_special_chars(x)) for x in self.texts])
+        # The missing values are empty texts
+        self.assertEqual(self.normalizer.clean_column(pd.Series(['The dog', None, np.nan])).tolist(),
+                         ['dog', '', ''])
+        self.assertEqual(self.normalizer.clean_column(pd.Series([], dtype=object)).tolist(), [])
+        # A text holding the separator of the joined column
+        texts = pd.Series(['The dog', 'a\x00the cat ', "don't"])
+        self.assertEqual(self.normalizer.clean_column(texts).tolist(), [reference_clean_text(x) for x in texts])